@@ -4,12 +4,14 @@
 定义了一些抽象类
 """
 
+import ast
 from abc import ABC
 from abc import abstractmethod
 from collections import OrderedDict
 from typing import Any
 from typing import Callable
 
+from AnalysisTools import CallGraph
 from Configuration import CompileConfiguration
 from Configuration import GlobalConfiguration
 from ParameterTypes import ABCParameter
@@ -163,17 +165,23 @@ class ABCNamespace(ABC):
             self,
             g_conf: GlobalConfiguration,
             comment_gen: Callable[[str], str],
-            namespace: str
+            namespace: str,
+            dead_names: set[str] | None = None
     ) -> tuple[str, str]:
         """
         将当前命名空间下的所有变量和临时变量存储到data storage
 
+        只保存属于当前函数栈帧的变量, 全局变量等指向其他命名空间的名称不会被保存;
+        栈帧是LocalVars中的一个复合标签, 压栈与出栈各需一条命令, 每个被保存的值在保存和加载时各需一条命令
+
         :param g_conf: 全局配置
         :type g_conf: GlobalConfiguration
         :param comment_gen: 注释生成器
         :type comment_gen: Callable[[str], str]
         :param namespace: 目标命名空间
         :type namespace: str
+        :param dead_names: 调用返回后不再被读取的变量名, 这些变量不需要保存
+        :type dead_names: set[str] | None
         :returns: (保存用命令, 加载用命令)
         :rtype: tuple[str, str]
         """
@@ -274,6 +282,16 @@ class ABCEnvironment(ABC):
         self.g_conf: GlobalConfiguration = g_conf
 
         self.func_args: dict[str, OrderedDict[str, ABCParameter]] = {}
+        self.func_defs: dict[str, ast.FunctionDef] = {}
+        self.tail_accumulators: dict[str, type[ast.operator]] = {}
+        self.dead_after_calls: dict[int, set[str]] = {}
+        self.call_graph: CallGraph = CallGraph()
+        self.constant_pool: set[int] = set()
+        self.runtime_helpers: set[str] = set()
+        self.function_refs: dict[str, int] = {}
+        self.inline_stack: list[str] = []
+        self.loop_stack: list[dict] = []
+        self.coroutines: dict[str, dict] = {}
         self._global_ids: dict[str, int] = {}
 
     def newID(self, name: str):
@@ -397,12 +415,14 @@ class ABCEnvironment(ABC):
         """
 
     @abstractmethod
-    def ns_store_local(self, namespace: str) -> tuple[str, str]:
+    def ns_store_local(self, namespace: str, dead_names: set[str] | None = None) -> tuple[str, str]:
         """
         将当前命名空间下的所有变量和临时变量存储到data storage
 
         :param namespace: 目标命名空间
         :type namespace: str
+        :param dead_names: 调用返回后不再被读取的变量名, 这些变量不需要保存
+        :type dead_names: set[str] | None
         :returns: (保存用命令, 加载用命令)
         :rtype: tuple[str, str]
         """
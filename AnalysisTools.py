@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+编译期的数据流分析
+"""
+
+import ast
+
+_ScopeNodes = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+
+def _walk_expression(node: ast.AST | None):
+    """
+    遍历表达式内的节点 (不进入嵌套的作用域)
+
+    :param node: AST节点
+    :type node: ast.AST | None
+    :return: 节点生成器
+    """
+    if node is None:
+        return
+    stack: list[ast.AST] = [node]
+    while stack:
+        sub_node = stack.pop()
+        yield sub_node
+        if isinstance(sub_node, _ScopeNodes):
+            continue
+        stack.extend(ast.iter_child_nodes(sub_node))
+
+
+def used_names(*nodes: ast.AST | None) -> set[str]:
+    """
+    获取节点中读取的名称
+
+    :param nodes: AST节点
+    :type nodes: ast.AST | None
+    :return: 名称集合
+    :rtype: set[str]
+    """
+    names: set[str] = set()
+    for node in nodes:
+        for sub_node in _walk_expression(node):
+            if isinstance(sub_node, ast.Name) and not isinstance(sub_node.ctx, ast.Store):
+                names.add(sub_node.id)
+    return names
+
+
+def stored_names(*nodes: ast.AST | None) -> set[str]:
+    """
+    获取节点中被赋值的名称
+
+    :param nodes: AST节点
+    :type nodes: ast.AST | None
+    :return: 名称集合
+    :rtype: set[str]
+    """
+    names: set[str] = set()
+    for node in nodes:
+        for sub_node in _walk_expression(node):
+            if isinstance(sub_node, ast.Name) and isinstance(sub_node.ctx, ast.Store):
+                names.add(sub_node.id)
+    return names
+
+
+def contains_node(statements: list[ast.stmt], node_types: type[ast.AST] | tuple[type[ast.AST], ...]) -> bool:
+    """
+    检查语句块内是否包含指定类型的节点 (不进入嵌套的作用域)
+
+    :param statements: 语句列表
+    :type statements: list[ast.stmt]
+    :param node_types: 节点类型
+    :type node_types: type[ast.AST] | tuple[type[ast.AST], ...]
+    :return: 是否包含
+    :rtype: bool
+    """
+    for statement in statements:
+        if any(isinstance(sub_node, node_types) for sub_node in _walk_expression(statement)):
+            return True
+    return False
+
+
+def contains_return(statements: list[ast.stmt]) -> bool:
+    """
+    检查语句块内是否包含return语句 (不进入嵌套的作用域)
+
+    :param statements: 语句列表
+    :type statements: list[ast.stmt]
+    :return: 是否包含return
+    :rtype: bool
+    """
+    return contains_node(statements, ast.Return)
+
+
+def local_names(node: ast.FunctionDef) -> list[str]:
+    """
+    获取函数的局部变量名 (参数及函数体内被赋值的名称)
+
+    :param node: 函数定义节点
+    :type node: ast.FunctionDef
+    :return: 局部变量名列表
+    :rtype: list[str]
+    """
+    names: list[str] = [arg.arg for arg in node.args.args]
+    for statement in node.body:
+        for sub_node in ast.walk(statement):
+            if isinstance(sub_node, ast.Name) and isinstance(sub_node.ctx, ast.Store) and sub_node.id not in names:
+                names.append(sub_node.id)
+    return names
+
+
+class LivenessAnalyzer:
+    """
+    函数内的活跃变量分析
+
+    对函数体做逆向数据流分析, 得到每个函数调用返回之后仍然会被读取的变量
+    """
+
+    def __init__(self, node: ast.FunctionDef) -> None:
+        """
+        初始化
+
+        :param node: 函数定义节点
+        :type node: ast.FunctionDef
+        :return: None
+        :rtype: None
+        """
+        self._node = node
+        self._loops: list[tuple[set[str], set[str]]] = []
+        self.live_after_calls: dict[int, set[str]] = {}
+
+        self._block(node.body, set())
+
+    def _record_calls(self, expression: ast.AST | None, live: set[str]) -> None:
+        """
+        记录表达式内每个函数调用返回后的活跃变量
+
+        :param expression: 表达式
+        :type expression: ast.AST | None
+        :param live: 表达式求值完成后的活跃变量
+        :type live: set[str]
+        :return: None
+        :rtype: None
+        """
+        calls = [sub_node for sub_node in _walk_expression(expression) if isinstance(sub_node, ast.Call)]
+        for call in calls:
+            # 调用本身(包括参数)在返回前已经求值完毕, 其余部分读取的名称则可能在返回后才被读取
+            inner = {id(sub_node) for sub_node in _walk_expression(call)}
+            outer = {
+                sub_node.id for sub_node in _walk_expression(expression)
+                if id(sub_node) not in inner and isinstance(sub_node, ast.Name) and isinstance(sub_node.ctx, ast.Load)
+            }
+            self.live_after_calls.setdefault(id(call), set()).update(live | outer)
+
+    def _block(self, statements: list[ast.stmt], live_out: set[str]) -> set[str]:
+        live = set(live_out)
+        for statement in reversed(statements):
+            live = self._statement(statement, live)
+        return live
+
+    def _loop(self, headers: list[ast.AST], node: ast.While | ast.For, live_out: set[str], kills: set[str]) -> set[str]:
+        exit_live = self._block(node.orelse, live_out)
+        head_live = used_names(*headers) | exit_live
+        while True:
+            self._loops.append((live_out, head_live))
+            body_live = self._block(node.body, head_live)
+            self._loops.pop()
+
+            new_head_live = used_names(*headers) | exit_live | (body_live - kills)
+            if new_head_live == head_live:
+                break
+            head_live = new_head_live
+
+        for header in headers:
+            self._record_calls(header, head_live | body_live)
+        return head_live
+
+    def _statement(self, node: ast.stmt, live_out: set[str]) -> set[str]:
+        if isinstance(node, ast.Assign):
+            live = live_out - stored_names(*node.targets)
+            self._record_calls(node.value, live | used_names(*node.targets))
+            for target in node.targets:
+                self._record_calls(target, live)
+            return live | used_names(node.value, *node.targets)
+
+        if isinstance(node, ast.AugAssign):
+            live = live_out | used_names(node.value) | {sub.id for sub in _walk_expression(node.target)
+                                                        if isinstance(sub, ast.Name)}
+            self._record_calls(node.value, live)
+            return live
+
+        if isinstance(node, ast.Expr):
+            self._record_calls(node.value, live_out)
+            return live_out | used_names(node.value)
+
+        if isinstance(node, ast.Return):
+            self._record_calls(node.value, set())
+            return used_names(node.value)
+
+        if isinstance(node, ast.If):
+            branch_live = self._block(node.body, live_out) | self._block(node.orelse, live_out)
+            self._record_calls(node.test, branch_live)
+            return branch_live | used_names(node.test)
+
+        if isinstance(node, ast.While):
+            return self._loop([node.test], node, live_out, set())
+
+        if isinstance(node, ast.For):
+            return self._loop([node.iter], node, live_out, stored_names(node.target))
+
+        if isinstance(node, ast.Break):
+            return set(self._loops[-1][0]) if self._loops else set(live_out)
+
+        if isinstance(node, ast.Continue):
+            return set(self._loops[-1][1]) if self._loops else set(live_out)
+
+        if isinstance(node, (ast.Pass, ast.Global, ast.Nonlocal, ast.Import, ast.ImportFrom, *_ScopeNodes)):
+            return live_out
+
+        # 无法分析的语句: 保守地认为所有出现过的名称都是活跃的
+        all_names = used_names(node) | stored_names(node)
+        self._record_calls(node, live_out | all_names)
+        return live_out | all_names
+
+    def dead_after_calls(self) -> dict[int, set[str]]:
+        """
+        获取每个函数调用返回后不再被读取的局部变量
+
+        :return: id(调用节点) -> 局部变量名集合
+        :rtype: dict[int, set[str]]
+        """
+        local = set(local_names(self._node))
+        return {call_id: local - live for call_id, live in self.live_after_calls.items()}
+
+
+class CallGraph:
+    """
+    全程序调用图
+
+    以函数定义节点为顶点, 按词法作用域解析函数体内对名称的调用建立边, 并计算强连通分量
+    无法解析到已知函数定义的调用(模版函数, 导入模块中的函数等)视为不会回调当前模块;
+    调用变量 (函数引用) 视为可能调用任意一个被作为值使用过的函数
+    """
+
+    def __init__(self) -> None:
+        """
+        初始化
+
+        :return: None
+        :rtype: None
+        """
+        self._edges: dict[int, set[int]] = {}
+        self._components: dict[int, int] = {}
+        self._recursive_components: set[int] = set()
+        self._component_sizes: dict[int, int] = {}
+        self._referenced: set[int] = set()
+        self._dynamic_callers: set[int] = set()
+
+    def _collect(
+            self,
+            body: list[ast.stmt],
+            scopes: list[dict[str, list[ast.FunctionDef]]],
+            variables: set[str],
+            caller: int | None) -> None:
+        scope: dict[str, list[ast.FunctionDef]] = {}
+        for statement in body:
+            for sub_node in _walk_expression(statement):
+                if isinstance(sub_node, ast.FunctionDef):
+                    scope.setdefault(sub_node.name, []).append(sub_node)
+        scopes = [scope, *scopes]
+        variables = variables | stored_names(*body)
+
+        def resolve(name: str) -> list[ast.FunctionDef]:
+            for s in scopes:
+                if name in s:
+                    return s[name]
+            return []
+
+        # 父节点总是先于子节点被遍历, 因此读取名称时已经知道它是否为被调用的函数
+        called: set[int] = set()
+        for statement in body:
+            for sub_node in _walk_expression(statement):
+                if isinstance(sub_node, ast.FunctionDef):
+                    self._edges.setdefault(id(sub_node), set())
+                    parameters = {arg.arg for arg in sub_node.args.args}
+                    self._collect(sub_node.body, scopes, variables | parameters, id(sub_node))
+                    continue
+                if isinstance(sub_node, ast.Name) and isinstance(sub_node.ctx, ast.Load) and id(sub_node) not in called:
+                    self._referenced.update(id(func) for func in resolve(sub_node.id))
+                    continue
+                if not isinstance(sub_node, ast.Call) or not isinstance(sub_node.func, ast.Name):
+                    continue
+                called.add(id(sub_node.func))
+                if caller is None:
+                    continue
+                callees = resolve(sub_node.func.id)
+                if not callees and sub_node.func.id in variables:
+                    self._dynamic_callers.add(caller)
+                self._edges[caller].update(id(callee) for callee in callees)
+
+    def add_module(self, tree: ast.Module) -> None:
+        """
+        将模块内的函数加入调用图, 并重新计算强连通分量
+
+        :param tree: 模块的AST
+        :type tree: ast.Module
+        :return: None
+        :rtype: None
+        """
+        self._collect(tree.body, [], set(), None)
+        for caller in self._dynamic_callers:
+            self._edges[caller] |= self._referenced
+        self._tarjan()
+
+    def _tarjan(self) -> None:
+        index: dict[int, int] = {}
+        low_link: dict[int, int] = {}
+        stack: list[int] = []
+        on_stack: set[int] = set()
+        self._components = {}
+        self._recursive_components = set()
+        self._component_sizes = {}
+
+        for root in self._edges:
+            if root in index:
+                continue
+            # 迭代实现, 避免深调用链触发Python递归上限
+            work: list[tuple[int, list[int]]] = [(root, list(self._edges[root]))]
+            index[root] = low_link[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                vertex, successors = work[-1]
+                if successors:
+                    successor = successors.pop()
+                    if successor not in index:
+                        index[successor] = low_link[successor] = len(index)
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, list(self._edges.get(successor, ()))))
+                    elif successor in on_stack:
+                        low_link[vertex] = min(low_link[vertex], index[successor])
+                    continue
+
+                work.pop()
+                if work:
+                    low_link[work[-1][0]] = min(low_link[work[-1][0]], low_link[vertex])
+                if low_link[vertex] != index[vertex]:
+                    continue
+
+                component: list[int] = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    self._components[member] = vertex
+                    component.append(member)
+                    if member == vertex:
+                        break
+                self._component_sizes[vertex] = len(component)
+                if len(component) > 1 or vertex in self._edges[vertex]:
+                    self._recursive_components.add(vertex)
+
+    def is_recursive(self, node: ast.FunctionDef) -> bool:
+        """
+        检查函数是否处于递归环中
+
+        :param node: 函数定义节点
+        :type node: ast.FunctionDef
+        :return: 是否处于递归环中
+        :rtype: bool
+        """
+        return self._components.get(id(node)) in self._recursive_components
+
+    def reenters_indirectly(self, node: ast.FunctionDef) -> bool:
+        """
+        检查函数是否可能经由其他函数或函数引用再次进入自身
+
+        :param node: 函数定义节点
+        :type node: ast.FunctionDef
+        :return: 是否可能间接递归
+        :rtype: bool
+        """
+        if not self.is_recursive(node):
+            return False
+        if self._component_sizes.get(self._components.get(id(node)), 1) > 1:
+            return True
+        return id(node) in self._dynamic_callers and id(node) in self._referenced
+
+    def may_reenter(self, caller: ast.FunctionDef | None, callee: ast.FunctionDef | None) -> bool:
+        """
+        检查被调用函数是否可能再次进入调用者 (即二者处于同一个递归环中)
+
+        :param caller: 调用者的函数定义节点, 模块顶层为None
+        :type caller: ast.FunctionDef | None
+        :param callee: 被调用函数的定义节点
+        :type callee: ast.FunctionDef | None
+        :return: 是否可能再次进入调用者
+        :rtype: bool
+        """
+        if caller is None or callee is None:
+            return False
+        if not self.is_recursive(caller):
+            return False
+        return self._components.get(id(caller)) == self._components.get(id(callee))
+
+
+__all__ = (
+    "used_names",
+    "stored_names",
+    "contains_node",
+    "contains_return",
+    "local_names",
+    "LivenessAnalyzer",
+    "CallGraph",
+)
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+算术运算相关工具函数 (常量运算, 求幂与需要运行时辅助函数的运算)
+"""
+
+import ast
+
+from ABCTypes import ABCEnvironment
+from BitwiseTools import BitwiseOperators
+from BitwiseTools import ShiftOperators
+from BitwiseTools import gen_bitwise_op
+from BitwiseTools import gen_constant_bitwise
+from BitwiseTools import gen_constant_shift
+from ConditionTools import matches_clause
+from Configuration import GlobalConfiguration
+from ScoreboardTools import SBCheckType
+from ScoreboardTools import SBOperationType
+from ScoreboardTools import SB_ADD
+from ScoreboardTools import SB_ASSIGN
+from ScoreboardTools import SB_CONSTANT
+from ScoreboardTools import SB_OP
+from ScoreboardTools import SB_RESET
+from ValueTools import INT_MAX
+from ValueTools import pool_constant
+from ValueTools import runtime_helper
+
+ConstantOperations: tuple[type[ast.operator], ...] = (
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Pow, ast.LShift, ast.RShift, ast.BitAnd, ast.BitOr, ast.BitXor,
+)
+"""
+右操作数为常量时可以特化的运算符
+"""
+
+CommutativeOperations: tuple[type[ast.operator], ...] = (ast.Add, ast.Mult, ast.BitAnd, ast.BitOr, ast.BitXor)
+"""
+满足交换律的运算符 (左操作数为常量时可以交换)
+"""
+
+RuntimeOperations: tuple[type[ast.operator], ...] = (
+    ast.Pow, ast.LShift, ast.RShift, ast.BitAnd, ast.BitOr, ast.BitXor,
+)
+"""
+没有对应计分板操作的运算符 (展开为多条命令或调用运行时辅助函数)
+"""
+
+ScoreOperations: dict[type[ast.operator], str] = {
+    ast.Add: SBOperationType.ADD,
+    ast.Sub: SBOperationType.SUBTRACT,
+    ast.Mult: SBOperationType.MULTIPLY,
+    ast.Div: SBOperationType.DIVIDE,
+    # 计分板的除法与取模向下取整, 与python的//和%一致
+    ast.FloorDiv: SBOperationType.DIVIDE,
+    ast.Mod: SBOperationType.MODULO,
+}
+"""
+运算符 -> 计分板操作类型
+"""
+
+
+def gen_constant_op(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        op: ast.operator, target: str, objective: str, value: int, namespace: str) -> str:
+    """
+    生成计分目标与常量运算的命令 (原地计算)
+
+    加减使用 `scoreboard players add/remove`, 乘除与取模读取常量池, 其余运算见各自的生成函数
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param op: 运算符
+    :type op: ast.operator
+    :param target: 目标
+    :type target: str
+    :param objective: 目标计分项
+    :type objective: str
+    :param value: 常量值
+    :type value: int
+    :param namespace: 当前命名空间
+    :type namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    if isinstance(op, ast.Pow):
+        if value >= 0:
+            return _gen_constant_pow(env, g_conf, target, objective, value, namespace)
+        return gen_runtime_op(env, g_conf, op, target, objective, pool_constant(env, g_conf, value), g_conf.SB_CONST)
+    if type(op) in ShiftOperators:
+        return gen_constant_shift(env, g_conf, op, target, objective, value)
+    if type(op) in BitwiseOperators:
+        return gen_constant_bitwise(env, g_conf, op, target, objective, value)
+
+    if isinstance(op, ast.Sub):
+        op, value = ast.Add(), -value
+
+    if isinstance(op, ast.Add):
+        if value == 0:
+            return ''
+        if abs(value) <= INT_MAX:
+            return SB_ADD(target, objective, value)
+        return SB_OP(SBOperationType.ADD, target, objective, pool_constant(env, g_conf, value), g_conf.SB_CONST)
+
+    if type(op) not in ScoreOperations:
+        raise Exception(f"无法解析的运算符 {op}")
+    if value == 1 and not isinstance(op, ast.Mod):
+        return ''
+    return SB_OP(ScoreOperations[type(op)], target, objective, pool_constant(env, g_conf, value), g_conf.SB_CONST)
+
+
+def _gen_constant_pow(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        target: str, objective: str, exponent: int, namespace: str) -> str:
+    """
+    生成计分目标的常量次幂 (原地计算)
+
+    按指数的二进制位从高到低展开平方-乘算法, 只需要 O(log n) 次乘法
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param target: 目标
+    :type target: str
+    :param objective: 目标计分项
+    :type objective: str
+    :param exponent: 指数 (非负)
+    :type exponent: int
+    :param namespace: 当前命名空间
+    :type namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    if exponent == 0:
+        return SB_CONSTANT(target, objective, 1)
+
+    bits = bin(exponent)[3:]
+    # 指数是2的幂时只需要平方, 不需要保存底数
+    base = f"{namespace}.*Pow{env.newID('process')}" if '1' in bits else None
+
+    command = ''
+    if base is not None:
+        command += SB_ASSIGN(base, g_conf.SB_TEMP, target, objective)
+        env.temp_ns_append(namespace, base)
+    for bit in bits:
+        command += SB_OP(SBOperationType.MULTIPLY, target, objective, target, objective)
+        if bit == '1':
+            command += SB_OP(SBOperationType.MULTIPLY, target, objective, base, g_conf.SB_TEMP)
+    if base is not None:
+        command += SB_RESET(base, g_conf.SB_TEMP)
+        env.temp_ns_remove(namespace, base)
+
+    return command
+
+
+def _build_pow_helper(env: ABCEnvironment, g_conf: GlobalConfiguration, helper_ns: str) -> dict[str, str]:
+    """
+    生成运行时求幂的辅助函数
+
+    从低位到高位处理指数的二进制位, 每一位5条命令, 最多31位;
+    负指数的结果与 `int(a ** b)` 一致 (底数绝对值大于1时为0)
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param helper_ns: 辅助函数的命名空间
+    :type helper_ns: str
+    :return: {函数名: 代码}
+    :rtype: dict[str, str]
+    """
+    temp = g_conf.SB_TEMP
+    base, exponent, result, bit = (f"{helper_ns}.{n}" for n in ("base", "exp", "result", "bit"))
+    two = pool_constant(env, g_conf, 2)
+    loop_path = f"{helper_ns}.loop".replace('\\', '/')
+    negative = matches_clause(SBCheckType.IF, exponent, temp, "..-1")
+    positive = matches_clause(SBCheckType.IF, exponent, temp, "1..")
+
+    entry = ''
+    entry += SB_CONSTANT(result, temp, 1)
+    entry += (
+        f"execute {negative} {matches_clause(SBCheckType.UNLESS, base, temp, '-1..1')} "
+        f"run {SB_CONSTANT(base, temp, 0)}"
+    )
+    entry += f"execute {negative} run {SB_OP(SBOperationType.MULTIPLY, exponent, temp, g_conf.Flags.NEG, g_conf.SB_FLAGS)}"
+    entry += f"execute {positive} run function {loop_path}\n"
+
+    loop = ''
+    loop += SB_ASSIGN(bit, temp, exponent, temp)
+    loop += SB_OP(SBOperationType.MODULO, bit, temp, two, g_conf.SB_CONST)
+    loop += f"execute {matches_clause(SBCheckType.IF, bit, temp, '1')} run "
+    loop += SB_OP(SBOperationType.MULTIPLY, result, temp, base, temp)
+    loop += SB_OP(SBOperationType.DIVIDE, exponent, temp, two, g_conf.SB_CONST)
+    loop += SB_OP(SBOperationType.MULTIPLY, base, temp, base, temp)
+    loop += f"execute {positive} run function {loop_path}\n"
+
+    return {"pow": entry, "pow.loop": loop}
+
+
+def _pow_helper(env: ABCEnvironment, g_conf: GlobalConfiguration) -> str:
+    """
+    获取运行时求幂辅助函数的命名空间
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :return: 辅助函数的命名空间
+    :rtype: str
+    """
+    return runtime_helper(env, "pow", lambda helper_ns: _build_pow_helper(env, g_conf, helper_ns))
+
+
+def gen_runtime_op(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        op: ast.operator, target: str, objective: str, operand: str, operand_objective: str) -> str:
+    """
+    调用运行时辅助函数计算 `target <op>= operand` (求幂, 移位与按位运算)
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param op: 运算符
+    :type op: ast.operator
+    :param target: 目标 (结果写回这里)
+    :type target: str
+    :param objective: 目标计分项
+    :type objective: str
+    :param operand: 右操作数
+    :type operand: str
+    :param operand_objective: 右操作数所在的计分项
+    :type operand_objective: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    if type(op) in BitwiseOperators:
+        return gen_bitwise_op(env, g_conf, op, target, objective, operand, operand_objective)
+
+    command = ''
+    helper_ns = _pow_helper(env, g_conf)
+    func_path = helper_ns.replace('\\', '/')
+    power = f"{helper_ns}.result"
+    if isinstance(op, ast.Pow):
+        command += SB_ASSIGN(f"{helper_ns}.base", g_conf.SB_TEMP, target, objective)
+        command += SB_ASSIGN(f"{helper_ns}.exp", g_conf.SB_TEMP, operand, operand_objective)
+        command += f"function {func_path}\n"
+        command += SB_ASSIGN(target, objective, power, g_conf.SB_TEMP)
+        return command
+
+    # 移位: 乘以或除以 2 ** n
+    command += SB_CONSTANT(f"{helper_ns}.base", g_conf.SB_TEMP, 2)
+    command += SB_ASSIGN(f"{helper_ns}.exp", g_conf.SB_TEMP, operand, operand_objective)
+    if isinstance(op, ast.LShift):
+        command += f"function {func_path}\n"
+        command += SB_OP(SBOperationType.MULTIPLY, target, objective, power, g_conf.SB_TEMP)
+        return command
+
+    # 2 ** 31 超出计分板范围, 右移超过30位时先右移30位再右移1位 (结果只剩符号位)
+    command += SB_OP(
+        SBOperationType.LESS, f"{helper_ns}.exp", g_conf.SB_TEMP, pool_constant(env, g_conf, 30), g_conf.SB_CONST
+    )
+    command += f"function {func_path}\n"
+    command += SB_OP(SBOperationType.DIVIDE, target, objective, power, g_conf.SB_TEMP)
+    command += (
+        f"execute {matches_clause(SBCheckType.IF, operand, operand_objective, '31..')} "
+        f"run {SB_OP(SBOperationType.DIVIDE, target, objective, pool_constant(env, g_conf, 2), g_conf.SB_CONST)}"
+    )
+    return command
+
+
+__all__ = (
+    "ConstantOperations",
+    "CommutativeOperations",
+    "RuntimeOperations",
+    "ScoreOperations",
+    "gen_constant_op",
+    "gen_runtime_op",
+)
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+赋值相关工具函数 (元组解包赋值, 改写为增强赋值)
+"""
+
+import ast
+import copy
+
+from ABCTypes import ABCEnvironment
+from AnalysisTools import used_names
+from ArithmeticTools import CommutativeOperations
+from ArithmeticTools import RuntimeOperations
+from ArithmeticTools import ScoreOperations
+from Configuration import GlobalConfiguration
+from IntrinsicTools import expand_divmod
+from ScoreboardTools import SBOperationType
+from ScoreboardTools import SB_ASSIGN
+from ScoreboardTools import SB_OP
+from ScoreboardTools import SB_RESET
+from TailCallTools import has_call
+from ValueTools import gen_expr_into
+
+
+class _SwapNames(ast.NodeTransformer):
+    def __init__(self, name_map: dict[str, str]) -> None:
+        self._name_map = name_map
+
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        if node.id in self._name_map:
+            node.id = self._name_map[node.id]
+        return node
+
+
+def plan_parallel_assign(targets: list[str], values: list[ast.expr]) -> list[tuple]:
+    """
+    规划并行赋值 `t0, t1, ... = v0, v1, ...` 的执行步骤
+
+    函数调用可能修改其他值读取的变量, 因此最后一个包含函数调用的值及其之前的值按从左到右的顺序先存入临时变量
+    (常量除外), 之后依次执行不会覆盖其他值所读取变量的赋值;
+    出现循环依赖时优先交换两个变量(交换后重命名其余值中的变量), 只有无法交换时才使用临时变量
+
+    步骤的类型:
+
+    * ("assign", 目标, 值) - 计算值并赋给目标
+    * ("swap", 目标A, 目标B) - 交换两个变量
+    * ("save", 临时变量编号, 值) - 计算值并存入临时变量
+    * ("load", 目标, 临时变量编号) - 将临时变量赋给目标
+    * ("drop", 临时变量编号) - 丢弃不再使用的临时变量 (被之后的同名目标覆盖的值)
+
+    :param targets: 目标变量名
+    :type targets: list[str]
+    :param values: 值
+    :type values: list[ast.expr]
+    :return: 执行步骤
+    :rtype: list[tuple]
+    """
+    steps: list[tuple] = []
+    temp_count = 0
+
+    # [目标, 值, 临时变量编号]
+    pending: list[list] = []
+    last_call = max((i for i, value in enumerate(values) if has_call(value)), default=-1)
+    for index, (target, value) in enumerate(zip(targets, values)):
+        if index <= last_call and not isinstance(value, ast.Constant):
+            steps.append(("save", temp_count, value))
+            pending.append([target, None, temp_count])
+            temp_count += 1
+        else:
+            pending.append([target, value, None])
+
+    # 重复的目标只保留最后一次赋值
+    seen: set[str] = set()
+    unique: list[list] = []
+    for item in reversed(pending):
+        if item[0] not in seen:
+            seen.add(item[0])
+            unique.append(item)
+        elif item[2] is not None:
+            steps.append(("drop", item[2]))
+    pending = unique[::-1]
+
+    def drop_noop() -> None:
+        pending[:] = [
+            item for item in pending
+            if not (isinstance(item[1], ast.Name) and item[1].id == item[0])
+        ]
+
+    drop_noop()
+    while pending:
+        # 目标不再被其他值读取的赋值可以直接执行
+        ready = next((
+            i for i, item in enumerate(pending)
+            if not any(item[0] in used_names(other[1]) for other in pending if other is not item)
+        ), None)
+        if ready is not None:
+            target, value, temp = pending.pop(ready)
+            steps.append(("assign", target, value) if value is not None else ("load", target, temp))
+            continue
+
+        # 目标A的值是目标B时交换A与B, 之后其余值中A与B互换
+        pending_targets = {item[0] for item in pending}
+        move = next((
+            i for i, item in enumerate(pending)
+            if isinstance(item[1], ast.Name) and item[1].id in pending_targets
+        ), None)
+        if move is not None:
+            target, source = pending[move][0], pending[move][1].id
+            steps.append(("swap", target, source))
+            pending.pop(move)
+            renamer = _SwapNames({target: source, source: target})
+            for item in pending:
+                if item[1] is not None:
+                    item[1] = renamer.visit(copy.deepcopy(item[1]))
+            drop_noop()
+            continue
+
+        # 只能先将一个值存入临时变量
+        item = next(item for item in pending if item[1] is not None)
+        steps.append(("save", temp_count, item[1]))
+        item[1], item[2] = None, temp_count
+        temp_count += 1
+
+    return steps
+
+
+def gen_parallel_assign(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        node: ast.Assign, namespace: str, file_namespace: str) -> str:
+    """
+    生成元组解包赋值 (a, b = b, a + b)
+
+    互相依赖的变量优先使用 `><` 交换, 只在无法交换时使用临时变量
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param node: 赋值节点
+    :type node: ast.Assign
+    :param namespace: 当前命名空间
+    :type namespace: str
+    :param file_namespace: 当前文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    command = ''
+    targets, value = node.targets[0], node.value
+    if isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id == "divmod":
+        command += env.COMMENT(f"Assign:展开divmod")
+        expand_command, value = expand_divmod(env, value, namespace, file_namespace)
+        command += expand_command
+    if not isinstance(value, (ast.Tuple, ast.List)) or len(value.elts) != len(targets.elts):
+        raise Exception("元组解包暂时只支持数量相同的元组")
+    if not all(isinstance(t, ast.Name) for t in targets.elts):
+        raise Exception("元组解包暂时只支持对变量赋值")
+
+    command += env.COMMENT(f"Assign:并行赋值", targets=','.join(t.id for t in targets.elts))
+
+    temps: dict[int, str] = {}
+    for step in plan_parallel_assign([t.id for t in targets.elts], value.elts):
+        if step[0] == "assign":
+            target = ast.copy_location(ast.Name(id=step[1], ctx=ast.Store()), node)
+            command += env.generate_code(
+                ast.copy_location(ast.Assign(targets=[target], value=step[2]), node), namespace, file_namespace
+            )
+        elif step[0] == "swap":
+            command += env.COMMENT(f"Assign:交换变量", a=step[1], b=step[2])
+            command += SB_OP(
+                SBOperationType.SWAP,
+                env.ns_getter(step[1], namespace)[0], g_conf.SB_VARS,
+                env.ns_getter(step[2], namespace)[0], g_conf.SB_VARS
+            )
+        elif step[0] == "save":
+            temp = f"{namespace}.*Assign{env.newID('assign')}"
+            temps[step[1]] = temp
+            command += gen_expr_into(env, g_conf, step[2], temp, g_conf.SB_TEMP, namespace, file_namespace)
+            env.temp_ns_append(namespace, temp)
+        elif step[0] == "drop":
+            temp = temps.pop(step[1])
+            command += SB_RESET(temp, g_conf.SB_TEMP)
+            env.temp_ns_remove(namespace, temp)
+        else:
+            target = ast.copy_location(ast.Name(id=step[1], ctx=ast.Store()), node)
+            name, _, root_ns = env.ns_from_node(target, namespace, not_exists_ok=True, ns_type="variable")
+            env.ns_setter(name, f"{root_ns}.{name}", namespace, "variable")
+            temp = temps.pop(step[2])
+            command += SB_ASSIGN(f"{root_ns}.{name}", g_conf.SB_VARS, temp, g_conf.SB_TEMP)
+            command += SB_RESET(temp, g_conf.SB_TEMP)
+            env.temp_ns_remove(namespace, temp)
+
+    return command
+
+
+def as_aug_assign(node: ast.Assign) -> ast.AugAssign | None:
+    """
+    将 `x = x <op> y` (以及可交换运算的 `x = y <op> x`) 转换为等价的增强赋值
+
+    另一个操作数不能包含函数调用, 以保证先读取x与原地修改x的结果相同
+
+    :param node: 赋值节点
+    :type node: ast.Assign
+    :return: 等价的增强赋值节点, 无法转换时返回None
+    :rtype: ast.AugAssign | None
+    """
+    if len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+        return None
+    value = node.value
+    if not isinstance(value, ast.BinOp) or type(value.op) not in (*ScoreOperations, *RuntimeOperations):
+        return None
+
+    name = node.targets[0].id
+    if isinstance(value.left, ast.Name) and value.left.id == name:
+        other = value.right
+    elif (
+            isinstance(value.op, CommutativeOperations)
+            and isinstance(value.right, ast.Name) and value.right.id == name
+    ):
+        other = value.left
+    else:
+        return None
+    if has_call(other):
+        return None
+
+    return ast.copy_location(ast.AugAssign(target=node.targets[0], op=value.op, value=other), node)
+
+
+__all__ = (
+    "plan_parallel_assign",
+    "gen_parallel_assign",
+    "as_aug_assign",
+)
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+位运算相关工具函数 (按位与/或/异或的逐位查表)
+"""
+
+import ast
+import operator
+from typing import Callable
+
+from ABCTypes import ABCEnvironment
+from ConditionTools import matches_clause
+from ConditionTools import store_success
+from Configuration import GlobalConfiguration
+from ScoreboardTools import SBCheckType
+from ScoreboardTools import SBOperationType
+from ScoreboardTools import SB_ADD
+from ScoreboardTools import SB_ASSIGN
+from ScoreboardTools import SB_CONSTANT
+from ScoreboardTools import SB_GET
+from ScoreboardTools import SB_OP
+from ScoreboardTools import gen_code
+from ValueTools import INT_MIN
+from ValueTools import pool_constant
+from ValueTools import runtime_helper
+
+BitwiseOperators: dict[type[ast.operator], tuple[str, Callable[[int, int], int]]] = {
+    ast.BitAnd: ("and", operator.and_),
+    ast.BitOr: ("or", operator.or_),
+    ast.BitXor: ("xor", operator.xor),
+}
+"""
+按位运算符 -> (运行时辅助函数名, 运算函数)
+"""
+
+ShiftOperators: tuple[type[ast.operator], ...] = (ast.LShift, ast.RShift)
+"""
+移位运算符
+"""
+
+
+def digit_table(op: type[ast.operator], radix: int) -> list[int]:
+    """
+    生成一位 (radix进制) 按位运算的查找表
+
+    下标为 `a * radix + b`, 值为两个数位按位运算的结果
+
+    :param op: 按位运算符
+    :type op: type[ast.operator]
+    :param radix: 进制 (2的幂)
+    :type radix: int
+    :return: 查找表
+    :rtype: list[int]
+    """
+    func = BitwiseOperators[op][1]
+    return [func(a, b) for a in range(radix) for b in range(radix)]
+
+
+def digit_range(op: type[ast.operator]) -> str:
+    """
+    获取二进制下按位运算结果为1的下标范围 (`a * 2 + b`)
+
+    :param op: 按位运算符
+    :type op: type[ast.operator]
+    :return: `matches` 范围
+    :rtype: str
+    """
+    indexes = [i for i, digit in enumerate(digit_table(op, 2)) if digit]
+    assert indexes == list(range(indexes[0], indexes[-1] + 1))
+    if len(indexes) == 1:
+        return f"{indexes[0]}"
+    return f"{indexes[0]}..{indexes[-1]}"
+
+
+def sign_cases(op: type[ast.operator]) -> list[tuple[int, int]]:
+    """
+    获取剩余高位全部为符号位(0或-1)时, 运算结果为-1的符号位组合
+
+    :param op: 按位运算符
+    :type op: type[ast.operator]
+    :return: (a的符号位, b的符号位) 列表
+    :rtype: list[tuple[int, int]]
+    """
+    func = BitwiseOperators[op][1]
+    return [(a, b) for a in (-1, 0) for b in (-1, 0) if func(a, b) == -1]
+
+
+def mask_bits(value: int) -> int | None:
+    """
+    检查常量是否为低位掩码 `2 ** k - 1`
+
+    :param value: 常量值
+    :type value: int
+    :return: 掩码位数k, 不是掩码时返回None
+    :rtype: int | None
+    """
+    if value <= 0 or value & (value + 1):
+        return None
+    return value.bit_length()
+
+
+def _build_bitwise_helper(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        op: ast.operator, helper_ns: str) -> dict[str, str]:
+    """
+    生成运行时按位运算的辅助函数
+
+    每一步从低位处理一个数位: 支持函数宏时一次处理4位 (在storage中查16x16的表), 否则一次处理1位;
+    两个操作数剩余的高位都只剩符号位时结束, 因此负数也与python的结果一致
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param op: 按位运算符
+    :type op: ast.operator
+    :param helper_ns: 辅助函数的命名空间
+    :type helper_ns: str
+    :return: {函数名: 代码}
+    :rtype: dict[str, str]
+    """
+    temp = g_conf.SB_TEMP
+    name = BitwiseOperators[type(op)][0]
+    a, b, result, index, digit, place = (
+        f"{helper_ns}.{n}" for n in ("a", "b", "result", "index", "digit", "place")
+    )
+    radix = 16 if env.c_conf.MACROS else 2
+    pooled_radix = pool_constant(env, g_conf, radix)
+    loop_path = f"{helper_ns}.loop".replace('\\', '/')
+    table = f"{g_conf.DS_ROOT} {g_conf.DS_RUNTIME}.{name}"
+    args = f"{g_conf.DS_ROOT} {g_conf.DS_RUNTIME}.args"
+    # 操作数由调用者写入
+    gen_code(a, temp)
+    gen_code(b, temp)
+
+    entry = ''
+    if env.c_conf.MACROS:
+        entry += (
+            f"execute unless data storage {table} run data modify storage {table} "
+            f"set value {digit_table(type(op), radix)}\n"
+        )
+    entry += SB_CONSTANT(result, temp, 0)
+    entry += SB_CONSTANT(place, temp, 1)
+    entry += f"function {loop_path}\n"
+
+    loop = ''
+    loop += SB_ASSIGN(index, temp, a, temp)
+    loop += SB_OP(SBOperationType.MODULO, index, temp, pooled_radix, g_conf.SB_CONST)
+    loop += SB_OP(SBOperationType.MULTIPLY, index, temp, pooled_radix, g_conf.SB_CONST)
+    loop += SB_ASSIGN(digit, temp, b, temp)
+    loop += SB_OP(SBOperationType.MODULO, digit, temp, pooled_radix, g_conf.SB_CONST)
+    loop += SB_OP(SBOperationType.ADD, index, temp, digit, temp)
+    if env.c_conf.MACROS:
+        lookup_path = f"{helper_ns}.lookup".replace('\\', '/')
+        loop += f"execute store result storage {args}.index int 1 run {SB_GET(index, temp)}"
+        loop += f"function {lookup_path} with storage {args}\n"
+    else:
+        loop += store_success(digit, temp, matches_clause(SBCheckType.IF, index, temp, digit_range(type(op))))
+    loop += SB_OP(SBOperationType.MULTIPLY, digit, temp, place, temp)
+    loop += SB_OP(SBOperationType.ADD, result, temp, digit, temp)
+    loop += SB_OP(SBOperationType.DIVIDE, a, temp, pooled_radix, g_conf.SB_CONST)
+    loop += SB_OP(SBOperationType.DIVIDE, b, temp, pooled_radix, g_conf.SB_CONST)
+    loop += SB_OP(SBOperationType.MULTIPLY, place, temp, pooled_radix, g_conf.SB_CONST)
+    # 剩余高位全部为符号位时, 结果的高位全为1相当于减去当前位权
+    for a_sign, b_sign in sign_cases(type(op)):
+        loop += (
+            f"execute {matches_clause(SBCheckType.IF, a, temp, str(a_sign))} "
+            f"{matches_clause(SBCheckType.IF, b, temp, str(b_sign))} "
+            f"run {SB_OP(SBOperationType.SUBTRACT, result, temp, place, temp)}"
+        )
+    loop += f"execute {matches_clause(SBCheckType.UNLESS, a, temp, '-1..0')} run function {loop_path}\n"
+    loop += (
+        f"execute {matches_clause(SBCheckType.IF, a, temp, '-1..0')} "
+        f"{matches_clause(SBCheckType.UNLESS, b, temp, '-1..0')} run function {loop_path}\n"
+    )
+
+    files = {name: entry, f"{name}.loop": loop}
+    if env.c_conf.MACROS:
+        files[f"{name}.lookup"] = (
+            f"$execute store result score {gen_code(digit, temp)} {temp} "
+            f"run data get storage {table}[$(index)]\n"
+        )
+    return files
+
+
+def gen_bitwise_op(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        op: ast.operator, target: str, objective: str, operand: str, operand_objective: str) -> str:
+    """
+    调用运行时辅助函数计算 `target <op>= operand` (按位运算)
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param op: 按位运算符
+    :type op: ast.operator
+    :param target: 目标 (结果写回这里)
+    :type target: str
+    :param objective: 目标计分项
+    :type objective: str
+    :param operand: 右操作数
+    :type operand: str
+    :param operand_objective: 右操作数所在的计分项
+    :type operand_objective: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    helper_ns = runtime_helper(
+        env, BitwiseOperators[type(op)][0],
+        lambda ns: _build_bitwise_helper(env, g_conf, op, ns)
+    )
+    func_path = helper_ns.replace('\\', '/')
+
+    command = ''
+    command += SB_ASSIGN(f"{helper_ns}.a", g_conf.SB_TEMP, target, objective)
+    command += SB_ASSIGN(f"{helper_ns}.b", g_conf.SB_TEMP, operand, operand_objective)
+    command += f"function {func_path}\n"
+    command += SB_ASSIGN(target, objective, f"{helper_ns}.result", g_conf.SB_TEMP)
+    return command
+
+
+def gen_constant_shift(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        op: ast.operator, target: str, objective: str, value: int) -> str:
+    """
+    生成计分目标移动常量位数的命令 (原地计算)
+
+    左移乘以常量池中的 2 ** n; 计分板的除法向下取整, 所以右移除以 2 ** n 即为算术右移
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param op: 移位运算符
+    :type op: ast.operator
+    :param target: 目标
+    :type target: str
+    :param objective: 目标计分项
+    :type objective: str
+    :param value: 移动的位数
+    :type value: int
+    :return: 生成的命令
+    :rtype: str
+    """
+    if value < 0:
+        raise Exception(f"移位的位数不能为负数: {value}")
+    if value == 0:
+        return ''
+
+    if isinstance(op, ast.LShift):
+        if value >= 32:
+            return SB_CONSTANT(target, objective, 0)
+        # 2 ** 31 与 -2 ** 31 在32位整数乘法中等价
+        factor = INT_MIN if value == 31 else 2 ** value
+        return SB_OP(SBOperationType.MULTIPLY, target, objective, pool_constant(env, g_conf, factor), g_conf.SB_CONST)
+
+    if value >= 31:
+        command = ''
+        command += f"execute {matches_clause(SBCheckType.IF, target, objective, '0..')} run "
+        command += SB_CONSTANT(target, objective, 0)
+        command += f"execute {matches_clause(SBCheckType.IF, target, objective, '..-1')} run "
+        command += SB_CONSTANT(target, objective, -1)
+        return command
+    return SB_OP(SBOperationType.DIVIDE, target, objective, pool_constant(env, g_conf, 2 ** value), g_conf.SB_CONST)
+
+
+def gen_constant_bitwise(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        op: ast.operator, target: str, objective: str, value: int) -> str:
+    """
+    生成计分目标与常量按位运算的命令 (原地计算)
+
+    与低位掩码 `2 ** k - 1` 按位与即为对 `2 ** k` 取模, 与0和-1的运算直接化简, 其余情况调用运行时辅助函数
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param op: 按位运算符
+    :type op: ast.operator
+    :param target: 目标
+    :type target: str
+    :param objective: 目标计分项
+    :type objective: str
+    :param value: 常量值
+    :type value: int
+    :return: 生成的命令
+    :rtype: str
+    """
+    identity = -1 if isinstance(op, ast.BitAnd) else 0
+    if value == identity:
+        return ''
+
+    if isinstance(op, ast.BitAnd):
+        if value == 0:
+            return SB_CONSTANT(target, objective, 0)
+        bits = mask_bits(value)
+        if bits is not None and bits < 31:
+            return SB_OP(
+                SBOperationType.MODULO, target, objective, pool_constant(env, g_conf, 2 ** bits), g_conf.SB_CONST
+            )
+        # 清除低位: 向下取整的除法再乘回去
+        bits = mask_bits(~value)
+        if bits is not None and bits < 31:
+            command = ''
+            command += SB_OP(
+                SBOperationType.DIVIDE, target, objective, pool_constant(env, g_conf, 2 ** bits), g_conf.SB_CONST
+            )
+            command += SB_OP(
+                SBOperationType.MULTIPLY, target, objective, pool_constant(env, g_conf, 2 ** bits), g_conf.SB_CONST
+            )
+            return command
+    elif value == -1:
+        if isinstance(op, ast.BitOr):
+            return SB_CONSTANT(target, objective, -1)
+        # x ^ -1 == ~x == -x - 1
+        command = ''
+        command += SB_OP(SBOperationType.MULTIPLY, target, objective, g_conf.Flags.NEG, g_conf.SB_FLAGS)
+        command += SB_ADD(target, objective, -1)
+        return command
+
+    return gen_bitwise_op(env, g_conf, op, target, objective, pool_constant(env, g_conf, value), g_conf.SB_CONST)
+
+
+__all__ = (
+    "BitwiseOperators",
+    "ShiftOperators",
+    "digit_table",
+    "digit_range",
+    "sign_cases",
+    "mask_bits",
+    "gen_bitwise_op",
+    "gen_constant_shift",
+    "gen_constant_bitwise",
+)
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+代码块相关工具函数 (将语句块写入单独的函数文件并在条件满足时调用)
+"""
+
+from ABCTypes import ABCEnvironment
+from Configuration import CompileConfiguration
+from Configuration import GlobalConfiguration
+from NamespaceTools import join_file_ns
+from ScoreboardTools import SB_GET
+
+
+def get_block_folder(env: ABCEnvironment, namespace: str, file_namespace: str) -> str:
+    """
+    获取存放代码块的文件命名空间
+
+    父级不是if块时在父级下创建.if文件夹
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 当前的文件命名空间
+    :type file_namespace: str
+    :return: 代码块所在的文件命名空间
+    :rtype: str
+    """
+    f_ns, f_name = file_namespace.rsplit('\\', maxsplit=1)
+    f_father_ns = env.file_ns_getter(f_name, f_ns, ret_raw=True)[0]
+    if f_father_ns[".__level__"] == "if":
+        return file_namespace
+
+    env.file_ns_setter(
+        ".if", join_file_ns(file_namespace, ".if"),
+        file_namespace,
+        "if", "folder", namespace
+    )
+    new_file_ns = join_file_ns(file_namespace, ".if")
+    env.mkdirs_file_ns(new_file_ns)
+    return new_file_ns
+
+
+def write_block(env: ABCEnvironment, code: str, block_name: str, block_folder: str, namespace: str) -> str:
+    """
+    注册路径并写入代码块文件
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param code: 代码块的命令
+    :type code: str
+    :param block_name: 代码块文件名 (不含后缀)
+    :type block_name: str
+    :param block_folder: 代码块所在的文件命名空间
+    :type block_folder: str
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :return: 代码块的函数路径
+    :rtype: str
+    """
+    block_ns = join_file_ns(block_folder, f"{block_name}.mcfunction")
+    env.file_ns_setter(
+        f"{block_name}.mcfunction", block_ns,
+        block_folder,
+        "if", "mcfunction", namespace
+    )
+    # 断点分割出的文件与代码块位于同一文件夹
+    with env.writeable_file_namespace(block_ns, f"{namespace}\\.if") as f:
+        f.write(code)
+
+    return f"{namespace}\\.if\\{block_name}".replace('\\', '/')
+
+
+def single_command(code: str) -> str | None:
+    """
+    获取代码块中唯一的一条命令
+
+    :param code: 代码块生成的命令
+    :type code: str
+    :return: 代码块只包含一条普通命令(忽略注释)时返回该命令, 没有命令时返回空字符串, 否则返回None
+    :rtype: str | None
+    """
+    # 断点标记需要由文件写入器处理, 不能内联
+    if "&Flag:" in code:
+        return None
+    commands = [line for line in code.splitlines() if line.strip() and not line.lstrip().startswith('#')]
+    if not commands:
+        return ''
+    if len(commands) != 1 or commands[0].startswith('$'):
+        return None
+    return commands[0].strip()
+
+
+def prepare_branch(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        code: str, block_name: str, block_folder: str, namespace: str, returns: bool) -> tuple[str, bool] | None:
+    """
+    准备满足条件时需要执行的代码 (只有一条命令时内联, 否则写入代码块文件)
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param code: 需要执行的代码
+    :type code: str
+    :param block_name: 代码块文件名 (不含后缀)
+    :type block_name: str
+    :param block_folder: 代码块所在的文件命名空间
+    :type block_folder: str
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param returns: 代码中是否包含return
+    :type returns: bool
+    :returns: (内联的命令或代码块的函数路径, 是否为代码块), 没有命令时返回None
+    :rtype: tuple[str, bool] | None
+    """
+    inline_cmd = single_command(code)
+    # 提前结束的代码块只有在唯一的命令就是return命令时才能内联
+    if returns and not (c_conf.NATIVE_RETURN and inline_cmd is not None and inline_cmd.startswith("return ")):
+        inline_cmd = None
+    if inline_cmd == '':
+        return None
+    if inline_cmd is not None:
+        return inline_cmd, False
+    return write_block(env, code, block_name, block_folder, namespace), True
+
+
+def gen_branch(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        clause: str, code: str, block_name: str, block_folder: str, namespace: str, file_namespace: str,
+        *, returns: bool = False) -> str:
+    """
+    生成满足条件时执行一段代码的命令
+
+    只有一条命令的代码直接内联到execute中, 没有命令时不生成任何内容, 否则写入代码块文件并调用
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param clause: 条件子命令
+    :type clause: str
+    :param code: 需要执行的代码
+    :type code: str
+    :param block_name: 代码块文件名 (不含后缀)
+    :type block_name: str
+    :param block_folder: 代码块所在的文件命名空间
+    :type block_folder: str
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 调用处的文件命名空间
+    :type file_namespace: str
+    :param returns: 代码中是否包含return
+    :type returns: bool
+    :return: 生成的命令
+    :rtype: str
+    """
+    target = prepare_branch(env, c_conf, code, block_name, block_folder, namespace, returns)
+    return gen_branch_call(env, c_conf, g_conf, clause, target, returns, namespace, file_namespace)
+
+
+def gen_branch_call(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        clause: str, target: tuple[str, bool] | None, returns: bool, namespace: str, file_namespace: str) -> str:
+    """
+    生成满足条件时执行准备好的代码的命令
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param clause: 条件子命令
+    :type clause: str
+    :param target: prepare_branch 的结果
+    :type target: tuple[str, bool] | None
+    :param returns: 代码中是否包含return
+    :type returns: bool
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 调用处的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    if target is None:
+        return ''
+    command, is_block = target
+    if is_block:
+        return gen_guarded_call(env, c_conf, g_conf, clause, command, returns, namespace, file_namespace)
+    if command.startswith("execute "):
+        return f"execute {clause} {command.removeprefix('execute ')}\n"
+    return f"execute {clause} run {command}\n"
+
+
+def gen_guarded_call(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        clause: str, func_path: str, returns: bool, namespace: str, file_namespace: str) -> str:
+    """
+    生成满足条件时调用代码块的命令
+
+    包含return的代码块通过返回值通知调用处结束当前函数
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param clause: 条件子命令
+    :type clause: str
+    :param func_path: 代码块的函数路径
+    :type func_path: str
+    :param returns: 代码块中是否包含return
+    :type returns: bool
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 调用处的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    if c_conf.NATIVE_RETURN and returns:
+        return f"execute {clause} if function {func_path} run {native_block_exit(env, g_conf, namespace, file_namespace)}\n"
+    return f"execute {clause} run function {func_path}\n"
+
+
+def in_function_body(env: ABCEnvironment, file_namespace: str) -> bool:
+    """
+    检查文件命名空间是否为函数体本身 (而不是函数内的代码块)
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param file_namespace: 文件命名空间
+    :type file_namespace: str
+    :return: 是否为函数体
+    :rtype: bool
+    """
+    f_ns, f_name = file_namespace.rsplit('\\', maxsplit=1)
+    return env.file_ns_getter(f_name, f_ns, ret_raw=True)[0][".__level__"] == "function"
+
+
+def native_block_exit(env: ABCEnvironment, g_conf: GlobalConfiguration, namespace: str, file_namespace: str) -> str:
+    """
+    生成代码块通过return提前结束后, 调用处需要执行的命令
+
+    代码块中的return会将返回值写入函数的返回值计分项并返回1,
+    调用处如果处于函数体中则返回该值, 否则继续向上一层代码块返回1
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param namespace: 函数的命名空间
+    :type namespace: str
+    :param file_namespace: 调用处的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令 (不换行)
+    :rtype: str
+    """
+    if in_function_body(env, file_namespace):
+        return f"return run {SB_GET(namespace, g_conf.SB_FUNC_RESULT, line_break=False)}"
+    return "return 1"
+
+
+__all__ = (
+    "get_block_folder",
+    "write_block",
+    "single_command",
+    "prepare_branch",
+    "gen_branch",
+    "gen_branch_call",
+    "gen_guarded_call",
+    "in_function_body",
+    "native_block_exit",
+)
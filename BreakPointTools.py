@@ -287,7 +287,9 @@ class SplitBreakPoint:
         except json.JSONDecodeError:
             raise Exception("SBP: Arguments are not valid json format.")
 
-        ns_path = f"{self._namespace}\\{id_name}".replace('\\', '/')
+        # 文件命名空间以反斜杠分隔, 在不以反斜杠为路径分隔符的系统上文件名会带有上级文件夹, 只取最后一级
+        func_name = id_name.replace('\\', '/').rsplit('/', maxsplit=1)[-1]
+        ns_path = f"{self._namespace}\\{func_name}".replace('\\', '/')
 
         params_data = {
             "func_path": ns_path,
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+函数调用相关工具函数
+"""
+
+import ast
+from itertools import zip_longest
+
+from ABCTypes import ABCEnvironment
+from Configuration import CompileConfiguration
+from Configuration import GlobalConfiguration
+from ParameterTypes import ABCDefaultParameter
+from ScoreboardTools import SBStoreType
+from ScoreboardTools import SB_ASSIGN
+from ScoreboardTools import SB_GET
+from ScoreboardTools import SB_RESET
+from ScoreboardTools import SB_STORE
+from ScoreboardTools import gen_code
+from TailCallTools import has_call
+from ValueTools import RuntimeFolder
+from ValueTools import binds_directly
+from ValueTools import gen_expr_into
+from ValueTools import runtime_helper
+
+
+def gen_pass_arguments(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        func_ns: str, node: ast.Call, namespace: str, file_namespace: str) -> str:
+    """
+    计算参数值并传递给被调用函数
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param func_ns: 被调用函数的命名空间
+    :type func_ns: str
+    :param node: 函数调用节点
+    :type node: ast.Call
+    :param namespace: 调用所在的命名空间
+    :type namespace: str
+    :param file_namespace: 调用所在的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    this_func_args = env.func_args[func_ns]
+    direct = binds_directly(env, func_ns)
+    objective = g_conf.SB_VARS if direct else g_conf.SB_ARGS
+    commands = ''
+
+    values: list[tuple[str, ast.expr]] = []
+    for name, value in zip_longest(this_func_args, node.args, fillvalue=None):
+        if name is None:
+            json_value = ast.dump(value)
+            raise SyntaxError(f"函数 {func_ns} 在调用时传入了额外的值 {json_value}")
+
+        # 如果参数未提供值，且不是默认值，则报错
+        # 否者，使用默认值
+        if value is None:
+            argument = this_func_args[name]
+            if not isinstance(argument, ABCDefaultParameter):
+                raise SyntaxError(f"函数 {func_ns} 的参数 {name} 未提供值")
+
+            default_value = argument.default
+
+            commands += env.COMMENT(f"Call:使用默认值", name=name, value=default_value)
+            value = ast.Constant(value=argument.default)
+        values.append((name, value))
+
+    # 后面的参数中的函数调用可能再次调用被调用函数, 覆盖已经写入的参数槽位
+    # 因此在最后一个包含调用的参数之前求值的参数需要先暂存
+    last_call = max((i for i, (_, value) in enumerate(values) if has_call(value)), default=-1)
+    staged: list[tuple[str, ast.expr | str]] = []
+    for i, (name, value) in enumerate(values):
+        if i >= last_call:
+            commands += env.COMMENT("Call:传递参数", name=name)
+            commands += gen_expr_into(env, g_conf, value, f"{func_ns}.{name}", objective, namespace, file_namespace)
+            continue
+        if isinstance(value, ast.Constant):
+            staged.append((name, value))
+            continue
+
+        stage_ns = f"{namespace}.*Arg{env.newID('argument')}"
+        commands += env.COMMENT("Call:暂存参数", name=name)
+        commands += gen_expr_into(env, g_conf, value, stage_ns, g_conf.SB_TEMP, namespace, file_namespace)
+        env.temp_ns_append(namespace, stage_ns)
+        staged.append((name, stage_ns))
+
+    for name, value in staged:
+        commands += env.COMMENT("Call:传递参数", name=name)
+        if isinstance(value, ast.Constant):
+            commands += gen_expr_into(env, g_conf, value, f"{func_ns}.{name}", objective, namespace, file_namespace)
+            continue
+        commands += SB_ASSIGN(f"{func_ns}.{name}", objective, value, g_conf.SB_TEMP)
+        commands += SB_RESET(value, g_conf.SB_TEMP)
+        env.temp_ns_remove(namespace, value)
+
+    return commands
+
+
+def gen_dynamic_call(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.Call, ref_ns: str, namespace: str, file_namespace: str) -> str:
+    """
+    通过函数引用调用函数
+
+    参数写入通用参数槽位, 引用编号写入storage后通过函数宏调用对应的跳板函数:
+    `function <call> with storage ...` 中的 `$function <ref.>$(id)` 只需要一条命令即可选择被调用的函数
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param node: 函数调用节点
+    :type node: ast.Call
+    :param ref_ns: 保存函数引用的变量的命名空间
+    :type ref_ns: str
+    :param namespace: 调用所在的命名空间
+    :type namespace: str
+    :param file_namespace: 调用所在的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    if not c_conf.MACROS:
+        raise Exception("调用函数引用需要目标版本支持函数宏 (function ... with)")
+    if node.keywords or any(isinstance(arg, ast.Starred) for arg in node.args):
+        raise Exception("通过函数引用调用时暂时只支持位置参数")
+
+    native = c_conf.NATIVE_RETURN
+    base_namespace = c_conf.base_namespace
+    call_ns = f"{base_namespace}{RuntimeFolder}\\call"
+    ref_prefix = f"{base_namespace}{RuntimeFolder}\\ref.".replace('\\', '/')
+    call_path = runtime_helper(env, "call", lambda helper_ns: {
+        "call": f"${'return run ' if native else ''}function {ref_prefix}$(id)\n"
+    }).replace('\\', '/')
+    storage = f"{g_conf.DS_ROOT} {g_conf.DS_RUNTIME}.call"
+
+    commands = ''
+    commands += env.COMMENT(f"Call:通过函数引用调用函数")
+
+    # 参数中的函数调用可能修改保存引用的变量, 需要先暂存引用
+    temps: list[str] = []
+    if any(has_call(arg) for arg in node.args):
+        ref_temp = f"{namespace}.*Ref{env.newID('reference')}"
+        commands += SB_ASSIGN(ref_temp, g_conf.SB_TEMP, ref_ns, g_conf.SB_VARS)
+        env.temp_ns_append(namespace, ref_temp)
+        temps.append(ref_temp)
+        ref = (ref_temp, g_conf.SB_TEMP)
+    else:
+        ref = (ref_ns, g_conf.SB_VARS)
+
+    # 参数中的函数调用同样可能覆盖通用参数槽位
+    last_call = max((i for i, arg in enumerate(node.args) if has_call(arg)), default=-1)
+    staged: list[tuple[int, ast.expr | str]] = []
+    for index, arg in enumerate(node.args):
+        if index >= last_call:
+            commands += env.COMMENT("Call:传递参数", index=str(index))
+            commands += gen_expr_into(
+                env, g_conf, arg, f"{call_ns}.arg{index}", g_conf.SB_ARGS, namespace, file_namespace
+            )
+            continue
+        if isinstance(arg, ast.Constant):
+            staged.append((index, arg))
+            continue
+
+        stage_ns = f"{namespace}.*Arg{env.newID('argument')}"
+        commands += env.COMMENT("Call:暂存参数", index=str(index))
+        commands += gen_expr_into(env, g_conf, arg, stage_ns, g_conf.SB_TEMP, namespace, file_namespace)
+        env.temp_ns_append(namespace, stage_ns)
+        staged.append((index, stage_ns))
+
+    for index, value in staged:
+        commands += env.COMMENT("Call:传递参数", index=str(index))
+        if isinstance(value, ast.Constant):
+            commands += gen_expr_into(
+                env, g_conf, value, f"{call_ns}.arg{index}", g_conf.SB_ARGS, namespace, file_namespace
+            )
+            continue
+        commands += SB_ASSIGN(f"{call_ns}.arg{index}", g_conf.SB_ARGS, value, g_conf.SB_TEMP)
+        temps.append(value)
+
+    commands += f"execute store result storage {storage}.id int 1 run {SB_GET(*ref)}"
+    for temp in temps:
+        commands += SB_RESET(temp, g_conf.SB_TEMP)
+        env.temp_ns_remove(namespace, temp)
+
+    call_command = f"function {call_path} with storage {storage}\n"
+    if native:
+        call_command = SB_STORE(SBStoreType.RESULT, f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP, call_command)
+
+    # 被调用的函数未知, 处于递归环中的函数需要保存当前栈帧
+    caller = env.func_defs.get(namespace)
+    if caller is not None and env.call_graph.is_recursive(caller):
+        store, load = env.ns_store_local(namespace, env.dead_after_calls.get(id(node)))
+        commands += store
+        commands += call_command
+        commands += load
+    else:
+        commands += call_command
+
+    if native:
+        return commands
+
+    gen_code(f"{call_ns}.result", g_conf.SB_FUNC_RESULT)
+    commands += SB_ASSIGN(
+        f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
+        f"{call_ns}.result", g_conf.SB_FUNC_RESULT
+    )
+    commands += SB_RESET(f"{call_ns}.result", g_conf.SB_FUNC_RESULT)
+    return commands
+
+
+__all__ = (
+    "gen_pass_arguments",
+    "gen_dynamic_call",
+)
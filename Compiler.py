@@ -15,6 +15,7 @@ from typing import Any
 
 from Environment import CompileFailedException
 from Environment import Environment
+from PragmaTools import attach_pragmas
 from ScoreboardTools import SB_Name2Code
 from Template import template_funcs
 
@@ -49,7 +50,9 @@ class Compiler:
         self._last_start_time = time.time()
 
         with open(os.path.join(self.c_conf.READ_PATH, f"{source_file}.py"), mode='r', encoding=self._encoding) as _:
-            tree = ast.parse(_.read())
+            source = _.read()
+        tree = ast.parse(source)
+        attach_pragmas(tree, source)
 
         if self.c_conf.DEBUG_MODE:
             print(ast.dump(tree, indent=4))
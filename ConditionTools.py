@@ -0,0 +1,535 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+条件判断相关工具函数 (将比较转换为execute的子命令)
+"""
+
+import ast
+import operator
+from typing import Callable
+
+from ABCTypes import ABCEnvironment
+from AnalysisTools import stored_names
+from AnalysisTools import used_names
+from BlockTools import gen_branch
+from BlockTools import get_block_folder
+from Configuration import CompileConfiguration
+from Configuration import GlobalConfiguration
+from ScoreboardTools import SBCheckType
+from ScoreboardTools import SBCompareType
+from ScoreboardTools import SBStoreType
+from ScoreboardTools import SB_CONSTANT
+from ScoreboardTools import SB_RESET
+from ScoreboardTools import gen_code
+from TailCallTools import has_call
+from ValueTools import INT_MAX
+from ValueTools import INT_MIN
+from ValueTools import gen_expr_into
+from ValueTools import int_constant
+from ValueTools import is_int_constant
+from ValueTools import pool_constant
+from ValueTools import reference_value
+
+CompareOperators: dict[type[ast.cmpop], tuple[str, str]] = {
+    ast.Eq: (SBCheckType.IF, SBCompareType.EQUAL),
+    ast.NotEq: (SBCheckType.UNLESS, SBCompareType.EQUAL),
+    ast.Lt: (SBCheckType.IF, SBCompareType.LESS),
+    ast.LtE: (SBCheckType.IF, SBCompareType.LESS_EQUAL),
+    ast.Gt: (SBCheckType.IF, SBCompareType.MORE),
+    ast.GtE: (SBCheckType.IF, SBCompareType.MORE_EQUAL),
+}
+"""
+可以直接转换为 `execute if/unless score` 的比较符 -> (检查类型, 比较类型)
+"""
+
+
+StaticCompare: dict[type[ast.cmpop], Callable[[int, int], bool]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+"""
+两侧都是常量时可以在编译期判断的比较符
+"""
+
+SwappedCompare: dict[type[ast.cmpop], type[ast.cmpop]] = {
+    ast.Eq: ast.Eq,
+    ast.NotEq: ast.NotEq,
+    ast.Lt: ast.Gt,
+    ast.LtE: ast.GtE,
+    ast.Gt: ast.Lt,
+    ast.GtE: ast.LtE,
+}
+"""
+交换左右操作数后对应的比较符
+"""
+
+
+def negate_check(check_type: str) -> str:
+    """
+    获取相反的检查类型
+
+    :param check_type: 检查类型 (SBCheckType)
+    :type check_type: str
+    :return: 相反的检查类型
+    :rtype: str
+    """
+    return SBCheckType.UNLESS if check_type == SBCheckType.IF else SBCheckType.IF
+
+
+def static_condition(node: ast.expr) -> bool | None:
+    """
+    在编译期判断条件 (常量, 常量之间的比较, 以及它们的not/and/or)
+
+    :param node: 条件表达式
+    :type node: ast.expr
+    :return: 条件的真假, 无法在编译期判断时返回None
+    :rtype: bool | None
+    """
+    value = int_constant(node)
+    if value is not None:
+        return bool(value)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        operand = static_condition(node.operand)
+        return None if operand is None else not operand
+    if isinstance(node, ast.BoolOp):
+        values = [static_condition(v) for v in node.values]
+        if None in values:
+            return None
+        return all(values) if isinstance(node.op, ast.And) else any(values)
+    if isinstance(node, ast.Compare) and all(type(op) in StaticCompare for op in node.ops):
+        operands = [int_constant(n) for n in (node.left, *node.comparators)]
+        if None in operands:
+            return None
+        return all(
+            StaticCompare[type(op)](left, right)
+            for op, left, right in zip(node.ops, operands, operands[1:])
+        )
+    return None
+
+
+def value_range(op: type[ast.cmpop], value: int) -> tuple[str, str] | None:
+    """
+    将与常量的比较转换为 `matches` 范围
+
+    :param op: 比较符
+    :type op: type[ast.cmpop]
+    :param value: 常量值
+    :type value: int
+    :returns: (检查类型, 范围), 超出计分板取值范围时返回None
+    :rtype: tuple[str, str] | None
+    """
+    if not INT_MIN <= value <= INT_MAX:
+        return None
+
+    if op is ast.Eq:
+        return SBCheckType.IF, f"{value}"
+    if op is ast.NotEq:
+        return SBCheckType.UNLESS, f"{value}"
+    if op is ast.Lt:
+        return (SBCheckType.IF, f"..{value - 1}") if value > INT_MIN else None
+    if op is ast.LtE:
+        return SBCheckType.IF, f"..{value}"
+    if op is ast.Gt:
+        return (SBCheckType.IF, f"{value + 1}..") if value < INT_MAX else None
+    if op is ast.GtE:
+        return SBCheckType.IF, f"{value}.."
+    return None
+
+
+def score_clause(check_type: str, name: str, objective: str, compare_op: str, b_name: str, b_objective: str) -> str:
+    """
+    生成比较两个计分目标的execute子命令
+
+    :param check_type: 检查类型 (SBCheckType)
+    :type check_type: str
+    :param name: 目标A
+    :type name: str
+    :param objective: 计分项A
+    :type objective: str
+    :param compare_op: 比较类型 (SBCompareType)
+    :type compare_op: str
+    :param b_name: 目标B
+    :type b_name: str
+    :param b_objective: 计分项B
+    :type b_objective: str
+    :return: 子命令
+    :rtype: str
+    """
+    return (
+        f"{check_type} score {gen_code(name, objective)} {objective} "
+        f"{compare_op} {gen_code(b_name, b_objective)} {b_objective}"
+    )
+
+
+def matches_clause(check_type: str, name: str, objective: str, matches_range: str) -> str:
+    """
+    生成检查计分目标是否处于范围内的execute子命令
+
+    :param check_type: 检查类型 (SBCheckType)
+    :type check_type: str
+    :param name: 目标
+    :type name: str
+    :param objective: 计分项
+    :type objective: str
+    :param matches_range: 范围
+    :type matches_range: str
+    :return: 子命令
+    :rtype: str
+    """
+    return f"{check_type} score {gen_code(name, objective)} {objective} matches {matches_range}"
+
+
+def is_simple_condition(node: ast.expr) -> bool:
+    """
+    检查条件是否只读取变量与常量 (判断没有副作用)
+
+    :param node: 条件表达式
+    :type node: ast.expr
+    :return: 是否只读取变量与常量
+    :rtype: bool
+    """
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return is_simple_condition(node.operand)
+    if isinstance(node, ast.BoolOp):
+        return all(is_simple_condition(value) for value in node.values)
+    if isinstance(node, ast.Name):
+        return True
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in CompareOperators:
+        operands = (node.left, node.comparators[0])
+        return (
+                any(isinstance(n, ast.Name) for n in operands)
+                and all(isinstance(n, ast.Name) or is_int_constant(n) for n in operands)
+        )
+    return False
+
+
+def store_success(target: str, objective: str, clause: str) -> str:
+    """
+    生成将条件子命令是否成立存储到计分目标的命令
+
+    :param target: 目标
+    :type target: str
+    :param objective: 计分项
+    :type objective: str
+    :param clause: 条件子命令
+    :type clause: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    return f"execute store {SBStoreType.SUCCESS} score {gen_code(target, objective)} {objective} {clause}\n"
+
+
+def is_stable_condition(test: ast.expr, body: list[ast.stmt]) -> bool:
+    """
+    检查条件在代码块执行后重新判断是否仍然得到相同的结果
+
+    条件只能读取变量与常量, 且代码块中不能调用函数或修改条件读取的变量
+
+    :param test: 条件表达式
+    :type test: ast.expr
+    :param body: 代码块的语句
+    :type body: list[ast.stmt]
+    :return: 是否稳定
+    :rtype: bool
+    """
+    if not is_simple_condition(test):
+        return False
+    if any(has_call(statement) for statement in body):
+        return False
+    return not (stored_names(*body) & used_names(test))
+
+
+def gen_condition(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        node: ast.expr, namespace: str, file_namespace: str) -> tuple[str, str, str, list[str]]:
+    """
+    将条件表达式转换为execute的子命令
+
+    单个比较符的比较直接转换为 `if/unless score`, 与常量的比较转换为 `matches` 范围,
+    not会交换条件与取反的条件, 其余表达式计算后检查结果是否不为0
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param node: 条件表达式
+    :type node: ast.expr
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 所在的文件命名空间
+    :type file_namespace: str
+    :returns: (前置命令, 条件子命令, 取反的条件子命令, 使用完子命令后需要移除的临时变量)
+    :rtype: tuple[str, str, str, list[str]]
+    """
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        setup, clause, negated, temps = gen_condition(env, g_conf, node.operand, namespace, file_namespace)
+        return setup, negated, clause, temps
+
+    # 只读取变量与常量的布尔运算没有副作用, 合并为一条execute判断
+    if isinstance(node, ast.BoolOp) and is_simple_condition(node):
+        parts = [gen_condition(env, g_conf, value, namespace, file_namespace) for value in node.values]
+        is_and = isinstance(node.op, ast.And)
+        # a or b 等价于 not (not a and not b)
+        joined = ' '.join(part[1] if is_and else part[2] for part in parts)
+        flag = f"{namespace}.*BoolOp{env.newID('bool-op')}"
+        env.temp_ns_append(namespace, flag)
+        return (
+            store_success(flag, g_conf.SB_TEMP, joined),
+            matches_clause(SBCheckType.IF, flag, g_conf.SB_TEMP, "1" if is_and else "0"),
+            matches_clause(SBCheckType.UNLESS, flag, g_conf.SB_TEMP, "1" if is_and else "0"),
+            [flag]
+        )
+
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in CompareOperators:
+        left, right, op = node.left, node.comparators[0], type(node.ops[0])
+        left, right = reference_value(env, left, namespace), reference_value(env, right, namespace)
+        if is_int_constant(left) and not is_int_constant(right):
+            left, right, op = right, left, SwappedCompare[op]
+
+        setup = ''
+        temps: list[str] = []
+        result = f"{namespace}{g_conf.ResultExt}"
+
+        # 左值在计算右值时可能被覆盖, 需要暂存
+        simple_right = isinstance(right, ast.Name) or is_int_constant(right)
+        if isinstance(left, ast.Name) and not has_call(right):
+            left_ns, left_objective = env.ns_getter(left.id, namespace)[0], g_conf.SB_VARS
+        elif simple_right:
+            setup += env.generate_code(left, namespace, file_namespace)
+            left_ns, left_objective = result, g_conf.SB_TEMP
+            env.temp_ns_append(namespace, result)
+            temps.append(result)
+        else:
+            left_ns, left_objective = f"{namespace}.*CompareLeft{env.newID('compare')}", g_conf.SB_TEMP
+            setup += gen_expr_into(env, g_conf, left, left_ns, left_objective, namespace, file_namespace)
+            env.temp_ns_append(namespace, left_ns)
+            temps.append(left_ns)
+
+        matches_range = value_range(op, int_constant(right)) if is_int_constant(right) else None
+        if matches_range is not None:
+            check_type, matches_range = matches_range
+            return (
+                setup,
+                matches_clause(check_type, left_ns, left_objective, matches_range),
+                matches_clause(negate_check(check_type), left_ns, left_objective, matches_range),
+                temps
+            )
+
+        if isinstance(right, ast.Name):
+            right_ns, right_objective = env.ns_getter(right.id, namespace)[0], g_conf.SB_VARS
+        elif is_int_constant(right):
+            right_ns, right_objective = pool_constant(env, g_conf, int_constant(right)), g_conf.SB_CONST
+        else:
+            setup += env.generate_code(right, namespace, file_namespace)
+            right_ns, right_objective = result, g_conf.SB_TEMP
+            env.temp_ns_append(namespace, result)
+            temps.append(result)
+
+        check_type, compare_op = CompareOperators[op]
+        return (
+            setup,
+            score_clause(check_type, left_ns, left_objective, compare_op, right_ns, right_objective),
+            score_clause(negate_check(check_type), left_ns, left_objective, compare_op, right_ns, right_objective),
+            temps
+        )
+
+    # 结果计分项在使用完子命令后同样需要重置
+    temps: list[str] = []
+    if isinstance(node, ast.Name):
+        value_ns, objective = env.ns_getter(node.id, namespace)[0], g_conf.SB_VARS
+        setup = ''
+    else:
+        value_ns, objective = f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
+        setup = env.generate_code(node, namespace, file_namespace)
+        env.temp_ns_append(namespace, value_ns)
+        temps.append(value_ns)
+
+    return (
+        setup,
+        matches_clause(SBCheckType.UNLESS, value_ns, objective, "0"),
+        matches_clause(SBCheckType.IF, value_ns, objective, "0"),
+        temps
+    )
+
+
+def gen_store_condition(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        node: ast.expr, target: str, namespace: str, file_namespace: str) -> str:
+    """
+    计算条件并将结果(1或0)存储到临时计分项
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param node: 条件表达式
+    :type node: ast.expr
+    :param target: 目标
+    :type target: str
+    :param namespace: 当前命名空间
+    :type namespace: str
+    :param file_namespace: 当前文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    setup, clause, _, temps = gen_condition(env, g_conf, node, namespace, file_namespace)
+    command = setup
+    command += store_success(target, g_conf.SB_TEMP, clause)
+    for temp in temps:
+        # 目标可能就是条件读取的结果计分项
+        if temp != target:
+            command += SB_RESET(temp, g_conf.SB_TEMP)
+        env.temp_ns_remove(namespace, temp)
+    return command
+
+
+def compare_refs_clause(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        left: tuple[str, str] | int, op: type[ast.cmpop], right: tuple[str, str] | int) -> str | bool:
+    """
+    生成比较两个值的execute子命令
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param left: 左值 ((计分目标, 计分项) 或常量)
+    :type left: tuple[str, str] | int
+    :param op: 比较符
+    :type op: type[ast.cmpop]
+    :param right: 右值 ((计分目标, 计分项) 或常量)
+    :type right: tuple[str, str] | int
+    :return: 子命令, 两个值都是常量时直接返回比较结果
+    :rtype: str | bool
+    """
+    if isinstance(left, int) and isinstance(right, int):
+        return bool(StaticCompare[op](left, right))
+    if isinstance(left, int):
+        left, right, op = right, left, SwappedCompare[op]
+
+    if isinstance(right, int):
+        matches_range = value_range(op, right)
+        if matches_range is not None:
+            return matches_clause(matches_range[0], *left, matches_range[1])
+        right = (pool_constant(env, g_conf, right), g_conf.SB_CONST)
+
+    check_type, compare_op = CompareOperators[op]
+    return score_clause(check_type, *left, compare_op, *right)
+
+
+def gen_chained_compare(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.Compare, namespace: str, file_namespace: str) -> str:
+    """
+    生成链式比较 (a < b < c)
+
+    每个操作数只计算一次; 只读取变量与常量时所有比较合并为一条execute,
+    否则之后的操作数只在之前的比较都成立时才在代码块中计算
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param node: 比较节点
+    :type node: ast.Compare
+    :param namespace: 当前命名空间
+    :type namespace: str
+    :param file_namespace: 当前文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    result = f"{namespace}{g_conf.ResultExt}"
+    operands = [reference_value(env, operand, namespace) for operand in (node.left, *node.comparators)]
+    temps: list[str] = []
+
+    def operand_ref(index: int, f_ns: str) -> tuple[str, tuple[str, str] | int]:
+        operand = operands[index]
+        if is_int_constant(operand):
+            return '', int_constant(operand)
+        # 之后的操作数中的函数调用可能修改变量, 此时需要先暂存
+        if isinstance(operand, ast.Name) and not any(has_call(o) for o in operands[index + 1:]):
+            return '', (env.ns_getter(operand.id, namespace)[0], g_conf.SB_VARS)
+        temp = f"{namespace}.*CompareChain{env.newID('compare')}"
+        code = gen_expr_into(env, g_conf, operand, temp, g_conf.SB_TEMP, namespace, f_ns)
+        env.temp_ns_append(namespace, temp)
+        temps.append(temp)
+        return code, (temp, g_conf.SB_TEMP)
+
+    command = ''
+    if all(isinstance(o, ast.Name) or is_int_constant(o) for o in operands):
+        command += env.COMMENT(f"Compare:合并链式比较")
+        clauses: list[str] = []
+        refs = [operand_ref(i, file_namespace)[1] for i in range(len(operands))]
+        for i, op in enumerate(node.ops):
+            clause = compare_refs_clause(env, g_conf, refs[i], type(op), refs[i + 1])
+            if clause is False:
+                return command + SB_CONSTANT(result, g_conf.SB_TEMP, 0)
+            if clause is not True:
+                clauses.append(clause)
+        if not clauses:
+            return command + SB_CONSTANT(result, g_conf.SB_TEMP, 1)
+        return command + store_success(result, g_conf.SB_TEMP, ' '.join(clauses))
+
+    command += env.COMMENT(f"Compare:链式比较")
+    block_folder = get_block_folder(env, namespace, file_namespace)
+    code, previous = operand_ref(0, file_namespace)
+    command += code
+    for i, op in enumerate(node.ops):
+        f_ns = file_namespace if i == 0 else block_folder
+        code, current = operand_ref(i + 1, f_ns)
+        clause = compare_refs_clause(env, g_conf, previous, type(op), current)
+        if clause is True:
+            code += SB_CONSTANT(result, g_conf.SB_TEMP, 1)
+        elif clause is False:
+            code += SB_CONSTANT(result, g_conf.SB_TEMP, 0)
+        else:
+            code += store_success(result, g_conf.SB_TEMP, clause)
+
+        if i == 0:
+            command += code
+        else:
+            # 之前的比较都成立时才计算之后的操作数
+            command += gen_branch(
+                env, c_conf, g_conf,
+                matches_clause(SBCheckType.IF, result, g_conf.SB_TEMP, "1"),
+                code, f"{env.newID('if-block')}", block_folder, namespace, file_namespace
+            )
+        previous = current
+
+    for temp in temps:
+        command += SB_RESET(temp, g_conf.SB_TEMP)
+        env.temp_ns_remove(namespace, temp)
+
+    return command
+
+
+__all__ = (
+    "CompareOperators",
+    "StaticCompare",
+    "SwappedCompare",
+    "negate_check",
+    "static_condition",
+    "value_range",
+    "score_clause",
+    "matches_clause",
+    "is_simple_condition",
+    "store_success",
+    "is_stable_condition",
+    "gen_condition",
+    "gen_store_condition",
+    "compare_refs_clause",
+    "gen_chained_compare",
+)
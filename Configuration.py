@@ -19,6 +19,7 @@ class GlobalConfiguration:
         Input = "Py.Input"
         Vars = "Py.Vars"
         FuncResult = "Py.FuncResult"
+        Const = "Py.Const"
 
     class _Flags:
         """
@@ -38,7 +39,7 @@ class GlobalConfiguration:
 
         Temp = "temporary"
         LocalVars = "LocalVars"
-        LocalTemp = "LocalTemp"
+        Runtime = "Runtime"
 
     class _RawJsons:
         """
@@ -83,12 +84,13 @@ class GlobalConfiguration:
         self.SB_INPUT = self.ScoreBoards.Input
         self.SB_VARS = self.ScoreBoards.Vars
         self.SB_FUNC_RESULT = self.ScoreBoards.FuncResult
+        self.SB_CONST = self.ScoreBoards.Const
 
         self.DataStorages = self._DataStorages()
         self.DS_ROOT = self.DataStorages.Root
         self.DS_TEMP = self.DataStorages.Temp
         self.DS_LOCAL_VARS = self.DataStorages.LocalVars
-        self.DS_LOCAL_TEMP = self.DataStorages.LocalTemp
+        self.DS_RUNTIME = self.DataStorages.Runtime
 
         self.RawJsons = self._RawJsons()
 
@@ -97,6 +99,16 @@ class CompileConfiguration:
     Encoding = "utf-8"
     TEMPLATE_PATH = "./template"
 
+    NativeReturnVersion: tuple[int, ...] = (1, 20, 3)
+    """
+    支持 `return run` 与 `execute if function` 的最低版本
+    """
+
+    MacroVersion: tuple[int, ...] = (1, 20, 2)
+    """
+    支持函数宏 (`function ... with`) 的最低版本
+    """
+
     def __init__(
             self,
             base_namespace: str,
@@ -105,12 +117,20 @@ class CompileConfiguration:
             *,
             debug_mode: bool = False,
             generate_comments: bool = True,
+            inline_threshold: int = 12,
+            unroll_threshold: int = 48,
+            target_version: tuple[int, ...] = (1, 16, 5),
     ) -> None:
         self.base_namespace = base_namespace
         self.READ_PATH = read_path
         self.SAVE_PATH: str = save_path
         self.DEBUG_MODE = debug_mode
         self.GENERATE_COMMENTS = generate_comments
+        self.INLINE_THRESHOLD = inline_threshold
+        self.UNROLL_THRESHOLD = unroll_threshold
+        self.TARGET_VERSION = tuple(target_version)
+        self.NATIVE_RETURN = self.TARGET_VERSION >= self.NativeReturnVersion
+        self.MACROS = self.TARGET_VERSION >= self.MacroVersion
 
 
 __all__ = (
@@ -20,6 +20,7 @@ class ScoreBoards:
     Input = "Py.Input"
     Vars = "Py.Vars"
     FuncResult = "Py.FuncResult"
+    Const = "Py.Const"
 
 
 DataStorageRoot = "python"
@@ -31,7 +32,7 @@ class DataStorages:
     """
     Temp = "temporary"
     LocalVars = "LocalVars"
-    LocalTemp = "LocalTemp"
+    Runtime = "Runtime"
 
 
 class RawJsons:
@@ -86,6 +87,7 @@ SCOREBOARDS_PLACEHOLDER_MAP = {
     "SB:Input": ScoreBoards.Input,
     "SB:Vars": ScoreBoards.Vars,
     "SB:FuncResult": ScoreBoards.FuncResult,
+    "SB:Const": ScoreBoards.Const,
 }
 
 DATA_STORAGES_PLACEHOLDER_MAP = {
@@ -93,7 +95,7 @@ DATA_STORAGES_PLACEHOLDER_MAP = {
 
     "DS:Temp": DataStorages.Temp,
     "DS:LocalVars": DataStorages.LocalVars,
-    "DS:LocalTemp": DataStorages.LocalTemp,
+    "DS:Runtime": DataStorages.Runtime,
 }
 
 BUILTIN_PLACEHOLDER_MAP = {
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+协程 (async函数与生成器函数) 相关工具函数
+
+函数体在每个挂起点 (await sleep(...) / yield) 处切分为多个代码段, 每个代码段对应状态机的一个状态,
+挂起之后的语句 (包括所在的if/循环之后的语句) 放入新的代码段, 由恢复函数根据状态选择
+"""
+
+import ast
+
+from ABCTypes import ABCEnvironment
+from AnalysisTools import contains_node
+from BlockTools import get_block_folder
+from BlockTools import write_block
+from ConditionTools import matches_clause
+from Configuration import CompileConfiguration
+from Configuration import GlobalConfiguration
+from DispatchTools import dispatch_intervals
+from DispatchTools import gen_decision_tree
+from LoopTools import declare_variable
+from LoopTools import gen_loop
+from LoopTools import loop_exits
+from LoopTools import loop_slicing
+from LoopTools import range_arguments
+from NamespaceTools import join_file_ns
+from ScoreboardTools import SBCheckType
+from ScoreboardTools import SB_ASSIGN
+from ScoreboardTools import SB_CONSTANT
+from ScoreboardTools import SB_RESET
+from ValueTools import int_constant
+
+CoroutineDone: int = -1
+"""
+状态: 协程已经结束
+"""
+
+SleepFunction: str = "sleep"
+"""
+async函数中可以等待的函数名 (参数为tick数)
+"""
+
+
+class SuspendStatement(ast.stmt):
+    """
+    挂起协程: 设置恢复时的状态后结束当前代码段
+
+    ticks 不为None时 (await) 在指定tick数后调度恢复函数, value 不为None时 (yield) 先保存产出的值
+    """
+    _fields = ("state", "ticks", "value")
+
+
+class GotoStatement(ast.stmt):
+    """
+    直接进入另一个代码段
+    """
+    _fields = ("state",)
+
+
+class FinishStatement(ast.stmt):
+    """
+    结束协程
+    """
+    _fields = ()
+
+
+def is_generator(node: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
+    """
+    检查函数是否为生成器函数 (函数体中包含yield, 不进入嵌套的作用域)
+
+    :param node: 函数定义节点
+    :type node: ast.FunctionDef | ast.AsyncFunctionDef
+    :return: 是否为生成器函数
+    :rtype: bool
+    """
+    return contains_node(node.body, (ast.Yield, ast.YieldFrom))
+
+
+def _suspends(statement: ast.stmt) -> bool:
+    """
+    检查语句中是否包含挂起点或return (不进入嵌套的作用域)
+
+    :param statement: 语句
+    :type statement: ast.stmt
+    :return: 是否包含
+    :rtype: bool
+    """
+    return contains_node([statement], (ast.Await, ast.Yield, ast.YieldFrom, ast.Return))
+
+
+def _suspend_point(statement: ast.stmt, state: int) -> SuspendStatement | None:
+    """
+    将 `await sleep(ticks)` 或 `yield 值` 语句转换为挂起语句
+
+    :param statement: 语句
+    :type statement: ast.stmt
+    :param state: 恢复时的状态
+    :type state: int
+    :return: 挂起语句, 不是挂起点时返回None
+    :rtype: SuspendStatement | None
+    """
+    if not isinstance(statement, ast.Expr):
+        return None
+    value = statement.value
+
+    if isinstance(value, ast.Yield):
+        yielded = value.value if value.value is not None else ast.Constant(value=0)
+        return ast.copy_location(SuspendStatement(state=state, ticks=None, value=yielded), statement)
+
+    if isinstance(value, ast.Await):
+        call = value.value
+        if not (
+                isinstance(call, ast.Call)
+                and isinstance(call.func, (ast.Name, ast.Attribute))
+                and getattr(call.func, "id", getattr(call.func, "attr", None)) == SleepFunction
+                and len(call.args) == 1 and not call.keywords
+        ):
+            raise Exception(f"await暂时只支持 await {SleepFunction}(tick数)")
+        ticks = call.args[0]
+        if not isinstance(ticks, ast.Constant) or type(ticks.value) is not int or ticks.value < 1:
+            raise Exception(f"{SleepFunction}的参数必须是正整数常量")
+        return ast.copy_location(SuspendStatement(state=state, ticks=ticks.value, value=None), statement)
+
+    return None
+
+
+class _CoroutineLowering:
+    def __init__(self) -> None:
+        self.segments: list[list[ast.stmt]] = []
+        self.resumable: list[int] = []
+        self._hidden_id: int = 0
+
+    def new_segment(self) -> int:
+        self.segments.append([])
+        return len(self.segments) - 1
+
+    def segment(self, statements: list[ast.stmt], cont: int | None, loop: tuple[int | None, int] | None) -> int:
+        index = self.new_segment()
+        self.segments[index] = self.lower(statements, cont, loop)
+        return index
+
+    def hidden_name(self, name: str) -> str:
+        self._hidden_id += 1
+        return f"co{self._hidden_id}-{name}"
+
+    def lower(self, statements: list[ast.stmt], cont: int | None, loop: tuple[int | None, int] | None) -> list[ast.stmt]:
+        """
+        改写语句块, 执行完后进入cont代码段 (None表示结束协程)
+
+        loop 为所在循环的 (break后进入的代码段, continue后进入的代码段)
+        """
+        lowered: list[ast.stmt] = []
+        for index, statement in enumerate(statements):
+            rest = statements[index + 1:]
+
+            if isinstance(statement, ast.Return):
+                if statement.value is not None:
+                    raise Exception("协程暂时不支持返回值")
+                lowered.append(ast.copy_location(FinishStatement(), statement))
+                return lowered
+            if isinstance(statement, (ast.Break, ast.Continue)):
+                target = loop[0] if isinstance(statement, ast.Break) else loop[1]
+                lowered.append(_goto(target, statement))
+                return lowered
+
+            if not _suspends(statement) and not (loop is not None and loop_exits([statement])):
+                lowered.append(statement)
+                continue
+
+            suspend = _suspend_point(statement, -1)
+            if suspend is not None:
+                suspend.state = self.segment(rest, cont, loop)
+                self.resumable.append(suspend.state)
+                lowered.append(suspend)
+                return lowered
+
+            # 之后的语句放入新的代码段, 分支与循环执行完后进入该代码段
+            after = self.segment(rest, cont, loop) if rest else cont
+            if isinstance(statement, ast.If):
+                lowered.append(ast.copy_location(ast.If(
+                    test=statement.test,
+                    body=self.lower(statement.body, after, loop),
+                    orelse=self.lower(statement.orelse, after, loop)
+                ), statement))
+            elif isinstance(statement, ast.While):
+                head = self.new_segment()
+                self.segments[head] = [ast.copy_location(ast.If(
+                    test=statement.test,
+                    body=self.lower(statement.body, head, (after, head)),
+                    orelse=self.lower(statement.orelse, after, loop)
+                ), statement)]
+                lowered.append(_goto(head, statement))
+            elif isinstance(statement, ast.For):
+                lowered.extend(self.lower_for(statement, after, loop))
+            else:
+                raise Exception(f"协程中暂不支持在 {type(statement).__name__} 语句内挂起")
+            return lowered
+
+        lowered.append(_goto(cont, statements[-1] if statements else None))
+        return lowered
+
+    def lower_for(self, node: ast.For, after: int | None, loop: tuple[int | None, int] | None) -> list[ast.stmt]:
+        """
+        改写包含挂起点的 `for 变量 in range(...)` 循环 (使用隐藏的计数器与结束值)
+        """
+        start, end, step = range_arguments(node)
+        counter = self.hidden_name("i")
+        init: list[ast.stmt] = [
+            ast.copy_location(ast.Assign(targets=[ast.Name(id=counter, ctx=ast.Store())], value=start), node),
+        ]
+        # 结束值只在进入循环时计算一次
+        if int_constant(end) is None:
+            limit = self.hidden_name("end")
+            init.append(ast.copy_location(ast.Assign(targets=[ast.Name(id=limit, ctx=ast.Store())], value=end), node))
+            end = ast.Name(id=limit, ctx=ast.Load())
+
+        head = self.new_segment()
+        step_segment = self.new_segment()
+        self.segments[step_segment] = [
+            ast.copy_location(ast.AugAssign(
+                target=ast.Name(id=counter, ctx=ast.Store()), op=ast.Add(), value=ast.Constant(value=step)
+            ), node),
+            _goto(head, node),
+        ]
+        self.segments[head] = [ast.copy_location(ast.If(
+            test=ast.Compare(
+                left=ast.Name(id=counter, ctx=ast.Load()),
+                ops=[ast.Lt() if step > 0 else ast.Gt()],
+                comparators=[end]
+            ),
+            body=[
+                ast.copy_location(ast.Assign(
+                    targets=[node.target], value=ast.Name(id=counter, ctx=ast.Load())
+                ), node),
+                *self.lower(node.body, step_segment, (after, step_segment)),
+            ],
+            orelse=self.lower(node.orelse, after, loop)
+        ), node)]
+
+        return [*init, _goto(head, node)]
+
+
+def _goto(state: int | None, node: ast.AST | None) -> ast.stmt:
+    """
+    生成进入代码段的语句
+
+    :param state: 代码段, None表示结束协程
+    :type state: int | None
+    :param node: 用于复制位置信息的节点
+    :type node: ast.AST | None
+    :return: 语句
+    :rtype: ast.stmt
+    """
+    statement = FinishStatement() if state is None else GotoStatement(state=state)
+    return statement if node is None else ast.copy_location(statement, node)
+
+
+def lower_coroutine(node: ast.FunctionDef | ast.AsyncFunctionDef) -> tuple[list[list[ast.stmt]], list[int]]:
+    """
+    将协程的函数体切分为代码段
+
+    第0个代码段为函数开始执行时的代码段, 挂起之后从挂起语句记录的代码段恢复,
+    代码段之间通过 GotoStatement 跳转 (循环的每次迭代同样通过跳转进入), 执行到函数末尾时结束协程
+
+    :param node: 函数定义节点
+    :type node: ast.FunctionDef | ast.AsyncFunctionDef
+    :returns: (代码段列表, 挂起后可以恢复的代码段)
+    :rtype: tuple[list[list[ast.stmt]], list[int]]
+    """
+    lowering = _CoroutineLowering()
+    lowering.segment(node.body, None, None)
+    return lowering.segments, lowering.resumable
+
+
+def gen_coroutine_def(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.FunctionDef | ast.AsyncFunctionDef, namespace: str, file_namespace: str) -> str:
+    """
+    生成协程 (async函数或生成器函数)
+
+    函数体切分为多个代码段, 状态计分项记录挂起后恢复执行的代码段, 恢复函数根据状态进入对应的代码段;
+    局部变量保存在函数的变量槽位中, 因此同一个协程同时只能存在一个实例
+
+    * async函数: 调用时取消之前的实例并立即开始执行, `await sleep(n)` 通过 `schedule function` 在n tick后恢复
+    * 生成器函数: 调用时只绑定参数, 每次调用恢复函数执行到下一个yield, 产出的值保存在函数返回值中
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param node: 函数定义节点
+    :type node: ast.FunctionDef | ast.AsyncFunctionDef
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 所在的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    # 注册路径
+    new_file_ns = join_file_ns(file_namespace, f"{node.name}")
+    env.mkdirs_file_ns(new_file_ns)
+    env.file_ns_setter(
+        f"{node.name}", new_file_ns, file_namespace,
+        "function", "folder", namespace
+    )
+    func_file_ns = join_file_ns(file_namespace, f"{node.name}.mcfunction")
+    env.file_ns_setter(
+        f"{node.name}.mcfunction", func_file_ns, file_namespace,
+        "function", "mcfunction", namespace
+    )
+
+    func_ns = f"{namespace}\\{node.name}"
+    generator = is_generator(node)
+    segments, resumable = lower_coroutine(node)
+    if generator:
+        resumable = [0, *resumable]
+
+    block_uid = env.newID("if-block")
+    block_folder = get_block_folder(env, func_ns, new_file_ns)
+    segment_paths = {
+        state: f"{func_ns}\\.if\\{block_uid}-state{state}".replace('\\', '/')
+        for state in range(len(segments))
+    }
+    resume_path = f"{func_ns}\\.if\\{block_uid}-resume".replace('\\', '/')
+    state = (f"{func_ns}.*State", g_conf.SB_VARS)
+
+    with env.writeable_file_namespace(func_file_ns, namespace) as f:
+        env.ns_setter(node.name, func_ns, namespace, "function")
+        env.temp_ns_init(func_ns)
+        env.coroutines[func_ns] = {
+            "generator": generator,
+            "state": state,
+            "resume": resume_path,
+            "segments": segment_paths,
+        }
+
+        f.write(env.COMMENT(f"FunctionDef:函数头"))
+        f.write(env.generate_code(node.args, func_ns, new_file_ns))
+        if generator:
+            f.write(env.COMMENT(f"Coroutine:等待恢复"))
+            f.write(SB_CONSTANT(*state, 0))
+        else:
+            f.write(env.COMMENT(f"Coroutine:取消之前的实例"))
+            f.write(f"schedule clear {resume_path}\n")
+            f.write(env.COMMENT(f"FunctionDef:函数体"))
+            for statement in segments[0]:
+                f.write(env.generate_code(statement, func_ns, new_file_ns))
+
+    for index, segment in enumerate(segments):
+        if index == 0 and not generator:
+            continue
+        code = ''
+        for statement in segment:
+            code += env.generate_code(statement, func_ns, block_folder)
+        write_block(env, code, f"{block_uid}-state{index}", block_folder, func_ns)
+
+    # 代码段执行时会修改状态, 因此根据状态的副本选择代码段
+    current = (f"{func_ns}.*Resume", g_conf.SB_TEMP)
+    resume = SB_ASSIGN(*current, *state)
+    resume += gen_decision_tree(
+        env, c_conf, g_conf, current,
+        dispatch_intervals([[index] for index in resumable], False),
+        [((f"function {segment_paths[index]}", False), False) for index in resumable],
+        block_uid, func_ns, block_folder
+    )
+    resume += SB_RESET(*current)
+    write_block(env, resume, f"{block_uid}-resume", block_folder, func_ns)
+    return ''
+
+
+def generator_call(env: ABCEnvironment, node: ast.expr, namespace: str) -> str | None:
+    """
+    检查表达式是否为对生成器函数的调用
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param node: 表达式
+    :type node: ast.expr
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :return: 生成器函数的命名空间, 不是生成器函数调用时返回None
+    :rtype: str | None
+    """
+    if not isinstance(node, ast.Call) or not isinstance(node.func, (ast.Name, ast.Attribute)):
+        return None
+    try:
+        func_ns = env.ns_from_node(node.func, namespace)[1]
+    except Exception:
+        return None
+    if func_ns in env.coroutines and env.coroutines[func_ns]["generator"]:
+        return func_ns
+    return None
+
+
+def gen_for_generator(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.For, func_ns: str, namespace: str, file_namespace: str) -> str:
+    """
+    生成遍历生成器的for循环
+
+    进入循环前调用生成器函数绑定参数, 每次判断条件前调用恢复函数执行到下一个yield,
+    生成器结束时状态为 CoroutineDone
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param node: for循环节点
+    :type node: ast.For
+    :param func_ns: 生成器函数的命名空间
+    :type func_ns: str
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 所在的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    if not isinstance(node.target, ast.Name):
+        raise Exception("遍历生成器的for循环暂时只支持单个变量")
+    coroutine = env.coroutines[func_ns]
+    target = node.target.id
+
+    init = env.generate_code(ast.copy_location(ast.Expr(value=node.iter), node), namespace, file_namespace)
+    setup = f"function {coroutine['resume']}\n"
+    clause = matches_clause(SBCheckType.UNLESS, *coroutine["state"], f"{CoroutineDone}")
+    head = SB_ASSIGN(declare_variable(env, target, namespace), g_conf.SB_VARS, func_ns, g_conf.SB_FUNC_RESULT)
+
+    command = ''
+    command += env.COMMENT(f"For:遍历生成器", target=target)
+    command += gen_loop(
+        env, c_conf, g_conf, node, init, head, setup, clause, namespace, file_namespace,
+        slicing=loop_slicing(env, node, namespace)
+    )
+    return command
+
+
+__all__ = (
+    "CoroutineDone",
+    "SleepFunction",
+    "SuspendStatement",
+    "GotoStatement",
+    "FinishStatement",
+    "is_generator",
+    "lower_coroutine",
+    "gen_coroutine_def",
+    "generator_call",
+    "gen_for_generator",
+)
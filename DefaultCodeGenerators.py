@@ -5,39 +5,108 @@
 """
 
 import ast
+import copy
 import inspect
 import os
 import time
 import warnings
 from collections import OrderedDict
-from itertools import zip_longest
 
 from ABCTypes import ABCEnvironment
+from AnalysisTools import LivenessAnalyzer
+from AnalysisTools import contains_return
+from AnalysisTools import stored_names
+from AnalysisTools import used_names
+from ArithmeticTools import CommutativeOperations
+from ArithmeticTools import ConstantOperations
+from ArithmeticTools import RuntimeOperations
+from ArithmeticTools import ScoreOperations
+from ArithmeticTools import gen_constant_op
+from ArithmeticTools import gen_runtime_op
+from AssignTools import as_aug_assign
+from AssignTools import gen_parallel_assign
+from BlockTools import gen_branch
+from BlockTools import get_block_folder
 from BreakPointTools import BreakPointFlag
-from BreakPointTools import raiseBreakPoint
 from BreakPointTools import register_processor
 from BreakPointTools import updateBreakPoint
+from CallTools import gen_dynamic_call
+from CallTools import gen_pass_arguments
+from ConditionTools import CompareOperators
+from ConditionTools import gen_chained_compare
+from ConditionTools import gen_condition
+from ConditionTools import gen_store_condition
+from ConditionTools import is_stable_condition
+from ConditionTools import matches_clause
+from ConditionTools import score_clause
+from ConditionTools import static_condition
+from ConditionTools import store_success
 from Configuration import CompileConfiguration
 from Configuration import GlobalConfiguration
+from CoroutineTools import CoroutineDone
+from CoroutineTools import FinishStatement
+from CoroutineTools import GotoStatement
+from CoroutineTools import SuspendStatement
+from CoroutineTools import gen_coroutine_def
+from CoroutineTools import gen_for_generator
+from CoroutineTools import generator_call
+from CoroutineTools import is_generator
 from DebuggingTools import FORCE_COMMENT
+from DispatchTools import MinDispatchCases
+from DispatchTools import cases_to_if
+from DispatchTools import gen_dispatch
+from DispatchTools import if_ladder
+from DispatchTools import match_cases
+from InlineTools import can_inline
+from InlineTools import gen_inline_call
+from IntrinsicTools import IntrinsicGenerators
+from LoopTools import LoopBreak
+from LoopTools import LoopReturn
+from LoopTools import current_loop
+from LoopTools import declare_variable
+from LoopTools import gen_loop
+from LoopTools import gen_unrolled
+from LoopTools import loop_exits
+from LoopTools import loop_slicing
+from LoopTools import range_arguments
+from LoopTools import unroll_factor
 from NamespaceTools import join_file_ns
 from ParameterTypes import ABCDefaultParameter
 from ParameterTypes import ABCKeyword
 from ParameterTypes import ABCVariableLengthParameter
 from ParameterTypes import parse_arguments
+from PragmaTools import attach_pragmas
+from ReturnTools import gen_native_return
+from ReturnTools import gen_return_breakpoint
+from ReturnTools import gen_tail_call
+from ReturnTools import match_tail_call
 from ScoreboardTools import CHECK_SB
 from ScoreboardTools import SBCheckType
 from ScoreboardTools import SBCompareType
 from ScoreboardTools import SBOperationType
+from ScoreboardTools import SBStoreType
+from ScoreboardTools import SB_ADD
 from ScoreboardTools import SB_ASSIGN
 from ScoreboardTools import SB_CONSTANT
 from ScoreboardTools import SB_OP
 from ScoreboardTools import SB_RESET
+from ScoreboardTools import SB_STORE
 from ScoreboardTools import gen_code
+from TailCallTools import AccumulateOperations
+from TailCallTools import AccumulatorName
+from TailCallTools import find_accumulator
 from Template import call_template
 from Template import check_template
 from Template import init_template
 from Template import template_funcs
+from ValueTools import INT_MAX
+from ValueTools import INT_MIN
+from ValueTools import binds_directly
+from ValueTools import gen_expr_into
+from ValueTools import int_constant
+from ValueTools import is_int_constant
+from ValueTools import reference_value
+from ValueTools import returns_natively
 
 loaded_modules: dict[str, bool] = {}
 
@@ -95,7 +164,9 @@ def import_as(
             nonlocal command
             start_t = time.time()
             with open(sourcefile_path, mode='r', encoding="utf-8") as f:
-                tree = ast.parse(f.read())
+                source = f.read()
+            tree = ast.parse(source)
+            attach_pragmas(tree, source)
 
             if c_conf.DEBUG_MODE:
                 print("------------导入文件-----------")
@@ -214,6 +285,7 @@ def gen_module(
         node: ast.Module, namespace: str, file_namespace: str) -> str:
     env.ns_init(f"{namespace}", "file")
     env.temp_ns_init(f"{namespace}\\module")
+    env.call_graph.add_module(node)
 
     # 注册路径
     env.mkdirs_file_ns(file_namespace)
@@ -237,11 +309,21 @@ def gen_module(
         namespace
     )
 
-    # 生成并写入
+    # 生成 (导入的模块在生成过程中编译, 常量池按模块分别收集)
+    outer_pool = env.constant_pool
+    env.constant_pool = set()
+    body = ''
+    for statement in node.body:
+        body += env.generate_code(statement, f"{namespace}\\module", join_file_ns(file_namespace, "module"))
+    module_pool, env.constant_pool = env.constant_pool, outer_pool
+
+    # 写入 (模块被加载时先初始化本模块用到的常量池)
     with env.writeable_file_namespace(join_file_ns(file_namespace, "module.mcfunction"), namespace) as f:
-        for statement in node.body:
-            c = env.generate_code(statement, f"{namespace}\\module", join_file_ns(file_namespace, "module"))
-            f.write(c)
+        if module_pool:
+            f.write(env.COMMENT(f"Module:初始化常量池"))
+        for value in sorted(module_pool):
+            f.write(SB_CONSTANT(f"{value}", g_conf.SB_CONST, value))
+        f.write(body)
         f.write(updateBreakPoint(env, c_conf, g_conf, f"{file_namespace}\\module"))
 
     return ''
@@ -250,6 +332,12 @@ def gen_module(
 @register_default_gen(ast.Name)
 def gen_name(env: ABCEnvironment, g_conf: GlobalConfiguration, node: ast.Name, namespace: str) -> str:
     assert isinstance(node.ctx, ast.Load)
+    reference = reference_value(env, node, namespace)
+    if reference is not node:
+        command = env.COMMENT(f"Name:函数引用", name=node.id)
+        command += SB_CONSTANT(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP, reference.value)
+        return command
+
     command = ''
     command += env.COMMENT(f"Name:读取变量", name=node.id)
     target_ns = env.ns_getter(node.id, namespace)[0]
@@ -265,10 +353,28 @@ def gen_call(
         env: ABCEnvironment,
         c_conf: CompileConfiguration,
         g_conf: GlobalConfiguration, node, namespace: str, file_namespace: str) -> str:
+    if isinstance(node.func, ast.Name) and node.func.id in IntrinsicGenerators:
+        intrinsic = IntrinsicGenerators[node.func.id]
+        kwargs = {
+            "env": env, "c_conf": c_conf, "g_conf": g_conf,
+            "node": node, "namespace": namespace, "file_namespace": file_namespace,
+        }
+        return intrinsic["func"](**{k: v for k, v in kwargs.items() if k in intrinsic["params"]})
     if isinstance(node.func, ast.Name) and node.func.id in dir(__builtins__):
         raise Exception("暂不支持python内置函数")
-    else:
-        func_name, func_ns, ns = env.ns_from_node(node.func, namespace, not_exists_ok=True, ns_type="function")
+
+    # 调用保存函数引用的变量
+    if isinstance(node.func, ast.Name):
+        try:
+            func_map: dict = env.ns_getter(node.func.id, namespace, ret_raw=True)[0]
+        except KeyError:
+            func_map = {}
+        if func_map.get(".__type__") == "variable":
+            return gen_dynamic_call(
+                env, c_conf, g_conf, node, func_map[".__namespace__"], namespace, file_namespace
+            )
+
+    func_name, func_ns, ns = env.ns_from_node(node.func, namespace, not_exists_ok=True, ns_type="function")
 
     commands: str = ''
     commands += env.COMMENT(f"Call:调用函数")
@@ -279,38 +385,19 @@ def gen_call(
         commands += call_template(env, c_conf, g_conf, template_func_name, node, namespace, file_namespace)
         return commands
 
-    try:
-        this_func_args = env.func_args[func_ns]
-    except KeyError:
+    if func_ns not in env.func_args:
         raise Exception(f"未注册过的函数: {func_ns}")
 
-    for name, value in zip_longest(this_func_args, node.args, fillvalue=None):
-        if name is None:
-            json_value = ast.dump(value)
-            raise SyntaxError(f"函数 {func_ns} 在调用时传入了额外的值 {json_value}")
-
-        # 如果参数未提供值，且不是默认值，则报错
-        # 否者，使用默认值
-        if value is None:
-            argument = this_func_args[name]
-            if not isinstance(argument, ABCDefaultParameter):
-                raise SyntaxError(f"函数 {func_ns} 的参数 {name} 未提供值")
-
-            default_value = argument.default
-
-            commands += env.COMMENT(f"Call:使用默认值", name=name, value=default_value)
-            value = ast.Constant(value=argument.default)
-
-        commands += env.COMMENT("Call:计算参数值")
-        commands += env.generate_code(value, namespace, file_namespace)
+    if can_inline(env, c_conf, func_ns, node, namespace):
+        commands += gen_inline_call(env, func_ns, node, namespace, file_namespace)
+        return commands
 
-        commands += env.COMMENT("Call:传递参数", name=name)
-        commands += SB_ASSIGN(
-            f"{func_ns}.{name}", g_conf.SB_ARGS,
-            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
-        )
+    commands += gen_pass_arguments(env, g_conf, func_ns, node, namespace, file_namespace)
 
-        commands += SB_RESET(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
+    if func_ns in env.tail_accumulators:
+        identity = AccumulateOperations[env.tail_accumulators[func_ns]][1]
+        commands += env.COMMENT("Call:初始化尾递归累加器")
+        commands += SB_CONSTANT(f"{func_ns}.{AccumulatorName}", g_conf.SB_VARS, identity)
 
     func_path = func_ns.replace('\\', '/')
 
@@ -319,14 +406,28 @@ def gen_call(
         "function", "$link", namespace
     )
 
-    # 当在函数中调用函数时
-    if namespace != env.ns_join_base(env.ns_split_base(namespace)[1]) + "\\module":
-        store, load = env.ns_store_local(namespace)
+    # 原生返回的函数通过return命令直接返回值
+    native = returns_natively(env, c_conf, func_ns)
+    if native:
+        call_command = SB_STORE(
+            SBStoreType.RESULT,
+            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
+            f"function {func_path}"
+        )
+    else:
+        call_command = f"function {func_path}\n"
+
+    # 只有被调用函数可能经由递归环再次进入当前函数时, 当前栈帧才会被覆盖
+    if env.call_graph.may_reenter(env.func_defs.get(namespace), env.func_defs.get(func_ns)):
+        store, load = env.ns_store_local(namespace, env.dead_after_calls.get(id(node)))
         commands += store
-        commands += f"function {func_path}\n"
+        commands += call_command
         commands += load
     else:
-        commands += f"function {func_path}\n"
+        commands += call_command
+
+    if native:
+        return commands
 
     gen_code(f"{func_ns}", g_conf.SB_FUNC_RESULT)
     commands += SB_ASSIGN(
@@ -402,9 +503,30 @@ def gen_expr(
 def gen_bin_op(
         env: ABCEnvironment,
         g_conf: GlobalConfiguration, node: ast.BinOp, namespace: str, file_namespace: str) -> str:
+    if type(node.op) not in ScoreOperations and type(node.op) not in RuntimeOperations:
+        raise Exception(f"无法解析的运算符 {node.op}")
+
     command = ''
     command += env.COMMENT(f"BinOp:二进制运算", op=type(node.op).__name__)
 
+    if is_int_constant(node):
+        command += env.COMMENT(f"BinOp:常量折叠")
+        command += SB_CONSTANT(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP, int_constant(node))
+        return command
+
+    # 常量操作数直接作用在左值的结果上, 不需要临时变量
+    left, right = node.left, node.right
+    if is_int_constant(left) and not is_int_constant(right) and isinstance(node.op, CommutativeOperations):
+        left, right = right, left
+    if is_int_constant(right) and type(node.op) in ConstantOperations:
+        command += env.COMMENT(f"BinOp:处理左值")
+        command += env.generate_code(left, namespace, file_namespace)
+        command += env.COMMENT(f"BinOp:常量运算", value=int_constant(right))
+        command += gen_constant_op(
+            env, g_conf, node.op, f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP, int_constant(right), namespace
+        )
+        return command
+
     command += env.COMMENT(f"BinOp:处理左值")
     command += env.generate_code(node.left, namespace, file_namespace)
 
@@ -422,32 +544,18 @@ def gen_bin_op(
     command += env.COMMENT(f"BinOp:处理右值")
     command += env.generate_code(node.right, namespace, file_namespace)
 
-    if isinstance(node.op, ast.Add):
-        command += SB_OP(
-            SBOperationType.ADD,
-            f"{namespace}{process_ext}", g_conf.SB_TEMP,
-            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
-        )
-    elif isinstance(node.op, ast.Sub):
-        command += SB_OP(
-            SBOperationType.SUBTRACT,
-            f"{namespace}{process_ext}", g_conf.SB_TEMP,
-            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
-        )
-    elif isinstance(node.op, ast.Mult):
-        command += SB_OP(
-            SBOperationType.MULTIPLY,
+    if type(node.op) in RuntimeOperations:
+        command += gen_runtime_op(
+            env, g_conf, node.op,
             f"{namespace}{process_ext}", g_conf.SB_TEMP,
             f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
         )
-    elif isinstance(node.op, ast.Div):
+    else:
         command += SB_OP(
-            SBOperationType.DIVIDE,
+            ScoreOperations[type(node.op)],
             f"{namespace}{process_ext}", g_conf.SB_TEMP,
             f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
         )
-    else:
-        raise Exception(f"无法解析的运算符 {node.op}")
 
     command += SB_RESET(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
 
@@ -463,9 +571,100 @@ def gen_bin_op(
     return command
 
 
+@register_default_gen(ast.BoolOp)
+def gen_bool_op(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.BoolOp, namespace: str, file_namespace: str) -> str:
+    command = ''
+    command += env.COMMENT(f"BoolOp:布尔运算", op=type(node.op).__name__)
+
+    result = f"{namespace}{g_conf.ResultExt}"
+    # and在遇到假值时停止, or在遇到真值时停止, 结果为最后计算的值
+    check_type = SBCheckType.UNLESS if isinstance(node.op, ast.And) else SBCheckType.IF
+    clause = matches_clause(check_type, result, g_conf.SB_TEMP, "0")
+
+    command += env.COMMENT(f"BoolOp:处理第一个值")
+    command += env.generate_code(node.values[0], namespace, file_namespace)
+
+    block_folder = get_block_folder(env, namespace, file_namespace)
+    for value in node.values[1:]:
+        code = env.generate_code(value, namespace, block_folder)
+        code += updateBreakPoint(env, c_conf, g_conf, file_namespace)
+
+        command += env.COMMENT(f"BoolOp:短路求值")
+        command += gen_branch(
+            env, c_conf, g_conf, clause, code, f"{env.newID('if-block')}", block_folder, namespace, file_namespace
+        )
+
+    return command
+
+
+@register_default_gen(ast.AugAssign)
+def gen_aug_assign(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        node: ast.AugAssign, namespace: str, file_namespace: str) -> str:
+    if not isinstance(node.target, ast.Name):
+        raise Exception("AugAssign 暂时只支持对变量赋值")
+    if type(node.op) not in ScoreOperations and type(node.op) not in RuntimeOperations:
+        raise Exception(f"无法解析的运算符 {node.op}")
+
+    target_namespace = env.ns_getter(node.target.id, namespace)[0]
+
+    command = ''
+    command += env.COMMENT(f"AugAssign:原地运算", name=node.target.id, op=type(node.op).__name__)
+
+    # 常量与变量直接作用在目标变量上
+    if is_int_constant(node.value):
+        command += gen_constant_op(
+            env, g_conf, node.op, target_namespace, g_conf.SB_VARS, int_constant(node.value), namespace
+        )
+        return command
+
+    if isinstance(node.value, ast.Name):
+        operand, objective = env.ns_getter(node.value.id, namespace)[0], g_conf.SB_VARS
+    else:
+        command += env.generate_code(node.value, namespace, file_namespace)
+        operand, objective = f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
+
+    if type(node.op) in RuntimeOperations:
+        command += gen_runtime_op(env, g_conf, node.op, target_namespace, g_conf.SB_VARS, operand, objective)
+    else:
+        command += SB_OP(ScoreOperations[type(node.op)], target_namespace, g_conf.SB_VARS, operand, objective)
+
+    if objective == g_conf.SB_TEMP:
+        command += SB_RESET(operand, g_conf.SB_TEMP)
+
+    return command
+
+
 @register_default_gen(ast.Assign)
 def gen_assign(
         env: ABCEnvironment, g_conf: GlobalConfiguration, node: ast.Assign, namespace: str, file_namespace: str) -> str:
+    if len(node.targets) == 1 and isinstance(node.targets[0], (ast.Tuple, ast.List)):
+        return gen_parallel_assign(env, g_conf, node, namespace, file_namespace)
+
+    # x = x + y 与 x += y 等价, 直接在变量上运算
+    aug_assign = as_aug_assign(node)
+    if aug_assign is not None:
+        return gen_aug_assign(env, g_conf, aug_assign, namespace, file_namespace)
+
+    # 常量与变量直接写入目标变量, 使赋值只需要一条命令
+    if (
+            len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+            and (is_int_constant(node.value) or isinstance(node.value, ast.Name))
+    ):
+        name, _, root_ns = env.ns_from_node(node.targets[0], namespace, not_exists_ok=True, ns_type="variable")
+        target_namespace = f"{root_ns}.{name}"
+
+        command = env.COMMENT(f"Assign:直接赋值给变量", name=name)
+        command += gen_expr_into(env, g_conf, node.value, target_namespace, g_conf.SB_VARS, namespace, file_namespace)
+        env.ns_setter(name, target_namespace, namespace, "variable")
+        return command
+
     command = env.generate_code(node.value, namespace, file_namespace)
     from_namespace = f"{namespace}{g_conf.ResultExt}"
 
@@ -533,7 +732,12 @@ def gen_import_from(
 @register_default_gen(ast.FunctionDef)
 def gne_func_def(
         env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
         node: ast.FunctionDef, namespace: str, file_namespace: str) -> str:
+    if is_generator(node):
+        return gen_coroutine_def(env, c_conf, g_conf, node, namespace, file_namespace)
+
     # 注册路径
     new_file_ns = join_file_ns(file_namespace, f"{node.name}")
     env.mkdirs_file_ns(new_file_ns)
@@ -550,6 +754,19 @@ def gne_func_def(
     # 生成并写入
     with env.writeable_file_namespace(func_file_ns, namespace) as f:
         env.ns_setter(node.name, f"{namespace}\\{node.name}", namespace, "function")
+        env.func_defs[f"{namespace}\\{node.name}"] = node
+        env.dead_after_calls.update(LivenessAnalyzer(node).dead_after_calls())
+
+        # 间接递归时, 其他函数中的调用会在累加过程中重新初始化累加器
+        accumulate_op = find_accumulator(node)
+        if accumulate_op is not None and not env.call_graph.reenters_indirectly(node):
+            env.tail_accumulators[f"{namespace}\\{node.name}"] = accumulate_op
+            env.ns_setter(
+                AccumulatorName, f"{namespace}\\{node.name}.{AccumulatorName}",
+                f"{namespace}\\{node.name}", "variable"
+            )
+            # 基本情况的return在调用方初始化累加器之前生成, 需要先注册累加器的计分目标
+            gen_code(f"{namespace}\\{node.name}.{AccumulatorName}", g_conf.SB_VARS)
         env.temp_ns_init(f"{namespace}\\{node.name}")
 
         f.write(env.COMMENT(f"FunctionDef:函数头"))
@@ -562,6 +779,46 @@ def gne_func_def(
     return ''
 
 
+@register_default_gen(ast.AsyncFunctionDef)
+def gen_async_func_def(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.AsyncFunctionDef, namespace: str, file_namespace: str) -> str:
+    if is_generator(node):
+        raise Exception("暂不支持异步生成器")
+    return gen_coroutine_def(env, c_conf, g_conf, node, namespace, file_namespace)
+
+
+@register_default_gen(SuspendStatement)
+def gen_suspend(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        node: SuspendStatement, namespace: str, file_namespace: str) -> str:
+    coroutine = env.coroutines[namespace]
+    command = env.COMMENT(f"Coroutine:挂起", state=f"{node.state}")
+    if node.value is not None:
+        command += gen_expr_into(env, g_conf, node.value, namespace, g_conf.SB_FUNC_RESULT, namespace, file_namespace)
+    command += SB_CONSTANT(*coroutine["state"], node.state)
+    if node.ticks is not None:
+        command += f"schedule function {coroutine['resume']} {node.ticks}t replace\n"
+    return command
+
+
+@register_default_gen(GotoStatement)
+def gen_goto(env: ABCEnvironment, node: GotoStatement, namespace: str) -> str:
+    command = env.COMMENT(f"Coroutine:进入代码段", state=f"{node.state}")
+    command += f"function {env.coroutines[namespace]['segments'][node.state]}\n"
+    return command
+
+
+@register_default_gen(FinishStatement)
+def gen_finish(env: ABCEnvironment, node: FinishStatement, namespace: str) -> str:
+    command = env.COMMENT(f"Coroutine:结束")
+    command += SB_CONSTANT(*env.coroutines[namespace]["state"], CoroutineDone)
+    return command
+
+
 @register_default_gen(ast.Global)
 def gen_global(
         env: ABCEnvironment, node: ast.Global, namespace: str) -> str:
@@ -577,121 +834,377 @@ def gen_if(
         c_conf: CompileConfiguration,
         g_conf: GlobalConfiguration,
         node: ast.If, namespace: str, file_namespace: str) -> str:
+    # 条件可以在编译期判断时只生成会执行的分支
+    truth = static_condition(node.test)
+    if truth is not None:
+        command = env.COMMENT(f"IF:条件恒为{'真' if truth else '假'}")
+        for statement in node.body if truth else node.orelse:
+            command += env.generate_code(statement, namespace, file_namespace)
+        return command
+
+    # 同一个变量与整数常量比较的if/elif链通过二分查找选择分支 (不支持return命令时分支中的return依赖断点, 不能放入决策树)
+    ladder = if_ladder(node)
+    if ladder is not None and len(ladder[1]) >= MinDispatchCases:
+        subject, cases, default = ladder
+        if c_conf.NATIVE_RETURN or not contains_return([node]):
+            return gen_dispatch(env, c_conf, g_conf, subject, cases, default, namespace, file_namespace)
+
     block_uid = env.newID("if-block")
+    new_file_ns = get_block_folder(env, namespace, file_namespace)
+
+    # 条件读取的值可能在if块中被修改, 此时需要在执行if块前保存判断结果供else块使用
+    condition_flag: str | None = None
+    if node.orelse and not is_stable_condition(node.test, node.body):
+        condition_flag = f"{namespace}.*IfCondition{block_uid}"
+        env.temp_ns_append(namespace, condition_flag)
+
+    # 生成if块与else块
+    blocks: list[tuple[str, list[ast.stmt], str]] = []
+    for suffix, statements in (('', node.body), ("-else", node.orelse)):
+        if not statements:
+            continue
+        # 进入else块时判断结果已经读取完毕, else块中的调用前后不需要保存
+        if suffix and condition_flag is not None:
+            env.temp_ns_remove(namespace, condition_flag)
+        code = ''
+        for statement in statements:
+            code += env.generate_code(statement, namespace, new_file_ns)
+        code += updateBreakPoint(env, c_conf, g_conf, file_namespace)
+        blocks.append((suffix, statements, code))
+
+    command = ''
+
+    command += env.COMMENT(f"IF:计算条件")
+    setup, clause, negated, temps = gen_condition(env, g_conf, node.test, namespace, file_namespace)
+    command += setup
 
-    base_namespace = f"{namespace}\\.if"
+    if condition_flag is not None:
+        command += env.COMMENT(f"IF:保存条件")
+        command += store_success(condition_flag, g_conf.SB_TEMP, clause)
+        clause = matches_clause(SBCheckType.IF, condition_flag, g_conf.SB_TEMP, "1")
+        negated = matches_clause(SBCheckType.UNLESS, condition_flag, g_conf.SB_TEMP, "1")
+        for temp in temps:
+            command += SB_RESET(temp, g_conf.SB_TEMP)
+            env.temp_ns_remove(namespace, temp)
+        temps = []
 
-    # 如果父级不是if块，则创建一个if块
-    f_ns, f_name = file_namespace.rsplit('\\', maxsplit=1)
-    f_father_ns = env.file_ns_getter(f_name, f_ns, ret_raw=True)[0]
-    if f_father_ns[".__level__"] != "if":
-        env.file_ns_setter(
-            ".if", join_file_ns(file_namespace, ".if"),
-            file_namespace,
-            "if", "folder", namespace
+    command += env.COMMENT(f"IF:检查条件")
+    for suffix, statements, code in blocks:
+        command += gen_branch(
+            env, c_conf, g_conf,
+            negated if suffix else clause, code, f"{block_uid}{suffix}", new_file_ns, namespace, file_namespace,
+            returns=contains_return(statements) or bool(loop_exits(statements))
         )
-        new_file_ns = join_file_ns(file_namespace, ".if")
-        env.mkdirs_file_ns(new_file_ns)
-    else:
-        new_file_ns = file_namespace
-    # 注册路径
-    if_block_ns = join_file_ns(new_file_ns, f"{block_uid}.mcfunction")
-    env.file_ns_setter(
-        f"{block_uid}.mcfunction", if_block_ns,
-        new_file_ns,
-        "if", "mcfunction", namespace
+
+    if condition_flag is not None:
+        command += SB_RESET(condition_flag, g_conf.SB_TEMP)
+    for temp in temps:
+        command += SB_RESET(temp, g_conf.SB_TEMP)
+        env.temp_ns_remove(namespace, temp)
+
+    return command
+
+
+@register_default_gen(ast.Match)
+def gen_match(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.Match, namespace: str, file_namespace: str) -> str:
+    cases, default, capture = match_cases(node)
+
+    command = env.COMMENT(f"Match:匹配")
+    # 匹配的对象只计算一次
+    subject = node.subject
+    if not isinstance(subject, ast.Name):
+        hidden = ast.copy_location(ast.Name(id=f"match{env.newID('match')}-subject", ctx=ast.Store()), subject)
+        command += gen_assign(env, g_conf, ast.copy_location(ast.Assign(targets=[hidden], value=subject), node),
+                              namespace, file_namespace)
+        subject = ast.copy_location(ast.Name(id=hidden.id, ctx=ast.Load()), subject)
+
+    if capture is not None:
+        default = [
+            ast.copy_location(ast.Assign(targets=[ast.Name(id=capture, ctx=ast.Store())], value=subject), node),
+            *default
+        ]
+
+    # 不支持return命令时分支中的return依赖断点, 改写为if/elif链
+    if not c_conf.NATIVE_RETURN and contains_return([node]):
+        for statement in cases_to_if(subject, cases, default):
+            command += env.generate_code(statement, namespace, file_namespace)
+        return command
+
+    command += gen_dispatch(env, c_conf, g_conf, subject.id, cases, default, namespace, file_namespace)
+    return command
+
+
+@register_default_gen(ast.IfExp)
+def gen_if_exp(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.IfExp, namespace: str, file_namespace: str) -> str:
+    block_uid = env.newID("if-block")
+    block_folder = get_block_folder(env, namespace, file_namespace)
+
+    # 第一个分支可能修改条件读取的值, 此时需要先保存判断结果
+    condition_flag: str | None = None
+    if not is_stable_condition(node.test, [ast.Expr(node.body)]):
+        condition_flag = f"{namespace}.*IfExpCondition{block_uid}"
+        env.temp_ns_append(namespace, condition_flag)
+
+    # 生成两个分支 (只有一条命令的分支会被内联)
+    arms: list[str] = []
+    for arm in (node.body, node.orelse):
+        # 进入第二个分支时判断结果已经读取完毕
+        if arm is node.orelse and condition_flag is not None:
+            env.temp_ns_remove(namespace, condition_flag)
+        code = env.generate_code(arm, namespace, block_folder)
+        code += updateBreakPoint(env, c_conf, g_conf, file_namespace)
+        arms.append(code)
+
+    command = ''
+    command += env.COMMENT(f"IfExp:计算条件")
+    setup, clause, negated, temps = gen_condition(env, g_conf, node.test, namespace, file_namespace)
+    command += setup
+
+    # 分支的结果同样写入结果计分项, 因此条件使用的临时变量在保存条件后立即重置
+    # (读取结果计分项的条件不是简单条件, 总会先保存判断结果)
+    if condition_flag is not None:
+        command += env.COMMENT(f"IfExp:保存条件")
+        command += store_success(condition_flag, g_conf.SB_TEMP, clause)
+        clause = matches_clause(SBCheckType.IF, condition_flag, g_conf.SB_TEMP, "1")
+        negated = matches_clause(SBCheckType.UNLESS, condition_flag, g_conf.SB_TEMP, "1")
+        for temp in temps:
+            command += SB_RESET(temp, g_conf.SB_TEMP)
+            env.temp_ns_remove(namespace, temp)
+        temps = [condition_flag]
+
+    command += env.COMMENT(f"IfExp:选择结果")
+    command += gen_branch(
+        env, c_conf, g_conf, clause, arms[0], f"{block_uid}", block_folder, namespace, file_namespace
     )
-    else_block_ns = join_file_ns(new_file_ns, f"{block_uid}-else.mcfunction")
-    env.file_ns_setter(
-        f"{block_uid}-else.mcfunction", else_block_ns,
-        new_file_ns,
-        "if", "mcfunction", namespace
+    command += gen_branch(
+        env, c_conf, g_conf, negated, arms[1], f"{block_uid}-else", block_folder, namespace, file_namespace
     )
-    # 生成并写入if块
-    with env.writeable_file_namespace(if_block_ns, namespace) as f:
-        for statement in node.body:
-            body = env.generate_code(statement, namespace, new_file_ns)
-            f.write(body)
-        f.write(updateBreakPoint(env, c_conf, g_conf, file_namespace))
-    # 生成并写入else块
-    with env.writeable_file_namespace(else_block_ns, namespace) as f:
+
+    for temp in temps:
+        command += SB_RESET(temp, g_conf.SB_TEMP)
+        if temp != condition_flag:
+            env.temp_ns_remove(namespace, temp)
+
+    return command
+
+
+@register_default_gen(ast.While)
+def gen_while(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.While, namespace: str, file_namespace: str) -> str:
+    # 条件恒为假时只执行else块
+    if is_int_constant(node.test) and not int_constant(node.test):
+        command = env.COMMENT(f"While:条件恒为假")
         for statement in node.orelse:
-            body = env.generate_code(statement, namespace, new_file_ns)
-            f.write(body)
-        f.write(updateBreakPoint(env, c_conf, g_conf, file_namespace))
+            command += env.generate_code(statement, namespace, file_namespace)
+        return command
 
-    command = ''
-    func_path = f"{base_namespace}\\{block_uid}".replace('\\', '/')
+    slicing = loop_slicing(env, node, namespace)
+    setup, clause, temps = '', None, []
+    if not is_int_constant(node.test):
+        setup, clause, _, temps = gen_condition(env, g_conf, node.test, namespace, file_namespace)
 
-    command += env.generate_code(node.test, namespace, file_namespace)
+    # 每次判断条件时都会重新计算, 条件的临时变量在循环体中的调用前后不需要保存;
+    # 临时变量在循环结束后重置 (分tick执行时循环在之后的tick结束)
+    finish = ''
+    for temp in temps:
+        finish += SB_RESET(temp, g_conf.SB_TEMP)
+        env.temp_ns_remove(namespace, temp)
 
-    command += env.COMMENT(f"IF:检查条件")
-    command += CHECK_SB(
-        SBCheckType.UNLESS,
-        f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
-        SBCompareType.EQUAL,
-        g_conf.Flags.FALSE, g_conf.SB_FLAGS,
-        f"function {func_path}"
+    command = ''
+    command += env.COMMENT(f"While:循环")
+    command += gen_loop(
+        env, c_conf, g_conf, node, '', '', setup, clause, namespace, file_namespace,
+        slicing=slicing, finish=finish
     )
-    command += CHECK_SB(
-        SBCheckType.IF,
-        f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
-        SBCompareType.EQUAL,
-        g_conf.Flags.FALSE, g_conf.SB_FLAGS,
-        f"function {func_path}-else"
+
+    return command
+
+
+@register_default_gen(ast.For)
+def gen_for(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.For, namespace: str, file_namespace: str) -> str:
+    generator = generator_call(env, node.iter, namespace)
+    if generator is not None:
+        return gen_for_generator(env, c_conf, g_conf, node, generator, namespace, file_namespace)
+
+    start, end, step = range_arguments(node)
+    start_value, end_value = int_constant(start), int_constant(end)
+
+    # 范围为空时只执行else块
+    constant_range = start_value is not None and end_value is not None
+    if constant_range and not range(start_value, end_value, step):
+        command = env.COMMENT(f"For:范围为空")
+        for statement in node.orelse:
+            command += env.generate_code(statement, namespace, file_namespace)
+        return command
+
+    # 循环体修改循环变量时不影响下一次迭代的值, 需要使用隐藏的计数器
+    target = node.target.id
+    counter = target
+    if target in stored_names(*node.body):
+        counter = f"for{env.newID('for')}-i"
+    counter_ns = declare_variable(env, counter, namespace)
+
+    command = ''
+    command += env.COMMENT(f"For:循环", target=target)
+
+    # 迭代次数已知的短循环展开为多份循环体 (不支持return命令时, 循环体中的return依赖循环的标记变量结束外层)
+    slicing = loop_slicing(env, node, namespace)
+    if slicing is None and constant_range and (c_conf.NATIVE_RETURN or not contains_return(node.body)):
+        values = range(start_value, end_value, step)
+        factor = unroll_factor(node.body, target, len(values), c_conf.UNROLL_THRESHOLD)
+        if factor == len(values):
+            return command + gen_unrolled(env, node, values, namespace, file_namespace)
+        if factor is not None:
+            # 先展开余下的迭代, 使剩余的迭代次数是展开倍数的整数倍
+            # 每次迭代执行多份循环体, 循环体之间递增循环变量
+            remainder = len(values) % factor
+            command += gen_unrolled(env, node, values[:remainder], namespace, file_namespace, complete=False)
+            start_value = values[remainder]
+            body: list[ast.stmt] = []
+            for i in range(factor):
+                if i:
+                    body.append(ast.copy_location(ast.AugAssign(
+                        target=ast.Name(id=target, ctx=ast.Store()), op=ast.Add(), value=ast.Constant(value=step)
+                    ), node))
+                body.extend(copy.deepcopy(node.body))
+            node = ast.copy_location(ast.For(
+                target=node.target, iter=node.iter, body=body, orelse=node.orelse, type_comment=None
+            ), node)
+
+    # 计数器在每次迭代开始时加上步长, 因此初始值为 start - step, 继续循环的条件为 counter + step < end
+    if start_value is not None and INT_MIN <= start_value - step <= INT_MAX:
+        init = SB_CONSTANT(counter_ns, g_conf.SB_VARS, start_value - step)
+    else:
+        init = gen_expr_into(env, g_conf, start, counter_ns, g_conf.SB_VARS, namespace, file_namespace)
+        init += SB_ADD(counter_ns, g_conf.SB_VARS, -step)
+
+    limit: str | None = None
+    finish = ''
+    bound = None if end_value is None else end_value - step - 1 if step > 0 else end_value - step + 1
+    if bound is not None and INT_MIN <= bound <= INT_MAX:
+        clause = matches_clause(SBCheckType.IF, counter_ns, g_conf.SB_VARS, f"..{bound}" if step > 0 else f"{bound}..")
+    else:
+        limit = f"{namespace}.*LoopLimit{env.newID('for')}"
+        limit_code = gen_expr_into(env, g_conf, end, limit, g_conf.SB_TEMP, namespace, file_namespace)
+        limit_code += SB_ADD(limit, g_conf.SB_TEMP, -step)
+        # 结束值读取计数器时需要在初始化计数器之前计算
+        init = limit_code + init if counter in used_names(end) else init + limit_code
+        env.temp_ns_append(namespace, limit)
+        finish = SB_RESET(limit, g_conf.SB_TEMP)
+        clause = score_clause(
+            SBCheckType.IF,
+            counter_ns, g_conf.SB_VARS,
+            SBCompareType.LESS if step > 0 else SBCompareType.MORE,
+            limit, g_conf.SB_TEMP
+        )
+
+    head = SB_ADD(counter_ns, g_conf.SB_VARS, step)
+    if counter != target:
+        head += SB_ASSIGN(declare_variable(env, target, namespace), g_conf.SB_VARS, counter_ns, g_conf.SB_VARS)
+
+    command += gen_loop(
+        env, c_conf, g_conf, node, init, head, '', clause, namespace, file_namespace,
+        always_enter=constant_range, slicing=slicing, finish=finish
     )
 
-    command += SB_RESET(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
+    if limit is not None:
+        env.temp_ns_remove(namespace, limit)
+
+    return command
 
+
+@register_default_gen(ast.Break)
+def gen_break(env: ABCEnvironment, node: ast.Break, namespace: str) -> str:
+    loop = current_loop(env, namespace)
+    command = env.COMMENT(f"Break:结束循环")
+    # 代码块返回非0值时调用处会继续结束上一层代码块, 直到循环代码块
+    if loop["control"] is not None:
+        return command + f"return run {SB_CONSTANT(*loop['control'], LoopBreak, line_break=False)}\n"
+    return command + "return 1\n"
+
+
+@register_default_gen(ast.Continue)
+def gen_continue(env: ABCEnvironment, node: ast.Continue, namespace: str) -> str:
+    loop = current_loop(env, namespace)
+    command = env.COMMENT(f"Continue:进入下一次迭代")
+    command += loop["tail"]
+    command += "return 1\n"
     return command
 
 
 @register_default_gen(ast.Return)
 def gen_return(
         env: ABCEnvironment,
+        c_conf: CompileConfiguration,
         g_conf: GlobalConfiguration,
         node: ast.Return, namespace: str, file_namespace: str) -> str:
-    command = ''
-    command += env.COMMENT("Return:计算返回值")
-
-    command += env.generate_code(node.value, namespace, file_namespace)
-
-    command += env.COMMENT("Return:保存返回值")
-
     ns, name = namespace.rsplit('\\', 1)
     func_map: dict = env.ns_getter(name, ns, ret_raw=True)[0]
     if func_map[".__type__"] != "function":
         raise Exception("返回语句不在函数内")
 
     func_name = func_map[".__namespace__"]
+    native = returns_natively(env, c_conf, func_name)
 
-    command += SB_ASSIGN(
-        f"{func_name}", g_conf.SB_FUNC_RESULT,
-        f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
-    )
+    command = ''
+    # 通知所在的循环结束后继续结束外层
+    for loop in env.loop_stack:
+        if loop["namespace"] == namespace and loop["control"] is not None:
+            command += SB_CONSTANT(*loop["control"], LoopReturn)
+
+    tail_call = match_tail_call(env, node.value, func_name)
+    if tail_call is not None:
+        command += gen_tail_call(env, g_conf, *tail_call, func_name, namespace, file_namespace, native)
+    elif native:
+        command += gen_native_return(env, g_conf, node.value, func_name, namespace, file_namespace)
+    else:
+        command += env.COMMENT("Return:计算返回值")
+        command += env.generate_code(node.value, namespace, file_namespace)
+
+        if func_name in env.tail_accumulators:
+            accumulate_op = AccumulateOperations[env.tail_accumulators[func_name]][0]
+            command += env.COMMENT("Return:合并尾递归累加器")
+            command += SB_OP(
+                accumulate_op,
+                f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
+                f"{func_name}.{AccumulatorName}", g_conf.SB_VARS
+            )
 
-    command += SB_RESET(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
+        command += env.COMMENT("Return:保存返回值")
+        command += SB_ASSIGN(
+            f"{func_name}", g_conf.SB_FUNC_RESULT,
+            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
+        )
 
-    command += env.COMMENT("BP:Return.Enable")
-    breakpoint_id = f"breakpoint_return_{env.newID("return.breakpoint")}"
-    command += SB_ASSIGN(
-        f"{breakpoint_id}", g_conf.SB_TEMP,
-        g_conf.Flags.TRUE, g_conf.SB_FLAGS
-    )
+        command += SB_RESET(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
 
-    command += FORCE_COMMENT(BreakPointFlag(
-        "return",
-        name=breakpoint_id,
-        objective=g_conf.SB_TEMP
-    ))
-    raiseBreakPoint(env, file_namespace, "return", name=breakpoint_id, objective=g_conf.SB_TEMP)
+    # return命令会直接结束函数, 不需要断点
+    if native:
+        return command
 
+    command += gen_return_breakpoint(env, g_conf, file_namespace)
     return command
 
 
 @register_default_gen(ast.Compare)
 def gen_compare(
         env: ABCEnvironment,
+        c_conf: CompileConfiguration,
         g_conf: GlobalConfiguration,
         node: ast.Compare, namespace: str, file_namespace: str) -> str:
     command = ''
@@ -699,86 +1212,15 @@ def gen_compare(
         f"op{i}": type(cmp).__name__ for i, cmp in enumerate(node.comparators)
     })
 
-    command += env.COMMENT(f"Compare:处理左值")
-    command += env.generate_code(node.left, namespace, file_namespace)
-
-    command += SB_ASSIGN(
-        f"{namespace}.*CompareLeft", g_conf.SB_TEMP,
-        f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
-    )
-
-    command += SB_RESET(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
-
-    if len(node.ops) > 1:
-        raise Exception("暂时无法解析多个比较符")
-
-    command += SB_ASSIGN(
-        f"{namespace}.*CompareResult", g_conf.SB_TEMP,
-        g_conf.Flags.FALSE, g_conf.SB_FLAGS
-    )
-
-    for i, op in enumerate(node.ops):
-        command += env.COMMENT(f"Compare:提取左值")
-        command += SB_ASSIGN(
-            f"{namespace}.*CompareCalculate", g_conf.SB_TEMP,
-            f"{namespace}.*CompareLeft", g_conf.SB_TEMP
-        )
-
-        command += env.COMMENT(f"Compare:处理右值")
-        command += env.generate_code(node.comparators[i], namespace, file_namespace)
-
-        if isinstance(op, ast.Eq):
-            command += env.COMMENT(f"Compare:比较", op="Eq(==)")
-            check_type = SBCheckType.IF
-            check_op = SBCompareType.EQUAL
-        elif isinstance(op, ast.NotEq):
-            command += env.COMMENT(f"Compare:比较", op="NotEq(!=)")
-            check_type = SBCheckType.UNLESS
-            check_op = SBCompareType.EQUAL
-        elif isinstance(op, ast.Gt):
-            command += env.COMMENT(f"Compare:比较", op="Gt(>)")
-            check_type = SBCheckType.IF
-            check_op = SBCompareType.MORE
-        elif isinstance(op, ast.Lt):
-            command += env.COMMENT(f"Compare:比较", op="Lt(<)")
-            check_type = SBCheckType.IF
-            check_op = SBCompareType.LESS
-        elif isinstance(op, ast.GtE):
-            command += env.COMMENT(f"Compare:比较", op="GtE(>=)")
-            check_type = SBCheckType.IF
-            check_op = SBCompareType.MORE_EQUAL
-        elif isinstance(op, ast.LtE):
-            command += env.COMMENT(f"Compare:比较", op="LtE(<=)")
-            check_type = SBCheckType.IF
-            check_op = SBCompareType.LESS_EQUAL
-        else:
+    for op in node.ops:
+        if type(op) not in CompareOperators:
             raise Exception(f"无法解析的比较符 {op}")
 
-        command += CHECK_SB(
-            check_type,
-            f"{namespace}.*CompareCalculate", g_conf.SB_TEMP,
-            check_op,
-            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
-            SB_ASSIGN(
-                f"{namespace}.*CompareResult", g_conf.SB_TEMP,
-                g_conf.Flags.TRUE, g_conf.SB_FLAGS,
-                line_break=False
-            )
-        )
-
-        command += env.COMMENT(f"Compare:重置计算临时变量")
-        command += SB_RESET(f"{namespace}.*CompareCalculate", g_conf.SB_TEMP)
-
-    command += env.COMMENT(f"Compare:重置左值")
-    command += SB_RESET(f"{namespace}.*CompareLeft", g_conf.SB_TEMP)
-
-    command += env.COMMENT(f"Compare:传递结果")
-    command += SB_ASSIGN(
-        f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
-        f"{namespace}.*CompareResult", g_conf.SB_TEMP
-    )
+    if len(node.ops) > 1:
+        return command + gen_chained_compare(env, c_conf, g_conf, node, namespace, file_namespace)
 
-    command += SB_RESET(f"{namespace}.*CompareResult", g_conf.SB_TEMP)
+    command += env.COMMENT(f"Compare:存储比较结果")
+    command += gen_store_condition(env, g_conf, node, f"{namespace}{g_conf.ResultExt}", namespace, file_namespace)
 
     return command
 
@@ -809,8 +1251,13 @@ def gen_arguments(
         if isinstance(argument, ABCVariableLengthParameter):
             raise Exception(f"函数参数 {name} 包含*参数, 暂时无法处理")
 
-        gen_code(f"{namespace}.{name}", g_conf.SB_ARGS)
         env.ns_setter(name, f"{namespace}.{name}", namespace, "variable")
+        # 调用者直接写入变量槽位时不需要从参数计分板复制
+        if binds_directly(env, namespace):
+            gen_code(f"{namespace}.{name}", g_conf.SB_VARS)
+            continue
+
+        gen_code(f"{namespace}.{name}", g_conf.SB_ARGS)
         command += SB_ASSIGN(
             f"{namespace}.{name}", g_conf.SB_VARS,
             f"{namespace}.{name}", g_conf.SB_ARGS
@@ -831,56 +1278,37 @@ def gen_unary_op(
     command = ''
 
     command += env.COMMENT(f"UnaryOp:一元操作", op=type(node.op).__name__)
-    command += env.generate_code(node.operand, namespace, file_namespace)
+    # 带符号的常量直接作为常量读取
+    if is_int_constant(node):
+        command += SB_CONSTANT(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP, int_constant(node))
+        return command
 
     if isinstance(node.op, ast.Not):
         command += env.COMMENT(f"UnaryOp:运算", op="Not(not)")
-        command += CHECK_SB(
-            SBCheckType.UNLESS,
-            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
-            SBCompareType.EQUAL,
-            g_conf.Flags.FALSE, g_conf.SB_FLAGS,
-            SB_ASSIGN(
-                f"{namespace}.*UnaryOp", g_conf.SB_TEMP,
-                g_conf.Flags.FALSE, g_conf.SB_FLAGS,
-                line_break=False
-            )
-        )
+        command += gen_store_condition(env, g_conf, node, f"{namespace}{g_conf.ResultExt}", namespace, file_namespace)
+        return command
 
-        command += CHECK_SB(
-            SBCheckType.IF,
-            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
-            SBCompareType.EQUAL,
-            g_conf.Flags.FALSE, g_conf.SB_FLAGS,
-            SB_ASSIGN(
-                f"{namespace}.*UnaryOp", g_conf.SB_TEMP,
-                g_conf.Flags.TRUE, g_conf.SB_FLAGS,
-                line_break=False
-            )
-        )
+    command += env.generate_code(node.operand, namespace, file_namespace)
 
-    elif isinstance(node.op, ast.USub):
+    if isinstance(node.op, ast.USub):
         command += env.COMMENT(f"UnaryOp:运算", op="USub(-)")
-        command += SB_ASSIGN(
-            f"{namespace}.*UnaryOp", g_conf.SB_TEMP,
-            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
+        command += SB_OP(
+            SBOperationType.MULTIPLY,
+            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
+            g_conf.Flags.NEG, g_conf.SB_FLAGS
         )
+    elif isinstance(node.op, ast.UAdd):
+        pass
+    elif isinstance(node.op, ast.Invert):
+        # ~x == -x - 1
+        command += env.COMMENT(f"UnaryOp:运算", op="Invert(~)")
         command += SB_OP(
             SBOperationType.MULTIPLY,
-            f"{namespace}.*UnaryOp", g_conf.SB_TEMP,
+            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
             g_conf.Flags.NEG, g_conf.SB_FLAGS
         )
+        command += SB_ADD(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP, -1)
     else:
         raise Exception(f"暂时无法解析的UnaryOp运算 {node.op}")
 
-    command += SB_RESET(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
-
-    command += env.COMMENT(f"UnaryOp:传递结果")
-    command += SB_ASSIGN(
-        f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
-        f"{namespace}.*UnaryOp", g_conf.SB_TEMP
-    )
-
-    command += SB_RESET(f"{namespace}.*UnaryOp", g_conf.SB_TEMP)
-
     return command
@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+多分支跳转相关工具函数 (整数常量的if/elif链与match语句)
+
+各分支按照变量的取值划分为若干区间, 通过对区间二分查找 (`execute if score ... matches lo..hi`) 选择分支
+"""
+
+import ast
+
+from ABCTypes import ABCEnvironment
+from AnalysisTools import contains_return
+from AnalysisTools import stored_names
+from BlockTools import gen_branch
+from BlockTools import gen_branch_call
+from BlockTools import get_block_folder
+from BlockTools import prepare_branch
+from BreakPointTools import updateBreakPoint
+from ConditionTools import matches_clause
+from Configuration import CompileConfiguration
+from Configuration import GlobalConfiguration
+from LoopTools import loop_exits
+from ScoreboardTools import SBCheckType
+from ScoreboardTools import SB_ASSIGN
+from ScoreboardTools import SB_RESET
+from TailCallTools import has_call
+from ValueTools import INT_MAX
+from ValueTools import INT_MIN
+from ValueTools import int_constant
+
+MinDispatchCases: int = 4
+"""
+if/elif链至少包含多少个分支时使用二分查找
+"""
+
+DispatchLeafSize: int = 3
+"""
+决策树的叶子最多直接检查的区间数
+"""
+
+
+def _case_values(test: ast.expr) -> tuple[str, list[int]] | None:
+    """
+    解析 `变量 == 常量`, `变量 in (常量, ...)` 以及它们的or
+
+    :param test: 条件表达式
+    :type test: ast.expr
+    :returns: (变量名, 常量列表), 无法解析时返回None
+    :rtype: tuple[str, list[int]] | None
+    """
+    if isinstance(test, ast.BoolOp) and isinstance(test.op, ast.Or):
+        parts = [_case_values(value) for value in test.values]
+        if None in parts or len({name for name, _ in parts}) != 1:
+            return None
+        return parts[0][0], [value for _, values in parts for value in values]
+
+    if not isinstance(test, ast.Compare) or len(test.ops) != 1:
+        return None
+    left, op, right = test.left, test.ops[0], test.comparators[0]
+
+    if isinstance(op, ast.Eq):
+        if isinstance(right, ast.Name):
+            left, right = right, left
+        value = int_constant(right)
+        if not isinstance(left, ast.Name) or value is None:
+            return None
+        values = [value]
+    elif isinstance(op, ast.In) and isinstance(left, ast.Name) and isinstance(right, (ast.Tuple, ast.List, ast.Set)):
+        values = [int_constant(element) for element in right.elts]
+        if None in values or not values:
+            return None
+    else:
+        return None
+
+    if not all(INT_MIN <= value <= INT_MAX for value in values):
+        return None
+    return left.id, values
+
+
+def if_ladder(node: ast.If) -> tuple[str, list[tuple[list[int], list[ast.stmt]]], list[ast.stmt]] | None:
+    """
+    解析同一个变量与整数常量比较的if/elif链
+
+    :param node: if语句节点
+    :type node: ast.If
+    :returns: (变量名, [(分支的常量列表, 分支语句)], else块语句), 不是这样的if/elif链时返回None
+    :rtype: tuple[str, list[tuple[list[int], list[ast.stmt]]], list[ast.stmt]] | None
+    """
+    subject: str | None = None
+    cases: list[tuple[list[int], list[ast.stmt]]] = []
+    current: list[ast.stmt] = [node]
+    while len(current) == 1 and isinstance(current[0], ast.If):
+        parsed = _case_values(current[0].test)
+        if parsed is None or (subject is not None and parsed[0] != subject):
+            return None
+        subject = parsed[0]
+        cases.append((parsed[1], current[0].body))
+        current = current[0].orelse
+    return subject, cases, current
+
+
+def _pattern_values(pattern: ast.pattern) -> list[int] | None:
+    """
+    解析由整数常量组成的模式 (`case 1:`, `case 1 | 2:`)
+
+    :param pattern: 模式
+    :type pattern: ast.pattern
+    :return: 常量列表, 不是这样的模式时返回None
+    :rtype: list[int] | None
+    """
+    if isinstance(pattern, ast.MatchOr):
+        values = [_pattern_values(p) for p in pattern.patterns]
+        if None in values:
+            return None
+        return [value for sub_values in values for value in sub_values]
+    if isinstance(pattern, ast.MatchValue):
+        value = int_constant(pattern.value)
+        if value is None or not INT_MIN <= value <= INT_MAX:
+            return None
+        return [value]
+    if isinstance(pattern, ast.MatchSingleton) and isinstance(pattern.value, bool):
+        return [int(pattern.value)]
+    return None
+
+
+def match_cases(node: ast.Match) -> tuple[list[tuple[list[int], list[ast.stmt]]], list[ast.stmt], str | None]:
+    """
+    解析match语句
+
+    只支持整数常量的模式, 最后一个分支可以是 `case _:` 或捕获模式 `case 变量名:`
+
+    :param node: match语句节点
+    :type node: ast.Match
+    :returns: ([(分支的常量列表, 分支语句)], 默认分支语句, 默认分支捕获的变量名)
+    :rtype: tuple[list[tuple[list[int], list[ast.stmt]]], list[ast.stmt], str | None]
+    """
+    cases: list[tuple[list[int], list[ast.stmt]]] = []
+    for index, case in enumerate(node.cases):
+        if case.guard is not None:
+            raise Exception("match暂不支持带有if条件的分支")
+
+        pattern = case.pattern
+        if isinstance(pattern, ast.MatchAs) and pattern.pattern is None:
+            if index != len(node.cases) - 1:
+                raise Exception("match的通配分支必须是最后一个分支")
+            return cases, case.body, pattern.name
+
+        values = _pattern_values(pattern)
+        if values is None:
+            raise Exception("match暂时只支持整数常量的模式")
+        cases.append((values, case.body))
+    return cases, [], None
+
+
+def cases_to_if(
+        subject: ast.Name, cases: list[tuple[list[int], list[ast.stmt]]], default: list[ast.stmt]) -> list[ast.stmt]:
+    """
+    将分支改写为等价的if/elif链
+
+    :param subject: 选择分支的变量
+    :type subject: ast.Name
+    :param cases: [(分支的常量列表, 分支语句)]
+    :type cases: list[tuple[list[int], list[ast.stmt]]]
+    :param default: 默认分支的语句
+    :type default: list[ast.stmt]
+    :return: 语句列表
+    :rtype: list[ast.stmt]
+    """
+    statements = default
+    for values, body in reversed(cases):
+        tests: list[ast.expr] = [
+            ast.copy_location(ast.Compare(
+                left=ast.Name(id=subject.id, ctx=ast.Load()), ops=[ast.Eq()], comparators=[ast.Constant(value=value)]
+            ), subject)
+            for value in values
+        ]
+        test = tests[0] if len(tests) == 1 else ast.copy_location(ast.BoolOp(op=ast.Or(), values=tests), subject)
+        statements = [ast.copy_location(ast.If(test=test, body=body, orelse=statements), subject)]
+    return statements
+
+
+def dispatch_intervals(cases: list[list[int]], has_default: bool) -> list[tuple[int, int, int]]:
+    """
+    将各分支的常量划分为有序的区间
+
+    同一个常量属于最先出现的分支, 相邻且属于同一个分支的区间会合并,
+    有默认分支时其余取值属于默认分支 (编号为分支数)
+
+    :param cases: 各分支的常量列表
+    :type cases: list[list[int]]
+    :param has_default: 是否有默认分支
+    :type has_default: bool
+    :return: [(下界, 上界, 分支编号)]
+    :rtype: list[tuple[int, int, int]]
+    """
+    owners: dict[int, int] = {}
+    for index, values in enumerate(cases):
+        for value in values:
+            owners.setdefault(value, index)
+
+    default = len(cases)
+    intervals: list[tuple[int, int, int]] = []
+    cursor = INT_MIN
+    for value in sorted(owners):
+        if has_default and value > cursor:
+            intervals.append((cursor, value - 1, default))
+        intervals.append((value, value, owners[value]))
+        cursor = value + 1
+    if has_default and cursor <= INT_MAX:
+        intervals.append((cursor, INT_MAX, default))
+
+    merged: list[tuple[int, int, int]] = []
+    for low, high, branch in intervals:
+        if merged and merged[-1][2] == branch and merged[-1][1] + 1 == low:
+            merged[-1] = (merged[-1][0], high, branch)
+        else:
+            merged.append((low, high, branch))
+    return merged
+
+
+def interval_range(low: int, high: int) -> str:
+    """
+    将区间转换为 `matches` 范围
+
+    :param low: 下界
+    :type low: int
+    :param high: 上界
+    :type high: int
+    :return: 范围
+    :rtype: str
+    """
+    if low == high:
+        return f"{low}"
+    if low == INT_MIN:
+        return f"..{high}"
+    if high == INT_MAX:
+        return f"{low}.."
+    return f"{low}..{high}"
+
+
+def gen_dispatch(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        subject: str, cases: list[tuple[list[int], list[ast.stmt]]], default: list[ast.stmt],
+        namespace: str, file_namespace: str) -> str:
+    """
+    生成根据变量的值选择分支的命令
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param subject: 变量名
+    :type subject: str
+    :param cases: [(分支的常量列表, 分支语句)]
+    :type cases: list[tuple[list[int], list[ast.stmt]]]
+    :param default: 默认分支的语句
+    :type default: list[ast.stmt]
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 所在的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    block_uid = env.newID("if-block")
+    new_file_ns = get_block_folder(env, namespace, file_namespace)
+    bodies = [body for _, body in cases] + ([default] if default else [])
+    intervals = dispatch_intervals([values for values, _ in cases], bool(default))
+
+    # 分支可能修改变量时, 根据进入分支前的副本选择分支
+    statements = [statement for body in bodies for statement in body]
+    key = (env.ns_getter(subject, namespace)[0], g_conf.SB_VARS)
+    copied = any(has_call(statement) for statement in statements) or subject in stored_names(*statements)
+    if copied:
+        key = (f"{namespace}.*Dispatch{block_uid}", g_conf.SB_TEMP)
+        env.temp_ns_append(namespace, key[0])
+
+    targets: list[tuple[tuple[str, bool] | None, bool]] = []
+    for index, body in enumerate(bodies):
+        code = ''
+        for statement in body:
+            code += env.generate_code(statement, namespace, new_file_ns)
+        code += updateBreakPoint(env, c_conf, g_conf, file_namespace)
+        returns = contains_return(body) or bool(loop_exits(body))
+        targets.append((prepare_branch(env, c_conf, code, f"{block_uid}-case{index}", new_file_ns, namespace, returns), returns))
+
+    command = ''
+    command += env.COMMENT(f"Dispatch:二分查找分支", cases=f"{len(cases)}")
+    if copied:
+        env.temp_ns_remove(namespace, key[0])
+        command += SB_ASSIGN(*key, env.ns_getter(subject, namespace)[0], g_conf.SB_VARS)
+    command += gen_decision_tree(env, c_conf, g_conf, key, intervals, targets, block_uid, namespace, file_namespace)
+    if copied:
+        command += SB_RESET(*key)
+    return command
+
+
+def gen_decision_tree(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        key: tuple[str, str], intervals: list[tuple[int, int, int]],
+        targets: list[tuple[tuple[str, bool] | None, bool]], block_uid: int, namespace: str, file_namespace: str) -> str:
+    """
+    生成对区间二分查找的决策树
+
+    区间较多时按中间的区间边界分为两半, 分别写入代码块, 叶子直接检查每个区间并执行对应的分支
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param key: 用于选择分支的计分目标 (目标, 计分项)
+    :type key: tuple[str, str]
+    :param intervals: [(下界, 上界, 分支编号)]
+    :type intervals: list[tuple[int, int, int]]
+    :param targets: 各分支 prepare_branch 的结果与是否包含return
+    :type targets: list[tuple[tuple[str, bool] | None, bool]]
+    :param block_uid: 代码块编号
+    :type block_uid: int
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 所在的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    new_file_ns = get_block_folder(env, namespace, file_namespace)
+    node_count = 0
+
+    def build(part: list[tuple[int, int, int]], line_ns: str) -> str:
+        nonlocal node_count
+        code = ''
+        if len(part) <= DispatchLeafSize:
+            for low, high, branch in part:
+                target, returns = targets[branch]
+                code += gen_branch_call(
+                    env, c_conf, g_conf,
+                    matches_clause(SBCheckType.IF, *key, interval_range(low, high)), target, returns,
+                    namespace, line_ns
+                )
+            return code
+
+        middle = len(part) // 2
+        bound = part[middle - 1][1]
+        for sub_part, matches_range in ((part[:middle], f"..{bound}"), (part[middle:], f"{bound + 1}..")):
+            node_count += 1
+            block_name = f"{block_uid}-node{node_count}"
+            code += gen_branch(
+                env, c_conf, g_conf,
+                matches_clause(SBCheckType.IF, *key, matches_range), build(sub_part, new_file_ns),
+                block_name, new_file_ns, namespace, line_ns,
+                returns=any(targets[branch][1] for _, _, branch in sub_part)
+            )
+        return code
+
+    return build(intervals, file_namespace)
+
+
+__all__ = (
+    "MinDispatchCases",
+    "DispatchLeafSize",
+    "if_ladder",
+    "match_cases",
+    "cases_to_if",
+    "dispatch_intervals",
+    "interval_range",
+    "gen_dispatch",
+    "gen_decision_tree",
+)
@@ -137,8 +137,8 @@ class Environment(ABCEnvironment):
         return self.namespace.getter(name, namespace, ret_raw)
 
     @override
-    def ns_store_local(self, namespace: str) -> tuple[str, str]:
-        return self.namespace.store_local(self.g_conf, self.COMMENT, namespace)
+    def ns_store_local(self, namespace: str, dead_names: set[str] | None = None) -> tuple[str, str]:
+        return self.namespace.store_local(self.g_conf, self.COMMENT, namespace, dead_names)
 
     @override
     def temp_ns_init(self, namespace: str) -> None:
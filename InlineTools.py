@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+函数内联相关工具函数
+"""
+
+import ast
+import copy
+
+from ABCTypes import ABCEnvironment
+from AnalysisTools import local_names
+from Configuration import CompileConfiguration
+from PragmaTools import get_pragmas
+
+_ForbiddenNodes = (
+    ast.Global,
+    ast.Nonlocal,
+    ast.FunctionDef,
+    ast.AsyncFunctionDef,
+    ast.ClassDef,
+    ast.Lambda,
+    ast.Import,
+    ast.ImportFrom,
+    ast.Yield,
+    ast.YieldFrom,
+    ast.Await,
+)
+
+
+def inline_cost(node: ast.FunctionDef) -> int:
+    """
+    估算内联函数体的开销 (函数体内语句与表达式节点的数量)
+
+    :param node: 函数定义节点
+    :type node: ast.FunctionDef
+    :return: 开销
+    :rtype: int
+    """
+    cost = 0
+    for statement in node.body:
+        for sub_node in ast.walk(statement):
+            if isinstance(sub_node, (ast.stmt, ast.expr)):
+                cost += 1
+    return cost
+
+
+def free_names(node: ast.FunctionDef) -> set[str]:
+    """
+    获取函数体内读取的非局部名称
+
+    :param node: 函数定义节点
+    :type node: ast.FunctionDef
+    :return: 非局部名称集合
+    :rtype: set[str]
+    """
+    local = set(local_names(node))
+    names: set[str] = set()
+    for statement in node.body:
+        for sub_node in ast.walk(statement):
+            if isinstance(sub_node, ast.Name) and sub_node.id not in local:
+                names.add(sub_node.id)
+    return names
+
+
+def is_self_recursive(node: ast.FunctionDef) -> bool:
+    """
+    检查函数体内是否直接调用了自身
+
+    :param node: 函数定义节点
+    :type node: ast.FunctionDef
+    :return: 是否直接递归
+    :rtype: bool
+    """
+    for statement in node.body:
+        for sub_node in ast.walk(statement):
+            if isinstance(sub_node, ast.Call) and isinstance(sub_node.func, ast.Name) and sub_node.func.id == node.name:
+                return True
+    return False
+
+
+def is_inlinable(node: ast.FunctionDef, call: ast.Call, threshold: int) -> bool:
+    """
+    检查函数调用是否可以被内联
+
+    函数体只允许在末尾出现一个return, 且不能包含global, 嵌套定义, import等语句
+    函数可以通过 `# MCFC: inline` 强制内联 (忽略开销阈值), 或通过 `# MCFC: noinline` 禁止内联
+
+    :param node: 被调用函数的定义节点
+    :type node: ast.FunctionDef
+    :param call: 函数调用节点
+    :type call: ast.Call
+    :param threshold: 开销阈值
+    :type threshold: int
+    :return: 是否可以内联
+    :rtype: bool
+    """
+    pragmas = get_pragmas(node)
+    if "noinline" in pragmas:
+        return False
+    if ("inline" not in pragmas) and inline_cost(node) > threshold:
+        return False
+
+    arguments = node.args
+    if arguments.posonlyargs or arguments.vararg or arguments.kwonlyargs or arguments.kwarg or arguments.defaults:
+        return False
+    if node.decorator_list:
+        return False
+    if call.keywords or len(call.args) != len(arguments.args):
+        return False
+    if any(isinstance(arg, ast.Starred) for arg in call.args):
+        return False
+
+    for i, statement in enumerate(node.body):
+        for sub_node in ast.walk(statement):
+            if isinstance(sub_node, _ForbiddenNodes):
+                return False
+            if isinstance(sub_node, ast.Return) and not (sub_node is statement and i == len(node.body) - 1):
+                return False
+
+    return not is_self_recursive(node)
+
+
+class _RenameLocals(ast.NodeTransformer):
+    def __init__(self, name_map: dict[str, str]) -> None:
+        self._name_map = name_map
+
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        if node.id in self._name_map:
+            node.id = self._name_map[node.id]
+        return node
+
+
+def build_inline_body(
+        node: ast.FunctionDef,
+        call: ast.Call,
+        uid: int
+) -> tuple[list[ast.stmt], list[ast.stmt], ast.expr | None]:
+    """
+    生成内联后的语句
+
+    参数被展开为对重命名后局部变量的赋值, 位置信息统一指向调用处
+
+    :param node: 被调用函数的定义节点
+    :type node: ast.FunctionDef
+    :param call: 函数调用节点
+    :type call: ast.Call
+    :param uid: 内联ID
+    :type uid: int
+    :returns: (参数赋值语句, 函数体语句, 返回值表达式)
+    :rtype: tuple[list[ast.stmt], list[ast.stmt], ast.expr | None]
+    """
+    name_map = {name: f"{node.name}-inline{uid}-{name}" for name in local_names(node)}
+    renamer = _RenameLocals(name_map)
+
+    bindings: list[ast.stmt] = []
+    for arg, value in zip(node.args.args, call.args):
+        target = ast.copy_location(ast.Name(id=name_map[arg.arg], ctx=ast.Store()), call)
+        bindings.append(ast.copy_location(ast.Assign(targets=[target], value=value), call))
+
+    body = [renamer.visit(copy.deepcopy(statement)) for statement in node.body]
+    for statement in body:
+        for sub_node in ast.walk(statement):
+            if isinstance(sub_node, (ast.stmt, ast.expr)):
+                ast.copy_location(sub_node, call)
+
+    return_value: ast.expr | None = None
+    if body and isinstance(body[-1], ast.Return):
+        return_value = body.pop().value
+
+    return bindings, body, return_value
+
+
+def can_inline(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        func_ns: str, node: ast.Call, namespace: str) -> bool:
+    """
+    检查函数调用能否在调用处内联
+
+    被调用函数的非局部名称在调用处与定义处必须指向同一个命名空间
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param func_ns: 被调用函数的命名空间
+    :type func_ns: str
+    :param node: 函数调用节点
+    :type node: ast.Call
+    :param namespace: 调用所在的命名空间
+    :type namespace: str
+    :return: 能否内联
+    :rtype: bool
+    """
+    if func_ns in env.inline_stack or func_ns not in env.func_defs:
+        return False
+
+    func_def = env.func_defs[func_ns]
+    if not is_inlinable(func_def, node, c_conf.INLINE_THRESHOLD):
+        return False
+
+    for name in free_names(func_def):
+        try:
+            if env.ns_getter(name, func_ns)[0] != env.ns_getter(name, namespace)[0]:
+                return False
+        except KeyError:
+            return False
+    return True
+
+
+def gen_inline_call(
+        env: ABCEnvironment,
+        func_ns: str, node: ast.Call, namespace: str, file_namespace: str) -> str:
+    """
+    在调用处展开函数体, 局部变量被重命名后存放在调用者的命名空间中
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param func_ns: 被调用函数的命名空间
+    :type func_ns: str
+    :param node: 函数调用节点
+    :type node: ast.Call
+    :param namespace: 调用所在的命名空间
+    :type namespace: str
+    :param file_namespace: 调用所在的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    bindings, body, return_value = build_inline_body(env.func_defs[func_ns], node, env.newID("inline"))
+
+    commands = ''
+    commands += env.COMMENT(f"Call:内联函数", func=func_ns)
+    for statement in bindings:
+        commands += env.generate_code(statement, namespace, file_namespace)
+
+    env.inline_stack.append(func_ns)
+    try:
+        for statement in body:
+            commands += env.generate_code(statement, namespace, file_namespace)
+        commands += env.COMMENT(f"Call:内联返回值")
+        commands += env.generate_code(return_value, namespace, file_namespace)
+    finally:
+        env.inline_stack.pop()
+
+    return commands
+
+
+__all__ = (
+    "inline_cost",
+    "free_names",
+    "is_self_recursive",
+    "is_inlinable",
+    "build_inline_body",
+    "can_inline",
+    "gen_inline_call",
+)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+内置函数相关工具函数 (直接生成计分板命令的min, max, abs, divmod)
+"""
+
+import ast
+import inspect
+
+from ABCTypes import ABCEnvironment
+from ConditionTools import matches_clause
+from Configuration import GlobalConfiguration
+from ScoreboardTools import SBCheckType
+from ScoreboardTools import SBOperationType
+from ScoreboardTools import SB_ASSIGN
+from ScoreboardTools import SB_OP
+from ScoreboardTools import SB_RESET
+from TailCallTools import has_call
+from ValueTools import gen_expr_into
+from ValueTools import int_constant
+from ValueTools import is_int_constant
+from ValueTools import pool_constant
+
+IntrinsicGenerators: dict = {}
+"""
+内置函数名 -> 直接生成计分板命令的生成器
+"""
+
+
+def register_intrinsic(name: str):
+    def decorator(func):
+        parameters = set(inspect.signature(func).parameters.keys())
+        IntrinsicGenerators[name] = {"func": func, "params": parameters}
+        return func
+
+    return decorator
+
+
+def _check_intrinsic_args(node: ast.Call, min_count: int, max_count: int | None = None) -> None:
+    """
+    检查内置函数的参数 (只支持位置参数)
+
+    :param node: 调用节点
+    :type node: ast.Call
+    :param min_count: 最少参数数量
+    :type min_count: int
+    :param max_count: 最多参数数量, None表示不限
+    :type max_count: int | None
+    :return: None
+    :rtype: None
+    """
+    count = len(node.args)
+    if (
+            node.keywords
+            or any(isinstance(arg, ast.Starred) for arg in node.args)
+            or count < min_count
+            or (max_count is not None and count > max_count)
+    ):
+        raise Exception(f"暂不支持这种调用内置函数 {node.func.id} 的方式")
+
+
+def _gen_min_max(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        operation: str, node: ast.Call, namespace: str, file_namespace: str) -> str:
+    """
+    生成min/max, 每个操作数一条 `scoreboard players operation ... < / >` 命令
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param operation: 计分板操作类型 (SBOperationType.LESS / SBOperationType.MORE)
+    :type operation: str
+    :param node: 调用节点
+    :type node: ast.Call
+    :param namespace: 当前命名空间
+    :type namespace: str
+    :param file_namespace: 当前文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    _check_intrinsic_args(node, 2)
+
+    args = list(node.args)
+    complex_args = [i for i, arg in enumerate(args) if not (isinstance(arg, ast.Name) or is_int_constant(arg))]
+    # 只有一个需要计算的操作数且其中没有函数调用时, 可以把它移到最前面而不改变变量的读取结果
+    if len(complex_args) == 1 and not has_call(args[complex_args[0]]):
+        args.insert(0, args.pop(complex_args[0]))
+
+    result = f"{namespace}{g_conf.ResultExt}"
+    # 其余操作数都是变量或常量时直接在结果上比较, 否则计算操作数会覆盖结果, 需要临时变量
+    direct = all(isinstance(arg, ast.Name) or is_int_constant(arg) for arg in args[1:])
+    accumulator = result if direct else f"{namespace}.*MinMax{env.newID('process')}"
+
+    command = ''
+    command += env.COMMENT(f"Call:内置函数", name=node.func.id)
+    command += gen_expr_into(env, g_conf, args[0], accumulator, g_conf.SB_TEMP, namespace, file_namespace)
+    if not direct:
+        env.temp_ns_append(namespace, accumulator)
+
+    for arg in args[1:]:
+        if is_int_constant(arg):
+            command += SB_OP(
+                operation, accumulator, g_conf.SB_TEMP, pool_constant(env, g_conf, int_constant(arg)), g_conf.SB_CONST
+            )
+        elif isinstance(arg, ast.Name):
+            command += SB_OP(
+                operation, accumulator, g_conf.SB_TEMP, env.ns_getter(arg.id, namespace)[0], g_conf.SB_VARS
+            )
+        else:
+            command += env.generate_code(arg, namespace, file_namespace)
+            command += SB_OP(operation, accumulator, g_conf.SB_TEMP, result, g_conf.SB_TEMP)
+
+    if not direct:
+        command += SB_ASSIGN(result, g_conf.SB_TEMP, accumulator, g_conf.SB_TEMP)
+        command += SB_RESET(accumulator, g_conf.SB_TEMP)
+        env.temp_ns_remove(namespace, accumulator)
+
+    return command
+
+
+@register_intrinsic("min")
+def gen_min(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration, node: ast.Call, namespace: str, file_namespace: str) -> str:
+    return _gen_min_max(env, g_conf, SBOperationType.LESS, node, namespace, file_namespace)
+
+
+@register_intrinsic("max")
+def gen_max(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration, node: ast.Call, namespace: str, file_namespace: str) -> str:
+    return _gen_min_max(env, g_conf, SBOperationType.MORE, node, namespace, file_namespace)
+
+
+@register_intrinsic("abs")
+def gen_abs(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration, node: ast.Call, namespace: str, file_namespace: str) -> str:
+    _check_intrinsic_args(node, 1, 1)
+
+    result = f"{namespace}{g_conf.ResultExt}"
+    command = ''
+    command += env.COMMENT(f"Call:内置函数", name="abs")
+    command += env.generate_code(node.args[0], namespace, file_namespace)
+    # 只有负数需要取反
+    command += f"execute {matches_clause(SBCheckType.IF, result, g_conf.SB_TEMP, '..-1')} run "
+    command += SB_OP(SBOperationType.MULTIPLY, result, g_conf.SB_TEMP, g_conf.Flags.NEG, g_conf.SB_FLAGS)
+    return command
+
+
+@register_intrinsic("divmod")
+def gen_divmod(node: ast.Call) -> str:
+    raise Exception("divmod 暂时只支持元组解包赋值 (q, r = divmod(a, b))")
+
+
+def expand_divmod(
+        env: ABCEnvironment,
+        node: ast.Call, namespace: str, file_namespace: str) -> tuple[str, ast.Tuple]:
+    """
+    将 `divmod(a, b)` 展开为 `(a // b, a % b)`
+
+    变量与常量以外的参数先存入隐藏变量, 保证只求值一次
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param node: 调用节点
+    :type node: ast.Call
+    :param namespace: 当前命名空间
+    :type namespace: str
+    :param file_namespace: 当前文件命名空间
+    :type file_namespace: str
+    :returns: (计算参数的命令, 展开后的元组)
+    :rtype: tuple[str, ast.Tuple]
+    """
+    _check_intrinsic_args(node, 2, 2)
+
+    command = ''
+    uid = env.newID("divmod")
+    operands: list[ast.expr] = []
+    for suffix, arg in zip(("a", "b"), node.args):
+        if isinstance(arg, ast.Name) or is_int_constant(arg):
+            operands.append(arg)
+            continue
+        name = f"divmod{uid}-{suffix}"
+        target = ast.copy_location(ast.Name(id=name, ctx=ast.Store()), arg)
+        command += env.generate_code(
+            ast.copy_location(ast.Assign(targets=[target], value=arg), arg), namespace, file_namespace
+        )
+        operands.append(ast.copy_location(ast.Name(id=name, ctx=ast.Load()), arg))
+
+    quotient = ast.copy_location(ast.BinOp(left=operands[0], op=ast.FloorDiv(), right=operands[1]), node)
+    remainder = ast.copy_location(ast.BinOp(left=operands[0], op=ast.Mod(), right=operands[1]), node)
+    return command, ast.copy_location(ast.Tuple(elts=[quotient, remainder], ctx=ast.Load()), node)
+
+
+__all__ = (
+    "IntrinsicGenerators",
+    "register_intrinsic",
+    "gen_min",
+    "gen_max",
+    "gen_abs",
+    "gen_divmod",
+    "expand_divmod",
+)
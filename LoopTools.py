@@ -0,0 +1,601 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+循环相关工具函数 (break/continue的分析与改写, while与for循环的生成)
+"""
+
+import ast
+import copy
+
+from ABCTypes import ABCEnvironment
+from AnalysisTools import contains_return
+from AnalysisTools import stored_names
+from BlockTools import gen_branch
+from BlockTools import get_block_folder
+from BlockTools import native_block_exit
+from BlockTools import write_block
+from BreakPointTools import updateBreakPoint
+from ConditionTools import matches_clause
+from Configuration import CompileConfiguration
+from Configuration import GlobalConfiguration
+from PragmaTools import get_pragmas
+from PragmaTools import pragma_value
+from ReturnTools import gen_return_breakpoint
+from ScoreboardTools import SBCheckType
+from ScoreboardTools import SB_ADD
+from ScoreboardTools import SB_CONSTANT
+from ScoreboardTools import SB_RESET
+from TailCallTools import has_call
+from ValueTools import int_constant
+
+LoopContinue: int = 1
+"""
+标记位: 执行了continue
+"""
+
+LoopBreak: int = 2
+"""
+标记位: 执行了break
+"""
+
+LoopReturn: int = 3
+"""
+标记位: 执行了return
+"""
+
+MaxUnrollFactor: int = 8
+"""
+部分展开时每次迭代最多包含的循环体副本数
+"""
+
+_ScopeNodes = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+
+def _loop_blocks(node: ast.stmt) -> list[list[ast.stmt]]:
+    """
+    获取语句中属于同一层循环的子语句块
+
+    嵌套循环的循环体中的break/continue属于嵌套的循环, 但其else块中的属于外层循环
+
+    :param node: 语句
+    :type node: ast.stmt
+    :return: 子语句块列表
+    :rtype: list[list[ast.stmt]]
+    """
+    if isinstance(node, ast.If):
+        return [node.body, node.orelse]
+    if isinstance(node, (ast.While, ast.For)):
+        return [node.orelse]
+    return []
+
+
+def loop_exits(statements: list[ast.stmt]) -> set[type[ast.stmt]]:
+    """
+    获取语句块中属于当前循环的break/continue (不进入嵌套的循环体与作用域)
+
+    :param statements: 语句列表
+    :type statements: list[ast.stmt]
+    :return: 出现的语句类型集合 (ast.Break, ast.Continue)
+    :rtype: set[type[ast.stmt]]
+    """
+    exits: set[type[ast.stmt]] = set()
+    for statement in statements:
+        if isinstance(statement, (ast.Break, ast.Continue)):
+            exits.add(type(statement))
+        for block in _loop_blocks(statement):
+            exits |= loop_exits(block)
+    return exits
+
+
+def lower_loop_exits(statements: list[ast.stmt], flag: str) -> list[ast.stmt]:
+    """
+    将break/continue改写为对标记变量的赋值
+
+    break与continue分别将标记变量设置为 LoopBreak 与 LoopContinue,
+    可能执行它们(或return)的语句之后的语句放入 `if flag == 0:` 中, 执行了break/continue之后不可达的语句被丢弃
+
+    :param statements: 循环体的语句列表
+    :type statements: list[ast.stmt]
+    :param flag: 标记变量名
+    :type flag: str
+    :return: 改写后的语句列表
+    :rtype: list[ast.stmt]
+    """
+    lowered: list[ast.stmt] = []
+    for index, statement in enumerate(statements):
+        if isinstance(statement, (ast.Break, ast.Continue)):
+            value = LoopBreak if isinstance(statement, ast.Break) else LoopContinue
+            lowered.append(ast.copy_location(ast.Assign(
+                targets=[ast.Name(id=flag, ctx=ast.Store())],
+                value=ast.Constant(value=value)
+            ), statement))
+            return lowered
+
+        if not loop_exits([statement]) and not contains_return([statement]):
+            lowered.append(statement)
+            continue
+
+        if isinstance(statement, ast.If):
+            statement = ast.copy_location(ast.If(
+                test=statement.test,
+                body=lower_loop_exits(statement.body, flag),
+                orelse=lower_loop_exits(statement.orelse, flag)
+            ), statement)
+        elif isinstance(statement, (ast.While, ast.For)):
+            statement = ast.copy_location(type(statement)(**{
+                **{field: getattr(statement, field) for field in statement._fields},
+                "orelse": lower_loop_exits(statement.orelse, flag)
+            }), statement)
+        lowered.append(statement)
+
+        rest = lower_loop_exits(statements[index + 1:], flag)
+        if rest:
+            lowered.append(ast.copy_location(ast.If(
+                test=ast.Compare(
+                    left=ast.Name(id=flag, ctx=ast.Load()),
+                    ops=[ast.Eq()],
+                    comparators=[ast.Constant(value=0)]
+                ),
+                body=rest,
+                orelse=[]
+            ), statements[index + 1]))
+        return lowered
+
+    return lowered
+
+
+class _SubstituteName(ast.NodeTransformer):
+    def __init__(self, name: str, value: int) -> None:
+        self._name = name
+        self._value = value
+
+    def visit_Name(self, node: ast.Name) -> ast.expr:
+        if node.id == self._name and isinstance(node.ctx, ast.Load):
+            return ast.copy_location(ast.Constant(value=self._value), node)
+        return node
+
+
+def substitute_name(statements: list[ast.stmt], name: str, value: int) -> list[ast.stmt]:
+    """
+    复制语句块, 并将其中读取的变量替换为常量
+
+    :param statements: 语句列表
+    :type statements: list[ast.stmt]
+    :param name: 变量名
+    :type name: str
+    :param value: 常量值
+    :type value: int
+    :return: 替换后的语句列表 (不修改原语句)
+    :rtype: list[ast.stmt]
+    """
+    transformer = _SubstituteName(name, value)
+    return [transformer.visit(copy.deepcopy(statement)) for statement in statements]
+
+
+def loop_cost(statements: list[ast.stmt]) -> int:
+    """
+    估算循环体的开销 (语句与表达式节点的数量)
+
+    :param statements: 循环体的语句列表
+    :type statements: list[ast.stmt]
+    :return: 开销
+    :rtype: int
+    """
+    cost = 0
+    for statement in statements:
+        for sub_node in ast.walk(statement):
+            if isinstance(sub_node, (ast.stmt, ast.expr)):
+                cost += 1
+    return cost
+
+
+def unroll_factor(statements: list[ast.stmt], target: str, count: int, threshold: int) -> int | None:
+    """
+    计算 `for target in range(...)` 循环的展开倍数
+
+    展开后的总开销不超过阈值时完全展开, 否则在阈值内尽量多地复制循环体 (部分展开);
+    循环体包含break/continue, 修改循环变量或定义嵌套作用域时不展开
+
+    :param statements: 循环体的语句列表
+    :type statements: list[ast.stmt]
+    :param target: 循环变量名
+    :type target: str
+    :param count: 迭代次数
+    :type count: int
+    :param threshold: 展开后循环体开销的阈值
+    :type threshold: int
+    :return: 等于count时完全展开, 大于1时按该倍数部分展开, 不展开时返回None
+    :rtype: int | None
+    """
+    if loop_exits(statements) or target in stored_names(*statements):
+        return None
+    if any(isinstance(sub_node, _ScopeNodes) for statement in statements for sub_node in ast.walk(statement)):
+        return None
+
+    cost = max(loop_cost(statements), 1)
+    if count * cost <= threshold:
+        return count
+    factor = min(threshold // cost, MaxUnrollFactor, count)
+    return factor if factor > 1 else None
+
+
+def range_arguments(node: ast.For) -> tuple[ast.expr, ast.expr, int]:
+    """
+    解析 `for 变量 in range(...)` 的范围参数
+
+    :param node: for循环节点
+    :type node: ast.For
+    :returns: (起始值, 结束值, 步长)
+    :rtype: tuple[ast.expr, ast.expr, int]
+    """
+    iterator = node.iter
+    if (
+            not isinstance(node.target, ast.Name)
+            or not isinstance(iterator, ast.Call)
+            or not isinstance(iterator.func, ast.Name)
+            or iterator.func.id != "range"
+            or iterator.keywords
+            or not 1 <= len(iterator.args) <= 3
+            or any(isinstance(arg, ast.Starred) for arg in iterator.args)
+    ):
+        raise Exception("for循环暂时只支持 for 变量 in range(...)")
+
+    args = iterator.args
+    if len(args) == 1:
+        return ast.Constant(value=0), args[0], 1
+
+    step = 1
+    if len(args) == 3:
+        step = int_constant(args[2])
+        if not step:
+            raise Exception("range的步长暂时只支持非零常量")
+    return args[0], args[1], step
+
+
+def slice_size(pragmas: set[str]) -> int | None:
+    """
+    解析 `# MCFC: slice=K` 编译指令 (每tick最多执行K次迭代)
+
+    :param pragmas: 编译指令集合
+    :type pragmas: set[str]
+    :return: 每tick的迭代次数, 没有该指令时返回None
+    :rtype: int | None
+    """
+    value = pragma_value(pragmas, "slice")
+    if value is None:
+        return None
+    if not value.isdigit() or int(value) < 1:
+        raise Exception(f"slice的值必须是正整数: {value}")
+    return int(value)
+
+
+def declare_variable(env: ABCEnvironment, name: str, namespace: str) -> str:
+    """
+    声明变量 (已存在时直接获取)
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param name: 变量名
+    :type name: str
+    :param namespace: 当前命名空间
+    :type namespace: str
+    :return: 变量的计分目标
+    :rtype: str
+    """
+    target = ast.Name(id=name, ctx=ast.Store())
+    name, _, root_ns = env.ns_from_node(target, namespace, not_exists_ok=True, ns_type="variable")
+    env.ns_setter(name, f"{root_ns}.{name}", namespace, "variable")
+    return f"{root_ns}.{name}"
+
+
+def gen_loop(
+        env: ABCEnvironment,
+        c_conf: CompileConfiguration,
+        g_conf: GlobalConfiguration,
+        node: ast.While | ast.For,
+        init: str, head: str, setup: str, clause: str | None, namespace: str, file_namespace: str,
+        *, always_enter: bool = False, slicing: tuple[int, str | None] | None = None, finish: str = '') -> str:
+    """
+    生成循环
+
+    整个循环体写入一个代码块, 代码块末尾重新判断条件并调用自身进入下一次迭代,
+    支持return命令时break/continue直接结束代码块, 否则改写为标记变量
+
+    分tick执行时每tick最多执行指定次数的迭代, 之后通过 `schedule function` 在下一tick从恢复代码块继续,
+    循环结束后的代码 (else块等) 在恢复代码块中执行, 循环后的语句不会等待循环结束
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param node: 循环节点
+    :type node: ast.While | ast.For
+    :param init: 进入循环前执行的命令
+    :type init: str
+    :param head: 每次迭代开始时执行的命令
+    :type head: str
+    :param setup: 判断条件前需要执行的命令
+    :type setup: str
+    :param clause: 继续循环的条件子命令, None表示总是继续
+    :type clause: str | None
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 所在的文件命名空间
+    :type file_namespace: str
+    :param always_enter: 是否不判断条件直接进入第一次迭代
+    :type always_enter: bool
+    :param slicing: 分tick执行的设置 (每tick的迭代次数, 完成标记变量名), None表示在当前tick内执行完
+    :type slicing: tuple[int, str | None] | None
+    :param finish: 循环结束后执行的命令
+    :type finish: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    block_uid = env.newID("if-block")
+    block_folder = get_block_folder(env, namespace, file_namespace)
+    block_name = f"{block_uid}-loop"
+    func_path = f"{namespace}\\.if\\{block_name}".replace('\\', '/')
+
+    body = node.body
+    exits = loop_exits(body)
+    returns = contains_return(body)
+    tail = setup + _loop_call(clause, func_path)
+
+    # 分tick执行时每次迭代消耗一次预算, 预算耗尽时安排下一tick从恢复代码块继续
+    budget: tuple[str, str] | None = None
+    if slicing is not None:
+        budget = (f"{namespace}.*Slice{block_uid}", g_conf.SB_TEMP)
+        resume_path = f"{namespace}\\.if\\{block_uid}-slice".replace('\\', '/')
+        running = matches_clause(SBCheckType.IF, *budget, "1..")
+        tail = SB_ADD(*budget, -1)
+        tail += f"execute {matches_clause(SBCheckType.IF, *budget, '..0')} run schedule function {resume_path} 1t append\n"
+        tail += setup + _loop_call(running if clause is None else f"{running} {clause}", func_path)
+
+    # else块只在没有执行break时执行, None表示总是执行
+    else_clause: str | None = None
+    control: tuple[str, str] | None = None
+    if not c_conf.NATIVE_RETURN and (exits or returns):
+        # 不支持return命令时break/continue改写为标记变量, 标记变量不为0时跳过循环体的剩余部分
+        flag = f"loop{block_uid}-flag"
+        body = lower_loop_exits(body, flag)
+        init += env.generate_code(ast.Assign(
+            targets=[ast.Name(id=flag, ctx=ast.Store())], value=ast.Constant(value=0), lineno=node.lineno
+        ), namespace, file_namespace)
+        control = (env.ns_getter(flag, namespace)[0], g_conf.SB_VARS)
+        if ast.Continue in exits:
+            head += SB_CONSTANT(*control, 0)
+        if ast.Break in exits:
+            else_clause = matches_clause(SBCheckType.UNLESS, *control, f"{LoopBreak}")
+        if ast.Break in exits or returns:
+            tail = gen_branch(
+                env, c_conf, g_conf,
+                matches_clause(SBCheckType.IF, *control, f"..{LoopContinue}"), tail,
+                f"{block_uid}-next", block_folder, namespace, file_namespace
+            )
+    elif c_conf.NATIVE_RETURN and (returns or (ast.Break in exits and node.orelse)):
+        # 循环结束后需要知道是否执行了break或return
+        control = (f"{namespace}.*Loop{block_uid}", g_conf.SB_TEMP)
+        env.temp_ns_append(namespace, control[0])
+        if ast.Break in exits:
+            else_clause = matches_clause(SBCheckType.UNLESS, *control, f"{LoopBreak}")
+
+    # 生成循环体
+    env.loop_stack.append({"namespace": namespace, "tail": tail, "control": control})
+    code = head
+    for statement in body:
+        code += env.generate_code(statement, namespace, block_folder)
+    env.loop_stack.pop()
+    code += updateBreakPoint(env, c_conf, g_conf, file_namespace)
+    code += env.COMMENT(f"Loop:进入下一次迭代")
+    code += tail
+    write_block(env, code, block_name, block_folder, namespace)
+
+    command = ''
+    if c_conf.NATIVE_RETURN and control is not None:
+        command += SB_CONSTANT(*control, 0)
+    command += init
+
+    # 分tick执行时循环结束后的代码写入恢复代码块
+    after_ns = file_namespace if slicing is None else block_folder
+    after = ''
+
+    # else块中的break/continue属于外层循环
+    if node.orelse:
+        after += env.COMMENT(f"Loop:else块")
+        if else_clause is None:
+            for statement in node.orelse:
+                after += env.generate_code(statement, namespace, after_ns)
+        else:
+            else_code = ''
+            for statement in node.orelse:
+                else_code += env.generate_code(statement, namespace, block_folder)
+            else_code += updateBreakPoint(env, c_conf, g_conf, after_ns)
+            after += gen_branch(
+                env, c_conf, g_conf,
+                else_clause, else_code, f"{block_uid}-else", block_folder, namespace, after_ns,
+                returns=contains_return(node.orelse) or bool(loop_exits(node.orelse))
+            )
+
+    if c_conf.NATIVE_RETURN and control is not None:
+        after += SB_RESET(*control)
+        env.temp_ns_remove(namespace, control[0])
+    after += finish
+
+    if slicing is not None:
+        size, done = slicing
+        if done is not None:
+            done_ns = declare_variable(env, done, namespace)
+            command += SB_CONSTANT(done_ns, g_conf.SB_VARS, 0)
+            after += SB_CONSTANT(done_ns, g_conf.SB_VARS, 1)
+        after += SB_RESET(*budget)
+
+        # 预算有剩余说明循环已经结束 (条件不满足或执行了break)
+        resume = SB_CONSTANT(*budget, size)
+        resume += setup + _loop_call(clause, func_path)
+        resume += env.COMMENT(f"Loop:循环结束")
+        resume += gen_branch(
+            env, c_conf, g_conf,
+            running, after, f"{block_uid}-done", block_folder, namespace, block_folder
+        )
+        write_block(env, resume, f"{block_uid}-slice", block_folder, namespace)
+
+        command += env.COMMENT(f"Loop:分tick进入循环", size=f"{size}")
+        command += f"function {resume_path}\n"
+        return command
+
+    command += env.COMMENT(f"Loop:进入循环")
+    command += _loop_call(None, func_path) if always_enter else setup + _loop_call(clause, func_path)
+
+    # 循环中执行了return时继续结束外层
+    if returns:
+        returned = matches_clause(SBCheckType.IF, *control, f"{LoopReturn}")
+        if c_conf.NATIVE_RETURN:
+            command += f"execute {returned} run {native_block_exit(env, g_conf, namespace, file_namespace)}\n"
+        else:
+            command += gen_return_breakpoint(env, g_conf, file_namespace, returned)
+
+    return command + after
+
+
+def _loop_call(clause: str | None, func_path: str) -> str:
+    """
+    生成满足条件时进入下一次迭代的命令
+
+    :param clause: 条件子命令, None表示无条件
+    :type clause: str | None
+    :param func_path: 循环代码块的函数路径
+    :type func_path: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    if clause is None:
+        return f"function {func_path}\n"
+    return f"execute {clause} run function {func_path}\n"
+
+
+def current_loop(env: ABCEnvironment, namespace: str) -> dict:
+    """
+    获取当前函数内最内层的循环
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :return: 循环信息
+    :rtype: dict
+    """
+    if not env.loop_stack or env.loop_stack[-1]["namespace"] != namespace:
+        raise Exception("break/continue不在循环内")
+    return env.loop_stack[-1]
+
+
+def gen_unrolled(
+        env: ABCEnvironment,
+        node: ast.For, values: range, namespace: str, file_namespace: str,
+        *, complete: bool = True) -> str:
+    """
+    展开for循环的若干次迭代, 每份循环体中的循环变量替换为常量
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param node: for循环节点
+    :type node: ast.For
+    :param values: 需要展开的循环变量值
+    :type values: range
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 所在的文件命名空间
+    :type file_namespace: str
+    :param complete: 是否展开了全部迭代 (之后需要更新循环变量并执行else块)
+    :type complete: bool
+    :return: 生成的命令
+    :rtype: str
+    """
+    target = node.target.id
+
+    def _assign_target(value: int) -> str:
+        return env.generate_code(ast.copy_location(ast.Assign(
+            targets=[ast.Name(id=target, ctx=ast.Store())], value=ast.Constant(value=value)
+        ), node), namespace, file_namespace)
+
+    command = ''
+    # 循环体调用的函数可能读取循环变量 (全局变量或通过global/nonlocal), 此时每份循环体前仍需写入循环变量
+    assigns = any(has_call(statement) for statement in node.body)
+    for value in values:
+        command += env.COMMENT(f"For:展开迭代", target=target, value=f"{value}")
+        if assigns:
+            command += _assign_target(value)
+        for statement in substitute_name(node.body, target, value):
+            command += env.generate_code(statement, namespace, file_namespace)
+
+    if not complete:
+        return command
+
+    # 循环结束后循环变量保留最后一次迭代的值
+    if not assigns:
+        command += _assign_target(values[-1])
+    for statement in node.orelse:
+        command += env.generate_code(statement, namespace, file_namespace)
+    return command
+
+
+def loop_slicing(env: ABCEnvironment, node: ast.While | ast.For, namespace: str) -> tuple[int, str | None] | None:
+    """
+    获取循环的分tick执行设置
+
+    循环上的 `# MCFC: slice=K` 指定每tick最多执行K次迭代, `done=变量名` 指定循环结束时设置为1的完成标记变量;
+    函数上的指令作用于函数内所有不在其他循环中且不包含return的循环, 循环上的 `# MCFC: noslice` 可以取消
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param node: 循环节点
+    :type node: ast.While | ast.For
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :returns: (每tick的迭代次数, 完成标记变量名), 不分tick执行时返回None
+    :rtype: tuple[int, str | None] | None
+    """
+    pragmas = get_pragmas(node)
+    if "noslice" in pragmas:
+        return None
+
+    nested = any(loop["namespace"] == namespace for loop in env.loop_stack)
+    returns = contains_return(node.body) or contains_return(node.orelse)
+    size = slice_size(pragmas)
+    if size is None:
+        func_def = env.func_defs.get(namespace)
+        if func_def is None or nested or returns:
+            return None
+        pragmas = get_pragmas(func_def)
+        size = slice_size(pragmas)
+        if size is None:
+            return None
+
+    # 循环之后的语句不会等待分tick执行的循环结束
+    if nested:
+        raise Exception("分tick执行的循环不能位于其他循环中")
+    if returns:
+        raise Exception("分tick执行的循环中不能使用return")
+    return size, pragma_value(pragmas, "done")
+
+
+__all__ = (
+    "LoopContinue",
+    "LoopBreak",
+    "LoopReturn",
+    "MaxUnrollFactor",
+    "loop_exits",
+    "lower_loop_exits",
+    "substitute_name",
+    "loop_cost",
+    "unroll_factor",
+    "range_arguments",
+    "slice_size",
+    "declare_variable",
+    "gen_loop",
+    "current_loop",
+    "gen_unrolled",
+    "loop_slicing",
+)
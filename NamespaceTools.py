@@ -13,7 +13,7 @@ from typing import override
 from ABCTypes import ABCFileNamespace
 from ABCTypes import ABCNamespace
 from Configuration import GlobalConfiguration
-from ScoreboardTools import SB_Name2Code
+from ScoreboardTools import gen_code
 
 
 class Namespace(ABCNamespace):
@@ -158,7 +158,8 @@ class Namespace(ABCNamespace):
             self,
             g_conf: GlobalConfiguration,
             comment_gen: Callable[[str], str],
-            namespace: str
+            namespace: str,
+            dead_names: set[str] | None = None
     ) -> tuple[str, str]:
         _ns, _name = namespace.rsplit('\\', 1)
         local_ns: dict[str, dict[str, ...]] = self.getter(_name, _ns, ret_raw=True)[0]
@@ -171,70 +172,45 @@ class Namespace(ABCNamespace):
             data = local_ns[name]
             if data[".__type__"] != "variable":
                 continue
+            if dead_names is not None and name in dead_names:
+                continue
+            # 指向其他命名空间的变量(如global)不属于当前栈帧
+            if not data[".__namespace__"].startswith(f"{namespace}."):
+                continue
             ns_ls.append(data[".__namespace__"])
 
+        # 变量与临时变量保存在同一个栈帧复合标签中 (临时变量不再单独使用LocalTemp),
+        # 计分板与storage之间只能逐个复制, 因此每个值仍需要一条命令, 栈帧本身只需要一次压栈和一次出栈
+        slots: list[tuple[str, str, str]] = [
+            *((f"v{i}", ns, g_conf.SB_VARS) for i, ns in enumerate(ns_ls)),
+            *((f"t{i}", ns, g_conf.SB_TEMP) for i, ns in enumerate(self.temp_ns[namespace])),
+        ]
+        frame = f"{g_conf.DS_ROOT} {g_conf.DS_LOCAL_VARS}[-1]"
+
         def store() -> str:
-            nonlocal ns_ls
             command = ''
-            command += comment_gen("LocalVars.Store")
-            for ns in ns_ls:
-                command += (
-                    f"execute store result storage "
-                    f"{g_conf.DS_ROOT} {g_conf.DS_TEMP} "
-                    f"int 1 "
-                    f"run scoreboard players get {SB_Name2Code[g_conf.SB_VARS][ns]} {g_conf.SB_VARS}\n"
-                )
-                command += (
-                    f"data modify storage "
-                    f"{g_conf.DS_ROOT} {g_conf.DS_LOCAL_VARS} "
-                    f"append from storage "
-                    f"{g_conf.DS_ROOT} {g_conf.DS_TEMP}\n"
-                )
-            command += comment_gen("LocalTemp.Store")
-            for ns in self.temp_ns[namespace]:
-                command += (
-                    f"execute store result storage "
-                    f"{g_conf.DS_ROOT} {g_conf.DS_TEMP} "
-                    f"int 1 "
-                    f"run scoreboard players get {SB_Name2Code[g_conf.SB_TEMP][ns]} {g_conf.SB_TEMP}\n"
-                )
+            command += comment_gen("LocalFrame.Store")
+            if not slots:
+                return command
+            command += f"data modify storage {g_conf.DS_ROOT} {g_conf.DS_LOCAL_VARS} append value {{}}\n"
+            for key, ns, objective in slots:
                 command += (
-                    f"data modify storage "
-                    f"{g_conf.DS_ROOT} {g_conf.DS_LOCAL_TEMP} "
-                    f"append from storage "
-                    f"{g_conf.DS_ROOT} {g_conf.DS_TEMP}\n"
+                    f"execute store result storage {frame}.{key} int 1 "
+                    f"run scoreboard players get {gen_code(ns, objective)} {objective}\n"
                 )
-
             return command
 
         def load() -> str:
-            nonlocal ns_ls
             command = ''
-            command += comment_gen("LocalVars.Load")
-            for ns in ns_ls[::-1]:
+            command += comment_gen("LocalFrame.Load")
+            if not slots:
+                return command
+            for key, ns, objective in slots:
                 command += (
-                    f"execute store result score "
-                    f"{SB_Name2Code[g_conf.SB_VARS][ns]} {g_conf.SB_VARS} "
-                    f"run data get storage "
-                    f"{g_conf.DS_ROOT} {g_conf.DS_LOCAL_VARS}[-1] 1\n"
+                    f"execute store result score {gen_code(ns, objective)} {objective} "
+                    f"run data get storage {frame}.{key} 1\n"
                 )
-                command += (
-                    f"data remove storage "
-                    f"{g_conf.DS_ROOT} {g_conf.DS_LOCAL_VARS}[-1]\n"
-                )
-            command += comment_gen("LocalTemp.Load")
-            for ns in self.temp_ns[namespace][::-1]:
-                command += (
-                    f"execute store result score "
-                    f"{SB_Name2Code[g_conf.SB_TEMP][ns]} {g_conf.SB_TEMP} "
-                    f"run data get storage "
-                    f"{g_conf.DS_ROOT} {g_conf.DS_LOCAL_TEMP}[-1] 1\n"
-                )
-                command += (
-                    f"data remove storage "
-                    f"{g_conf.DS_ROOT} {g_conf.DS_LOCAL_TEMP}[-1]\n"
-                )
-
+            command += f"data remove storage {frame}\n"
             return command
 
         return store(), load()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+解析源码中的编译指令注释 (# MCFC: xxx)
+"""
+
+import ast
+import io
+import re
+import tokenize
+
+PragmaPattern = re.compile(r"#\s*MCFC:\s*(.*)")
+
+
+def _normalize_pragma(pragma: str) -> str:
+    """
+    规范化单条编译指令: 指令名称不区分大小写, `名称=值` 中的值(如变量名)保持原样
+
+    :param pragma: 编译指令
+    :type pragma: str
+    :return: 规范化后的编译指令
+    :rtype: str
+    """
+    key, sep, value = pragma.partition('=')
+    return f"{key.strip().lower()}{sep}{value.strip()}"
+
+
+def parse_pragmas(source: str) -> tuple[dict[int, set[str]], set[int]]:
+    """
+    解析源码中的编译指令
+
+    :param source: 源码
+    :type source: str
+    :returns: (行号 -> 该行的编译指令集合, 仅包含注释的行号集合)
+    :rtype: tuple[dict[int, set[str]], set[int]]
+    """
+    pragmas: dict[int, set[str]] = {}
+    comment_lines: set[int] = set()
+
+    for token in tokenize.generate_tokens(io.StringIO(source).readline):
+        if token.type != tokenize.COMMENT:
+            continue
+
+        lineno = token.start[0]
+        if not token.line[:token.start[1]].strip():
+            comment_lines.add(lineno)
+
+        res = PragmaPattern.match(token.string)
+        if res is None:
+            continue
+        pragmas.setdefault(lineno, set()).update(
+            _normalize_pragma(p) for p in res.group(1).split(',') if p.strip()
+        )
+
+    return pragmas, comment_lines
+
+
+def attach_pragmas(tree: ast.AST, source: str) -> None:
+    """
+    将编译指令挂载到语句节点上
+
+    语句首行行尾的指令, 以及紧贴在语句(或其装饰器)上方的注释行中的指令都属于该语句
+
+    :param tree: 源码的AST
+    :type tree: ast.AST
+    :param source: 源码
+    :type source: str
+    :return: None
+    :rtype: None
+    """
+    pragmas, comment_lines = parse_pragmas(source)
+    if not pragmas:
+        return
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.stmt):
+            continue
+
+        node_pragmas: set[str] = set(pragmas.get(node.lineno, ()))
+
+        first_line = min([node.lineno, *(d.lineno for d in getattr(node, "decorator_list", ()))])
+        lineno = first_line - 1
+        while lineno in comment_lines:
+            node_pragmas.update(pragmas.get(lineno, ()))
+            lineno -= 1
+
+        if node_pragmas:
+            node.mcfc_pragmas = node_pragmas
+
+
+def get_pragmas(node: ast.AST) -> set[str]:
+    """
+    获取挂载在节点上的编译指令
+
+    :param node: AST节点
+    :type node: ast.AST
+    :return: 编译指令集合
+    :rtype: set[str]
+    """
+    return getattr(node, "mcfc_pragmas", set())
+
+
+def pragma_value(pragmas: set[str], name: str) -> str | None:
+    """
+    获取 `名称=值` 形式的编译指令的值
+
+    :param pragmas: 编译指令集合
+    :type pragmas: set[str]
+    :param name: 指令名称
+    :type name: str
+    :return: 指令的值, 不存在时返回None
+    :rtype: str | None
+    """
+    for pragma in pragmas:
+        key, sep, value = pragma.partition('=')
+        if sep and key.strip() == name:
+            return value.strip()
+    return None
+
+
+__all__ = (
+    "PragmaPattern",
+    "parse_pragmas",
+    "attach_pragmas",
+    "get_pragmas",
+    "pragma_value",
+)
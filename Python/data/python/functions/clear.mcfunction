@@ -5,7 +5,8 @@ scoreboard objectives remove ${SB:Flags}
 scoreboard objectives remove ${SB:Input}
 scoreboard objectives remove ${SB:Vars}
 scoreboard objectives remove ${SB:FuncResult}
+scoreboard objectives remove ${SB:Const}
 data remove storage ${DS:Root} ${DS:Temp}
 data remove storage ${DS:Root} ${DS:LocalVars}
-data remove storage ${DS:Root} ${DS:LocalTemp}
+data remove storage ${DS:Root} ${DS:Runtime}
 tellraw @a { "text": "" , "extra": [ ${RAWJSON:Prefix}, { "text": " ${CHAT:DataClearingComplete}" }], "color": "gold", ${RAWJSON.HoverEvent:Author} }
\ No newline at end of file
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+返回语句相关工具函数 (return命令, 断点返回与自身尾调用)
+"""
+
+import ast
+
+from ABCTypes import ABCEnvironment
+from BlockTools import in_function_body
+from BreakPointTools import BreakPointFlag
+from BreakPointTools import raiseBreakPoint
+from CallTools import gen_pass_arguments
+from ConditionTools import store_success
+from Configuration import GlobalConfiguration
+from DebuggingTools import FORCE_COMMENT
+from ScoreboardTools import SBStoreType
+from ScoreboardTools import SB_ASSIGN
+from ScoreboardTools import SB_GET
+from ScoreboardTools import SB_OP
+from ScoreboardTools import SB_RESET
+from ScoreboardTools import SB_STORE
+from TailCallTools import AccumulateOperations
+from TailCallTools import AccumulatorName
+from TailCallTools import split_accumulate
+from ValueTools import gen_expr_into
+from ValueTools import int_constant
+from ValueTools import is_int_constant
+from ValueTools import reference_value
+
+
+def gen_return_breakpoint(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        file_namespace: str, clause: str | None = None) -> str:
+    """
+    启用return的断点, 之后的命令只在断点未启用时执行
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param file_namespace: 所在的文件命名空间
+    :type file_namespace: str
+    :param clause: 启用断点的条件子命令, None表示总是启用
+    :type clause: str | None
+    :return: 生成的命令
+    :rtype: str
+    """
+    command = ''
+    command += env.COMMENT("BP:Return.Enable")
+    breakpoint_id = f"breakpoint_return_{env.newID("return.breakpoint")}"
+    if clause is None:
+        command += SB_ASSIGN(
+            f"{breakpoint_id}", g_conf.SB_TEMP,
+            g_conf.Flags.TRUE, g_conf.SB_FLAGS
+        )
+    else:
+        command += store_success(breakpoint_id, g_conf.SB_TEMP, clause)
+
+    command += FORCE_COMMENT(BreakPointFlag(
+        "return",
+        name=breakpoint_id,
+        objective=g_conf.SB_TEMP
+    ))
+    raiseBreakPoint(env, file_namespace, "return", name=breakpoint_id, objective=g_conf.SB_TEMP)
+
+    return command
+
+
+def gen_native_return(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        value: ast.expr | None, func_ns: str, namespace: str, file_namespace: str) -> str:
+    """
+    使用return命令返回值
+
+    常量直接返回, 变量直接读取其计分项, 其他表达式读取结果计分项
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param value: 返回值表达式
+    :type value: ast.expr | None
+    :param func_ns: 当前函数的命名空间
+    :type func_ns: str
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 所在的文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    command = ''
+    command += env.COMMENT("Return:返回")
+
+    accumulate = func_ns in env.tail_accumulators
+    if value is None:
+        value = ast.Constant(value=0)
+    value = reference_value(env, value, namespace)
+
+    # 代码块中的return只能结束代码块本身, 返回值需要先写入返回值计分项
+    if not in_function_body(env, file_namespace):
+        if accumulate:
+            command += env.generate_code(value, namespace, file_namespace)
+            accumulate_op = AccumulateOperations[env.tail_accumulators[func_ns]][0]
+            command += env.COMMENT("Return:合并尾递归累加器")
+            command += SB_OP(
+                accumulate_op,
+                f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
+                f"{func_ns}.{AccumulatorName}", g_conf.SB_VARS
+            )
+            command += SB_ASSIGN(func_ns, g_conf.SB_FUNC_RESULT, f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
+        else:
+            command += gen_expr_into(env, g_conf, value, func_ns, g_conf.SB_FUNC_RESULT, namespace, file_namespace)
+        command += "return 1\n"
+        return command
+
+    if not accumulate and is_int_constant(value):
+        command += f"return {int_constant(value)}\n"
+        return command
+    if not accumulate and isinstance(value, ast.Name):
+        command += f"return run {SB_GET(env.ns_getter(value.id, namespace)[0], g_conf.SB_VARS)}"
+        return command
+
+    command += env.generate_code(value, namespace, file_namespace)
+    if accumulate:
+        accumulate_op = AccumulateOperations[env.tail_accumulators[func_ns]][0]
+        command += env.COMMENT("Return:合并尾递归累加器")
+        command += SB_OP(
+            accumulate_op,
+            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP,
+            f"{func_ns}.{AccumulatorName}", g_conf.SB_VARS
+        )
+    command += f"return run {SB_GET(f'{namespace}{g_conf.ResultExt}', g_conf.SB_TEMP)}"
+    return command
+
+
+def match_tail_call(
+        env: ABCEnvironment,
+        value: ast.expr | None, func_ns: str) -> tuple[ast.Call, ast.expr | None] | None:
+    """
+    检查返回值是否为对当前函数的尾调用
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param value: 返回值表达式
+    :type value: ast.expr | None
+    :param func_ns: 当前函数的命名空间
+    :type func_ns: str
+    :returns: (尾调用节点, 需要累加的表达式) 或 None
+    :rtype: tuple[ast.Call, ast.expr | None] | None
+    """
+    accumulate_value: ast.expr | None = None
+    if func_ns in env.tail_accumulators:
+        func_name = func_ns.rsplit('\\', 1)[1]
+        accumulate = split_accumulate(value, func_name)
+        if accumulate is not None:
+            value, accumulate_value, _ = accumulate
+
+    if not isinstance(value, ast.Call) or not isinstance(value.func, (ast.Name, ast.Attribute)) or value.keywords:
+        return None
+    if any(isinstance(arg, ast.Starred) for arg in value.args):
+        return None
+    try:
+        if env.ns_from_node(value.func, func_ns)[1] != func_ns:
+            return None
+    except KeyError:
+        return None
+
+    return value, accumulate_value
+
+
+def gen_tail_call(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        node: ast.Call, accumulate_value: ast.expr | None,
+        func_ns: str, namespace: str, file_namespace: str, native: bool = False) -> str:
+    """
+    生成尾调用: 更新累加器, 重新传参后直接进入函数体, 不保存当前栈帧, 返回值由被调用者直接写入
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param node: 尾调用节点
+    :type node: ast.Call
+    :param accumulate_value: 需要累加的表达式
+    :type accumulate_value: ast.expr | None
+    :param func_ns: 当前函数的命名空间
+    :type func_ns: str
+    :param namespace: 所在的命名空间
+    :type namespace: str
+    :param file_namespace: 所在的文件命名空间
+    :type file_namespace: str
+    :param native: 是否使用return命令将被调用者的返回值直接返回
+    :type native: bool
+    :return: 生成的命令
+    :rtype: str
+    """
+    command = ''
+    command += env.COMMENT("Return:尾调用", func=func_ns)
+
+    if accumulate_value is not None:
+        accumulate_op = AccumulateOperations[env.tail_accumulators[func_ns]][0]
+        command += env.COMMENT("Return:更新尾递归累加器")
+        command += env.generate_code(accumulate_value, namespace, file_namespace)
+        command += SB_OP(
+            accumulate_op,
+            f"{func_ns}.{AccumulatorName}", g_conf.SB_VARS,
+            f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP
+        )
+        command += SB_RESET(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
+
+    command += gen_pass_arguments(env, g_conf, func_ns, node, namespace, file_namespace)
+    func_path = func_ns.replace('\\', '/')
+    if not native:
+        command += f"function {func_path}\n"
+    elif in_function_body(env, file_namespace):
+        command += f"return run function {func_path}\n"
+    else:
+        command += SB_STORE(SBStoreType.RESULT, func_ns, g_conf.SB_FUNC_RESULT, f"function {func_path}")
+        command += "return 1\n"
+
+    return command
+
+
+__all__ = (
+    "gen_return_breakpoint",
+    "gen_native_return",
+    "match_tail_call",
+    "gen_tail_call",
+)
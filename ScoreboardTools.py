@@ -40,9 +40,15 @@ def init_name(name: str, objective: str) -> None:
     SB_Code2Name[objective][name] = name
 
 
+PlainObjectives: tuple[str, ...] = (ScoreBoards.Flags, ScoreBoards.Const)
+"""
+计分目标不会被编码的计分项 (标记位与常量池)
+"""
+
+
 def _init_flags(name: str, objective: str) -> None:
     """
-    如果是标记位计分项，则初始化计分目标
+    如果是标记位或常量池计分项，则初始化计分目标
 
     :param name: 目标
     :type name: str
@@ -51,7 +57,7 @@ def _init_flags(name: str, objective: str) -> None:
     :return: None
     :rtype: None
     """
-    if objective == ScoreBoards.Flags:
+    if objective in PlainObjectives:
         init_name(name, objective)
 
 
@@ -62,7 +68,7 @@ _SB_ID = 0
 
 def gen_code(name: str, objective: str) -> str:
     """
-    编码计分目标 (Flag计分项不会被编码)
+    编码计分目标 (标记位与常量池计分项不会被编码)
 
     :param name: 目标
     :type name: str
@@ -78,7 +84,7 @@ def gen_code(name: str, objective: str) -> str:
     if name in SB_Name2Code[objective]:
         return SB_Name2Code[objective][name]
 
-    if objective == ScoreBoards.Flags:
+    if objective in PlainObjectives:
         _init_flags(name, objective)
         return name
 
@@ -300,6 +306,90 @@ def SB_CONSTANT(name: str, objective: str, value: int, *, line_break: bool = Tru
     return command
 
 
+def SB_ADD(name: str, objective: str, value: int, *, line_break: bool = True) -> str:
+    """
+    将计分目标加上常量 (负数使用remove)
+
+    :param name: 目标
+    :type name: str
+    :param objective: 计分项
+    :type objective: str
+    :param value: 常量值, 绝对值不能超过2147483647
+    :type value: int
+    :param line_break: 是否换行
+    :type line_break: bool
+    :return: 生成的命令
+    :rtype: str
+    """
+    if abs(value) > 2 ** 31 - 1:
+        raise ValueError(f"value out of range: {value}")
+
+    action = "add" if value >= 0 else "remove"
+    command = f"scoreboard players {action} {gen_code(name, objective)} {objective} {abs(value)}"
+    if line_break:
+        command += "\n"
+
+    return command
+
+
+class SBStoreType:
+    """
+    命令结果存储模式
+    """
+    RESULT = "result"
+    SUCCESS = "success"
+
+
+def SB_STORE(store_type: str, name: str, objective: str, cmd: str, *, line_break: bool = True) -> str:
+    """
+    执行cmd, 并将其返回值或是否成功存储到计分目标
+
+    :param store_type: 存储模式 (SBStoreType)
+    :type store_type: str
+    :param name: 目标
+    :type name: str
+    :param objective: 计分项
+    :type objective: str
+    :param cmd: 要执行的命令
+    :type cmd: str
+    :param line_break: 是否换行
+    :type line_break: bool
+    :return: 生成的命令
+    :rtype: str
+    """
+    if cmd.endswith("\n"):
+        cmd = cmd[:-1]
+    if '\n' in cmd:
+        raise ValueError("cmd can't have more than one line")
+
+    command = f"execute store {store_type} score {gen_code(name, objective)} {objective} run {cmd}"
+    if line_break:
+        command += "\n"
+
+    return command
+
+
+def SB_GET(name: str, objective: str, *, line_break: bool = True) -> str:
+    """
+    读取计分目标的值 (作为命令的返回值)
+
+    :param name: 目标
+    :type name: str
+    :param objective: 计分项
+    :type objective: str
+    :param line_break: 是否换行
+    :type line_break: bool
+    :return: 生成的命令
+    :rtype: str
+    """
+    _init_flags(name, objective)
+    command = f"scoreboard players get {gen_code(name, objective)} {objective}"
+    if line_break:
+        command += "\n"
+
+    return command
+
+
 __all__ = (
     "SBCheckType",
     "SBCompareType",
@@ -310,8 +400,13 @@ __all__ = (
     "SB_OP",
     "SB_RESET",
     "SB_CONSTANT",
+    "SB_ADD",
+    "SBStoreType",
+    "SB_STORE",
+    "SB_GET",
 
     "IgnoreEncode",
+    "PlainObjectives",
 
     "SB_Name2Code",
     "SB_Code2Name",
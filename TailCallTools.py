@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+尾调用分析相关工具函数
+"""
+
+import ast
+
+from ScoreboardTools import SBOperationType
+
+AccumulateOperations: dict[type[ast.operator], tuple[str, int]] = {
+    ast.Add: (SBOperationType.ADD, 0),
+    ast.Mult: (SBOperationType.MULTIPLY, 1),
+}
+"""
+可以改写为累加器形式的运算符 -> (计分板运算, 单位元)
+"""
+
+AccumulatorName = "*TailAcc"
+
+
+def _walk_function_body(node: ast.FunctionDef):
+    """
+    遍历函数体内的节点 (不进入嵌套的函数定义)
+
+    :param node: 函数定义节点
+    :type node: ast.FunctionDef
+    :return: 节点生成器
+    """
+    stack: list[ast.AST] = list(node.body)
+    while stack:
+        sub_node = stack.pop()
+        yield sub_node
+        if isinstance(sub_node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+            continue
+        stack.extend(ast.iter_child_nodes(sub_node))
+
+
+def is_call_to(node: ast.AST | None, func_name: str) -> bool:
+    """
+    检查节点是否为对指定名称函数的调用
+
+    :param node: AST节点
+    :type node: ast.AST | None
+    :param func_name: 函数名
+    :type func_name: str
+    :return: 是否为调用
+    :rtype: bool
+    """
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == func_name
+
+
+def has_call(node: ast.AST) -> bool:
+    """
+    检查表达式内是否包含函数调用
+
+    :param node: AST节点
+    :type node: ast.AST
+    :return: 是否包含函数调用
+    :rtype: bool
+    """
+    return any(isinstance(sub_node, ast.Call) for sub_node in ast.walk(node))
+
+
+def split_accumulate(node: ast.AST | None, func_name: str) -> tuple[ast.Call, ast.expr, type[ast.operator]] | None:
+    """
+    将 `expr op f(...)` 或 `f(...) op expr` 形式的表达式拆分为 (递归调用, 另一操作数, 运算符)
+
+    另一操作数中不能包含任何函数调用
+
+    :param node: 返回值表达式
+    :type node: ast.AST | None
+    :param func_name: 函数名
+    :type func_name: str
+    :returns: (递归调用, 另一操作数, 运算符) 或 None
+    :rtype: tuple[ast.Call, ast.expr, type[ast.operator]] | None
+    """
+    if not isinstance(node, ast.BinOp) or type(node.op) not in AccumulateOperations:
+        return None
+
+    if is_call_to(node.right, func_name) and not has_call(node.left):
+        return node.right, node.left, type(node.op)
+    if is_call_to(node.left, func_name) and not has_call(node.right):
+        return node.left, node.right, type(node.op)
+    return None
+
+
+def find_accumulator(node: ast.FunctionDef) -> type[ast.operator] | None:
+    """
+    检查函数能否被改写为累加器形式的尾递归
+
+    要求函数对自身的所有调用都处于return中, 且形如 `return f(...)` 或 `return expr op f(...)`,
+    所有累加运算使用同一个满足结合律与交换律的运算符
+
+    :param node: 函数定义节点
+    :type node: ast.FunctionDef
+    :return: 累加运算符, 无法改写时返回None
+    :rtype: type[ast.operator] | None
+    """
+    self_calls = 0
+    tail_calls = 0
+    operations: set[type[ast.operator]] = set()
+
+    for sub_node in _walk_function_body(node):
+        if is_call_to(sub_node, node.name):
+            self_calls += 1
+        if not isinstance(sub_node, ast.Return):
+            continue
+
+        if is_call_to(sub_node.value, node.name):
+            tail_calls += 1
+            continue
+        accumulate = split_accumulate(sub_node.value, node.name)
+        if accumulate is not None:
+            tail_calls += 1
+            operations.add(accumulate[2])
+
+    if len(operations) != 1 or self_calls != tail_calls:
+        return None
+    return operations.pop()
+
+
+__all__ = (
+    "AccumulateOperations",
+    "AccumulatorName",
+    "is_call_to",
+    "has_call",
+    "split_accumulate",
+    "find_accumulator",
+)
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+# cython: language_level = 3
+"""
+读取与写入值相关的工具函数 (整数常量, 常量池, 函数引用)
+"""
+
+import ast
+import operator
+from typing import Callable
+
+from ABCTypes import ABCEnvironment
+from Configuration import CompileConfiguration
+from Configuration import GlobalConfiguration
+from NamespaceTools import join_file_ns
+from ScoreboardTools import SB_ASSIGN
+from ScoreboardTools import SB_CONSTANT
+from ScoreboardTools import SB_RESET
+from ScoreboardTools import gen_code
+from TailCallTools import AccumulateOperations
+from TailCallTools import AccumulatorName
+
+INT_MIN: int = -2 ** 31
+INT_MAX: int = 2 ** 31 - 1
+
+FoldOperators: dict[type[ast.operator], Callable[[int, int], int]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+}
+"""
+两侧都是常量时可以在编译期计算的运算符 (结果与计分板运算一致)
+"""
+
+
+def int_constant(node: ast.AST) -> int | None:
+    """
+    获取节点表示的整数常量 (包括布尔值, 带正负号的常量与常量之间的运算)
+
+    :param node: AST节点
+    :type node: ast.AST
+    :return: 常量值, 不是整数常量时返回None (常量运算的结果超出计分板取值范围时同样返回None)
+    :rtype: int | None
+    """
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd, ast.Invert)):
+        value = int_constant(node.operand)
+        if value is None:
+            return None
+        if isinstance(node.op, ast.Invert):
+            return ~value
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.BinOp) and type(node.op) in FoldOperators:
+        left, right = int_constant(node.left), int_constant(node.right)
+        if left is None or right is None:
+            return None
+        # 避免编译期计算过大的数 (以及python中不是整数的结果)
+        if isinstance(node.op, ast.Pow) and (right < 0 or (abs(left) > 1 and right >= 32)):
+            return None
+        if isinstance(node.op, (ast.LShift, ast.RShift)) and not 0 <= right < 32:
+            return None
+        if isinstance(node.op, (ast.FloorDiv, ast.Mod)) and right == 0:
+            return None
+        value = FoldOperators[type(node.op)](left, right)
+        return value if INT_MIN <= value <= INT_MAX else None
+    if isinstance(node, ast.Constant) and isinstance(node.value, int):
+        return int(node.value)
+    return None
+
+
+def is_int_constant(node: ast.AST) -> bool:
+    """
+    检查节点是否为整数常量 (包括布尔值与带正负号的常量)
+
+    :param node: AST节点
+    :type node: ast.AST
+    :return: 是否为整数常量
+    :rtype: bool
+    """
+    return int_constant(node) is not None
+
+
+def pool_constant(env: ABCEnvironment, g_conf: GlobalConfiguration, value: int) -> str:
+    """
+    将常量加入常量池
+
+    常量池计分项在模块加载时初始化, 运算时直接读取, 不需要每次设置临时变量
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param value: 常量值
+    :type value: int
+    :return: 常量在常量池计分项中的目标名称
+    :rtype: str
+    """
+    if not INT_MIN <= value <= INT_MAX:
+        raise Exception(f"常量 {value} 超出计分板的取值范围")
+    env.constant_pool.add(value)
+    gen_code(f"{value}", g_conf.SB_CONST)
+    return f"{value}"
+
+
+RuntimeFolder: str = ".builtin"
+"""
+运行时辅助函数所在的文件夹 (位于基础命名空间下, 所有模块共用)
+"""
+
+
+def runtime_helper(
+        env: ABCEnvironment,
+        name: str, build: Callable[[str], dict[str, str]]) -> str:
+    """
+    获取运行时辅助函数的命名空间, 第一次使用时写入辅助函数
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param name: 辅助函数名
+    :type name: str
+    :param build: 根据辅助函数的命名空间生成 {函数名: 代码} 的函数
+    :type build: Callable[[str], dict[str, str]]
+    :return: 辅助函数的命名空间
+    :rtype: str
+    """
+    base_namespace = env.c_conf.base_namespace
+    helper_ns = f"{base_namespace}{RuntimeFolder}\\{name}"
+    if name in env.runtime_helpers:
+        return helper_ns
+
+    if not env.runtime_helpers:
+        env.mkdirs_file_ns(RuntimeFolder)
+        env.file_ns_init(RuntimeFolder, None, "folder", base_namespace)
+    env.runtime_helpers.add(name)
+
+    for func_name, code in build(helper_ns).items():
+        file_ns = join_file_ns(RuntimeFolder, f"{func_name}.mcfunction")
+        env.file_ns_setter(f"{func_name}.mcfunction", file_ns, RuntimeFolder, "builtin", "mcfunction", base_namespace)
+        with env.writeable_file_namespace(file_ns, f"{base_namespace}{RuntimeFolder}") as f:
+            f.write(code)
+
+    return helper_ns
+
+
+def binds_directly(env: ABCEnvironment, func_ns: str) -> bool:
+    """
+    检查调用函数时能否将参数直接写入被调用函数的变量槽位
+
+    不处于递归环中的函数在执行期间不会被再次进入, 其变量槽位不会与其他栈帧冲突,
+    因此调用者可以直接写入, 函数头也不需要再从参数计分板复制参数
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param func_ns: 被调用函数的命名空间
+    :type func_ns: str
+    :return: 能否直接写入
+    :rtype: bool
+    """
+    func_def = env.func_defs.get(func_ns)
+    return func_def is not None and not env.call_graph.is_recursive(func_def)
+
+
+def returns_natively(env: ABCEnvironment, c_conf: CompileConfiguration, func_ns: str) -> bool:
+    """
+    检查函数是否使用return命令返回值 (需要目标版本支持 `return run` 与 `execute if function`)
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param c_conf: 编译配置
+    :type c_conf: CompileConfiguration
+    :param func_ns: 函数的命名空间
+    :type func_ns: str
+    :return: 是否使用return命令
+    :rtype: bool
+    """
+    return c_conf.NATIVE_RETURN and func_ns in env.func_defs
+
+
+def function_reference(env: ABCEnvironment, func_ns: str) -> int:
+    """
+    获取函数的引用编号, 第一次引用时生成该函数的跳板函数
+
+    跳板函数将通用参数槽位中的参数复制到函数的参数槽位后调用函数, 并将返回值传回调用者
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param func_ns: 函数的命名空间
+    :type func_ns: str
+    :return: 引用编号 (从1开始)
+    :rtype: int
+    """
+    if func_ns in env.function_refs:
+        return env.function_refs[func_ns]
+    if not env.c_conf.MACROS:
+        raise Exception("函数引用需要目标版本支持函数宏 (function ... with)")
+
+    g_conf = env.g_conf
+    ref_id = len(env.function_refs) + 1
+    env.function_refs[func_ns] = ref_id
+    call_ns = f"{env.c_conf.base_namespace}{RuntimeFolder}\\call"
+    func_path = func_ns.replace('\\', '/')
+
+    code = ''
+    objective = g_conf.SB_VARS if binds_directly(env, func_ns) else g_conf.SB_ARGS
+    for index, name in enumerate(env.func_args[func_ns]):
+        # 参数由调用者写入
+        gen_code(f"{call_ns}.arg{index}", g_conf.SB_ARGS)
+        code += SB_ASSIGN(f"{func_ns}.{name}", objective, f"{call_ns}.arg{index}", g_conf.SB_ARGS)
+    if func_ns in env.tail_accumulators:
+        identity = AccumulateOperations[env.tail_accumulators[func_ns]][1]
+        code += SB_CONSTANT(f"{func_ns}.{AccumulatorName}", g_conf.SB_VARS, identity)
+
+    if returns_natively(env, env.c_conf, func_ns):
+        code += f"return run function {func_path}\n"
+    elif env.c_conf.NATIVE_RETURN:
+        # 协程没有返回值
+        code += f"function {func_path}\n"
+        code += "return 0\n"
+    else:
+        gen_code(func_ns, g_conf.SB_FUNC_RESULT)
+        code += f"function {func_path}\n"
+        code += SB_ASSIGN(f"{call_ns}.result", g_conf.SB_FUNC_RESULT, func_ns, g_conf.SB_FUNC_RESULT)
+        code += SB_RESET(func_ns, g_conf.SB_FUNC_RESULT)
+
+    runtime_helper(env, f"ref.{ref_id}", lambda helper_ns: {f"ref.{ref_id}": code})
+    return ref_id
+
+
+def reference_value(env: ABCEnvironment, node: ast.expr, namespace: str) -> ast.expr:
+    """
+    将作为值使用的函数名替换为函数引用 (引用编号常量)
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param node: 表达式节点
+    :type node: ast.expr
+    :param namespace: 当前命名空间
+    :type namespace: str
+    :return: 函数名对应的引用编号常量, 不是函数名时返回原节点
+    :rtype: ast.expr
+    """
+    if not isinstance(node, ast.Name) or not isinstance(node.ctx, ast.Load):
+        return node
+    try:
+        func_ns = env.ns_from_node(node, namespace)[1]
+    except KeyError:
+        return node
+    if func_ns not in env.func_args:
+        return node
+    return ast.copy_location(ast.Constant(value=function_reference(env, func_ns)), node)
+
+
+def gen_expr_into(
+        env: ABCEnvironment,
+        g_conf: GlobalConfiguration,
+        node: ast.expr, target: str, objective: str, namespace: str, file_namespace: str) -> str:
+    """
+    计算表达式并将结果写入指定的计分项
+
+    常量与变量直接写入目标, 不经过结果计分项
+
+    :param env: 运行环境
+    :type env: ABCEnvironment
+    :param g_conf: 全局配置
+    :type g_conf: GlobalConfiguration
+    :param node: 表达式节点
+    :type node: ast.expr
+    :param target: 目标计分项名称
+    :type target: str
+    :param objective: 目标计分板
+    :type objective: str
+    :param namespace: 当前命名空间
+    :type namespace: str
+    :param file_namespace: 当前文件命名空间
+    :type file_namespace: str
+    :return: 生成的命令
+    :rtype: str
+    """
+    node = reference_value(env, node, namespace)
+    if is_int_constant(node):
+        return SB_CONSTANT(target, objective, int_constant(node))
+
+    if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+        target_ns = env.ns_getter(node.id, namespace)[0]
+        return SB_ASSIGN(target, objective, target_ns, g_conf.SB_VARS)
+
+    command = env.generate_code(node, namespace, file_namespace)
+    if (target, objective) != (f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP):
+        command += SB_ASSIGN(target, objective, f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
+        command += SB_RESET(f"{namespace}{g_conf.ResultExt}", g_conf.SB_TEMP)
+    return command
+
+
+__all__ = (
+    "INT_MIN",
+    "INT_MAX",
+    "FoldOperators",
+    "int_constant",
+    "is_int_constant",
+    "pool_constant",
+    "RuntimeFolder",
+    "runtime_helper",
+    "binds_directly",
+    "returns_natively",
+    "function_reference",
+    "reference_value",
+    "gen_expr_into",
+)
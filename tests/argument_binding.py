@@ -0,0 +1,29 @@
+from template.MinecraftSupport.builtin import tprint
+
+x = 4
+
+
+# MCFC: noinline
+def add(a, b):
+    return a + b
+
+
+# MCFC: noinline
+def digits(a, b, c):
+    return a * 100 + b * 10 + c
+
+
+# MCFC: noinline
+def bump():
+    global x
+    x += 1
+    return x
+
+
+# 参数直接写入被调用函数的变量
+tprint(add(x, 5))  # 9
+# 参数中的调用在写入之前完成, 不会覆盖已经写入的参数
+tprint(add(1, add(2, 3)))  # 6
+tprint(digits(add(1, 1), 3, add(x, x)))  # 238
+# 之后的参数中的调用可能修改之前读取的变量, 此时之前的参数先暂存
+tprint(digits(x, bump(), x))  # 455
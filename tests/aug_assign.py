@@ -0,0 +1,24 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+def square(v):
+    return v * v
+
+
+# 增量赋值直接在变量上运算, 不经过临时变量
+def combine(a, b):
+    c = a
+    c += 1
+    c -= -3
+    c *= b
+    c -= a
+    c //= 2
+    c %= 1000
+    c += square(b) + 1
+    c *= -1
+    b += b
+    return c * 1000 + b
+
+
+tprint(combine(2, 5))  # -39990
+tprint(combine(-7, 3))  # -1008994
@@ -0,0 +1,29 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+def bit_and(a, b):
+    return a & b
+
+
+def bit_xor(a, b):
+    return a ^ b
+
+
+def shift_right(a, n):
+    return a >> n
+
+
+# 变量之间的按位运算通过运行时辅助函数逐位计算 (目标版本不低于1.20.2时通过函数宏查表)
+tprint(bit_and(12, 10), bit_xor(12, 10))  # 8 6
+tprint(bit_and(-12, 10), bit_xor(-12, -10))  # 0 2
+tprint(bit_xor(2147483647, -2147483648))  # -1
+tprint(shift_right(-17, 2), shift_right(-17, 40))  # -5 -1
+
+# 与常量的按位运算与移位转换为乘除法与取余
+x = 1000
+tprint(x & 7, x & -8, x | 5, x ^ 255)  # 0 1000 1005 791
+tprint(~x, x << 3, -x >> 3)  # -1001 8000 -125
+flags = 0
+flags |= 5
+flags &= ~4
+tprint(flags)  # 1
@@ -0,0 +1,20 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+def double(a):
+    return a * 2
+
+
+# 比较与not的结果通过 execute store success 直接写入变量
+def flags(a, b):
+    p = a < b
+    q = not a
+    r = not (a == 3)
+    s = double(a) > b + 1
+    u = b >= double(b)
+    return p + q * 10 + r * 100 + s * 1000 + u * 10000
+
+
+tprint(flags(3, 4))  # 1001
+tprint(flags(0, -1))  # 10110
+tprint(flags(5, 2))  # 1100
@@ -0,0 +1,29 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+# MCFC: noinline
+def square(x):
+    y = x * x
+    return y
+
+
+# square不会再次进入sum_squares, 调用前后不保存栈帧, 局部变量仍然保持不变
+def sum_squares(n):
+    s = 0
+    i = n
+    s = s + square(i)
+    s = s + square(i + 1)
+    return s * 10 + i
+
+
+# 递归函数中的调用会再次进入自身, 调用前后需要保存栈帧
+def countdown(n):
+    k = n * 10
+    if n == 0:
+        return 0
+    else:
+        return k - countdown(n - 1)
+
+
+tprint(sum_squares(3))  # 253
+tprint(countdown(4))  # 20
@@ -0,0 +1,30 @@
+from template.MinecraftSupport.builtin import tprint
+
+# 函数引用通过函数宏调用, 编译时需要指定目标版本不低于1.20.2:
+# CompileConfiguration(..., target_version=(1, 20, 2))
+
+
+def double(x):
+    return x * 2
+
+
+def square(x):
+    return x * x
+
+
+def apply(func, x):
+    return func(x)
+
+
+async def every(handler, times):
+    for i in range(times):
+        handler(i)
+        await sleep(20)
+
+
+def show(i):
+    tprint(apply(square, i))
+
+
+tprint(apply(double, 21))
+every(show, 3)
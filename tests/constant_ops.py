@@ -0,0 +1,22 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+# 与常量的加减使用 scoreboard players add/remove, 其余运算从常量池读取常量
+def mix(a):
+    b = a + 1
+    c = 3 - a
+    d = a * 7
+    e = a // -2
+    f = a % 5
+    g = a - -4
+    return b + c + d + e + f + g
+
+
+# 与常量的比较转换为 matches 范围
+def check(a):
+    return (a == 100) + (a < 5) * 10 + (-3 >= a) * 100 + (a != 2) * 1000
+
+
+tprint(mix(6), mix(-5))  # 54 -30
+tprint(check(100), check(2), check(-3), check(4))  # 1001 10 1110 1010
+tprint(2147483647 - mix(0))  # 2147483639
@@ -0,0 +1,22 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+def countdown(n):
+    while n > 0:
+        yield n
+        n -= 1
+
+
+async def blink(times):
+    for i in range(times):
+        tprint(i)
+        await sleep(20)
+    tprint(times)
+
+
+total = 0
+for value in countdown(5):
+    total += value
+
+tprint(total)
+blink(3)
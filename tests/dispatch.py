@@ -0,0 +1,37 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+# 同一个变量与整数常量比较的if/elif链通过二分查找选择分支
+def name(x):
+    if x == 0:
+        r = 10
+    elif x == 1:
+        r = 11
+    elif x == 2 or x == 3:
+        r = 12
+    elif x in (5, 7, 9):
+        r = 13
+    elif x == 100:
+        r = 15
+    else:
+        r = -1
+    return r
+
+
+# match语句同样使用二分查找, case 变量名 匹配其余的值
+def describe(v):
+    match v * 2:
+        case 0:
+            r = 1
+        case 2 | 4:
+            r = 2
+        case 6:
+            v = 9
+            r = v
+        case other:
+            r = other + 1000
+    return r
+
+
+tprint(name(0), name(3), name(7), name(100), name(8))  # 10 12 13 15 -1
+tprint(describe(0), describe(2), describe(3), describe(9))  # 1 2 9 1018
@@ -0,0 +1,21 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+def square(v):
+    tprint(v)
+    return v * v
+
+
+# 只有一条命令的分支直接内联, 只计算被选中的分支
+def pick(a, b):
+    x = a if a > b else b
+    y = 1 if not a else -1
+    z = square(a) if a + b > 3 else square(b) + 1
+    # 分支修改了条件读取的变量
+    a = a + 1 if a == 2 else a
+    return x + y * 10 + z * 100 + a * 10000
+
+
+tprint(pick(2, 5))  # 2, 然后输出 30395
+tprint(pick(0, 1))  # 1, 然后输出 211
+tprint(pick(-3, 0))  # 0, 然后输出 -29910
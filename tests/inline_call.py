@@ -0,0 +1,18 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+def add(a, b):
+    return a + b
+
+
+# MCFC: noinline
+def sub(a, b):
+    return a - b
+
+
+def scale(x):  # MCFC: inline
+    y = x * 10
+    return add(y, 1)
+
+
+tprint(add(1, 2), sub(5, 3), scale(4))
@@ -0,0 +1,25 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+def clamp(v, lo, hi):
+    return max(lo, min(v, hi))
+
+
+def show(x):
+    tprint(x)
+    return x
+
+
+# min/max每个操作数一条比较命令, abs只对负数取反
+tprint(clamp(15, 0, 10), clamp(-4, 0, 10), clamp(5, 0, 10))  # 10 0 5
+tprint(abs(3 - 10), abs(10 - 3))  # 7 7
+# 包含调用的操作数保持从左到右的求值顺序
+tprint(min(show(4), show(2), 9))  # 4 2, 然后输出 2
+
+# divmod同时得到向下取整的商和余数
+a = 7
+b = -3
+q, r = divmod(a, b)
+tprint(q, r)  # -3 -2
+q, r = divmod(show(17) + 1, show(-5))
+tprint(q, r)  # 17 -5, 然后输出 -4 -2
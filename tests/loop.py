@@ -0,0 +1,35 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+def first_divisor(n):
+    d = 2
+    while d * d <= n:
+        if n % d == 0:
+            return d
+        d += 1
+    return n
+
+
+i = 0
+indexes = 0
+
+
+def add_index():
+    global indexes
+    indexes += i
+
+
+for i in range(3):
+    add_index()
+
+total = 0
+for i in range(10):
+    if i % 3 == 0:
+        continue
+    if i > 7:
+        break
+    total += i
+else:
+    total = -1
+
+tprint(total, first_divisor(91), first_divisor(13), indexes)
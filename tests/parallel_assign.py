@@ -0,0 +1,32 @@
+from template.MinecraftSupport.builtin import tprint
+
+g = 1
+
+
+def f():
+    global g
+    g += 4
+    return 2
+
+
+def h(x):
+    global g
+    g += x
+    return g
+
+
+# 交换与斐波那契
+a, b = 0, 1
+for i in range(10):
+    a, b = b, a + b
+tprint(a)
+
+# 函数调用之前的值按从左到右的顺序求值: a为1而不是5
+a, b = g, f()
+tprint(a)
+tprint(b)
+
+# 重复的目标只保留最后一次赋值, 但被覆盖的调用仍然会执行
+c, c = h(1), h(2)
+tprint(c)
+tprint(g)
@@ -0,0 +1,18 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+def power(x, n):
+    return x ** n
+
+
+# 常量指数展开为平方与乘法
+a = 3
+tprint(a ** 0, a ** 1, a ** 5, a ** 8)  # 1 3 243 6561
+tprint((a + 1) ** 7)  # 16384
+b = 4
+b **= 3
+tprint(b)  # 64
+
+# 变量指数通过运行时的快速幂辅助函数计算
+tprint(power(2, 20), power(-3, 5), power(7, 0))  # 1048576 -243 1
+tprint(power(1, 1000000), power(-1, 7))  # 1 -1
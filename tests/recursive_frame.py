@@ -0,0 +1,27 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+# 调用前已经读取完毕的临时变量(循环条件, if的条件)不会保存到栈帧
+# (使用return命令返回值时, 恢复栈帧会覆盖调用结果, 输出将不再是96)
+def walk(n):
+    total = 0
+    while n % 4 != 0:
+        total += walk(n - 1)
+        n -= 1
+    if n > 4:
+        n = 0
+    else:
+        total += walk(n - 1) if n > 0 else 1
+    return total + n
+
+
+# 调用时仍未使用的临时变量(二元运算暂存的左值)需要保存
+def tree(n):
+    if n < 2:
+        return n
+    else:
+        return (n * 2) - tree(n - 1) + tree(n - 2)
+
+
+tprint(walk(7))  # 96
+tprint(tree(10))  # 31
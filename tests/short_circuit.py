@@ -0,0 +1,28 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+def show(v):
+    tprint(v)
+    return v
+
+
+# and/or返回决定结果的操作数, 右侧只在需要时求值
+def logic(a, b):
+    p = a and b
+    q = a or b
+    r = show(a) and show(b)
+    return p + q * 10 + r * 100
+
+
+# 链式比较的中间操作数只求值一次
+def between(a, b, c):
+    x = a < b < c
+    y = 0 <= a < 10
+    z = show(a) < show(b) <= show(c)
+    return x + y * 10 + z * 100
+
+
+tprint(logic(0, 5))  # 0, 然后输出 50
+tprint(logic(2, 3))  # 2 3, 然后输出 323
+tprint(between(1, 2, 3))  # 1 2 3, 然后输出 111
+tprint(between(3, 2, 1))  # 3 2, 然后输出 10
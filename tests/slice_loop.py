@@ -0,0 +1,19 @@
+from template.MinecraftSupport.builtin import tprint
+
+total = 0
+# MCFC: slice=3, done=sumDone
+for i in range(10):
+    total += i
+else:
+    tprint(total)
+
+steps = 0
+m = 27
+while m % 1000 != 1:  # MCFC: slice=4
+    if m % 2 == 0:
+        m = m // 2
+    else:
+        m = 3 * m + 1
+    steps += 1
+else:
+    tprint(steps, sumDone)
@@ -0,0 +1,40 @@
+from template.MinecraftSupport.builtin import tprint
+
+
+# 尾调用: 直接复用当前函数的参数
+def count(n, acc):
+    if n == 0:
+        return acc
+    else:
+        return count(n - 1, acc + n)
+
+
+# 乘法累加器: n * factorial(n - 1)
+def factorial(n):
+    if n == 0:
+        return 1
+    else:
+        return n * factorial(n - 1)
+
+
+# 加法累加器: sum_to(n - 1) + n
+def sum_to(n):
+    if n == 0:
+        return 0
+    else:
+        return sum_to(n - 1) + n
+
+
+# 基本情况返回变量时同样需要与累加器合并
+def power(base, n):
+    if n == 0:
+        return base // base
+    else:
+        return base * power(base, n - 1)
+
+
+tprint(count(100, 0))  # 5050
+tprint(factorial(5))  # 120
+tprint(sum_to(10))  # 55
+tprint(power(3, 4))  # 81
+tprint(factorial(3) + sum_to(3))  # 12